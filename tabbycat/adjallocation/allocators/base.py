@@ -7,6 +7,7 @@ from draw.models import Debate
 from participants.models import Team
 
 from ..conflicts import ConflictsInfo, HistoryInfo
+from ..progress import AllocationProgress
 
 logger = logging.getLogger(__name__)
 
@@ -24,11 +25,14 @@ class AdjudicatorAllocationError(RuntimeError):
 
 class BaseAdjudicatorAllocator:
 
-    def __init__(self, debates, adjudicators, round):
+    def __init__(self, debates, adjudicators, round, progress=None):
+        """`progress`, if given, is an `AllocationProgress` instance through
+        which the allocator reports its progress and checks for cancellation."""
         self.tournament = round.tournament
         self.round = round
         self.debates = debates
         self.adjudicators = adjudicators
+        self.progress = progress or AllocationProgress()
 
         if len(self.adjudicators) == 0:
             info = _("There are no available adjudicators. Ensure there are "
@@ -43,8 +47,10 @@ class BaseAdjudicatorAllocator:
         else:
             teams = None
 
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators)
-        self.history = HistoryInfo(round=round)
+        with self.progress.phase("loading_conflicts", _("Loading conflicts and history")):
+            self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators,
+                                           tournament=self.tournament)
+            self.history = HistoryInfo(round=round)
 
     def allocate(self):
         raise NotImplementedError
@@ -2,8 +2,10 @@ import logging
 import random
 from math import exp
 
+import munkres
+import numpy as np
 from django.utils.translation import gettext as _, ngettext
-from munkres import Munkres
+from scipy.optimize import linear_sum_assignment
 
 from .base import AdjudicatorAllocationError, BaseAdjudicatorAllocator, register
 from ..allocation import AdjudicatorAllocation
@@ -12,10 +14,27 @@ logger = logging.getLogger(__name__)
 
 
 class BaseHungarianAllocator(BaseAdjudicatorAllocator):
+    """Base class for allocators that solve an assignment problem between
+    adjudicators and positions in debates.
 
-    def __init__(self, *args, **kwargs):
+    The `assignment_backend` keyword argument chooses the solver:
+        "scipy"   - scipy.optimize.linear_sum_assignment (default)
+        "munkres" - the pure-Python munkres package, much slower on large
+                    tournaments; retained mainly for parity testing
+    """
+
+    ASSIGNMENT_BACKEND_FUNCTIONS = {
+        "scipy"  : "_solve_scipy",
+        "munkres": "_solve_munkres",
+    }
+
+    def __init__(self, *args, assignment_backend="scipy", **kwargs):
         super().__init__(*args, **kwargs)
 
+        if assignment_backend not in self.ASSIGNMENT_BACKEND_FUNCTIONS:
+            raise ValueError("Unrecognised assignment backend: %r" % assignment_backend)
+        self.assignment_backend = assignment_backend
+
         t = self.tournament
         self.min_score = t.pref('adj_min_score')
         self.max_score = t.pref('adj_max_score')
@@ -27,8 +46,6 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
         self.feedback_weight = self.round.feedback_weight
         self.user_warnings = []  # Surfaced to users for non-error disclosures
 
-        self.munkres = Munkres()
-
     def allocate(self):
         self.populate_adj_scores(self.adjudicators)
         return self.run_allocation(), self.user_warnings
@@ -64,6 +81,9 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
             logger.warning(warning_msg)
 
     def calc_cost(self, debate, adj, adjustment=0, chair=None):
+        """Returns the cost of a single debate-adjudicator pair. The allocators
+        use `calc_cost_matrix()`, which returns the same costs for all pairs at
+        once; this is kept as the reference implementation."""
         cost = 0
 
         # Normalise debate importances back to the 1-5 (not ±2) range expected
@@ -85,20 +105,85 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
 
         return cost
 
+    def calc_cost_matrix(self, debates, adjs, adjustments=0.0, chairs=None):
+        """Returns a NumPy array whose (i, j)th element is the same as
+        `self.calc_cost(debates[i], adjs[j], adjustments[i], chairs[i])`.
+        `debates` may repeat debates that have more than one position.
+        `adjustments` may be a scalar or a sequence as long as `debates`, and
+        `chairs`, if given, is a sequence as long as `debates` (whose elements
+        may be None)."""
+
+        # Conflict and history penalties for each adjudicator-team pair, then
+        # summed over the teams in each debate
+        teams = list({team.id: team for debate in debates for team in debate.teams}.values())
+        team_index = {team.id: k for k, team in enumerate(teams)}
+        penalties = np.zeros((len(adjs), len(teams)))
+        if teams:
+            penalties += self.conflict_penalty * self.conflicts.conflict_matrix_adj_team(adjs, teams)
+            penalties += self.history_penalty * self.history.seen_matrix_adj_team(adjs, teams)
+        debate_teams = np.zeros((len(debates), len(teams)))
+        for i, debate in enumerate(debates):
+            for team in debate.teams:
+                debate_teams[i, team_index[team.id]] = 1
+        cost = debate_teams @ penalties.T
+
+        # Conflict and history penalties with the chair in each position
+        if chairs is not None:
+            chair_list = list({chair.id: chair for chair in chairs if chair is not None}.values())
+            chair_index = {chair.id: k for k, chair in enumerate(chair_list)}
+            chair_penalties = self.conflict_penalty * self.conflicts.conflict_matrix_adj_adj(adjs, chair_list) + \
+                self.history_penalty * self.history.seen_matrix_adj_adj(adjs, chair_list)
+            for i, chair in enumerate(chairs):
+                if chair is not None:
+                    cost[i] += chair_penalties[:, chair_index[chair.id]]
+
+        # Normalise debate importances back to the 1-5 (not ±2) range expected
+        impt = np.array([debate.importance + 3 for debate in debates], dtype=float) + adjustments
+        scores = np.array([adj._normalized_score for adj in adjs], dtype=float)
+        diff = 5 + impt[:, np.newaxis] - scores[np.newaxis, :]
+        with np.errstate(over='ignore'):
+            cost += np.where(diff > 0.25, 1000 * np.exp(diff - 0.25), 0.0)
+
+        cost += self.max_score - scores
+
+        return cost
+
+    def solve_assignment_phase(self, key, cost_matrix):
+        """Calls `solve_assignment()` as a phase reported to `self.progress`."""
+        rows, columns = cost_matrix.shape
+        text = _("Solving matrix %(rows)d×%(columns)d") % {'rows': rows, 'columns': columns}
+        with self.progress.phase(key, text, rows=rows, columns=columns):
+            return self.solve_assignment(cost_matrix)
+
+    def solve_assignment(self, cost_matrix):
+        """Returns a list of (row, column) pairs minimising the total cost,
+        sorted by row. Not every row (or column) is assigned if the matrix
+        isn't square."""
+        solver = getattr(self, self.ASSIGNMENT_BACKEND_FUNCTIONS[self.assignment_backend])
+        return solver(cost_matrix)
+
+    @staticmethod
+    def _solve_scipy(cost_matrix):
+        rows, cols = linear_sum_assignment(cost_matrix)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    @staticmethod
+    def _solve_munkres(cost_matrix):
+        matrix = [[munkres.DISALLOWED if x == np.inf else x for x in row] for row in cost_matrix.tolist()]
+        return munkres.Munkres().compute(matrix)
+
     def allocate_trainees(self, trainees, allocation, debates):
         if len(trainees) > 0 and len(debates) > 0:
             allocation_by_debate = {aa.container: aa for aa in allocation}
 
             logger.info("costing trainees")
-            cost_matrix = []
-            for debate in debates:
-                chair = allocation_by_debate[debate].chair
-                row = [self.calc_cost(debate, adj, adjustment=-2.0, chair=chair) for adj in trainees]
-                cost_matrix.append(row)
-
-            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indices)
+            with self.progress.phase("costing_trainees", _("Costing trainees")):
+                chairs = [allocation_by_debate[debate].chair for debate in debates]
+                cost_matrix = self.calc_cost_matrix(debates, trainees, adjustments=-2.0, chairs=chairs)
+
+            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", *cost_matrix.shape)
+            indices = self.solve_assignment_phase("solving_trainees", cost_matrix)
+            total_cost = sum(cost_matrix[i, j] for i, j in indices)
             logger.info('total cost for %d trainees: %f', len(indices), total_cost)
 
             result = ((debates[i], trainees[j]) for i, j in indices if i < len(debates))
@@ -180,14 +265,12 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
 
         if len(solos) > 0 and len(solo_debates) > 0:
             logger.info("costing solos")
-            cost_matrix = []
-            for debate in solo_debates:
-                row = [self.calc_cost(debate, adj) for adj in solos]
-                cost_matrix.append(row)
-
-            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indices)
+            with self.progress.phase("costing_chairs", _("Costing chairs")):
+                cost_matrix = self.calc_cost_matrix(solo_debates, solos)
+
+            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", *cost_matrix.shape)
+            indices = self.solve_assignment_phase("solving_chairs", cost_matrix)
+            total_cost = sum(cost_matrix[i, j] for i, j in indices)
             logger.info('total cost for %d solo debates: %f', len(solos), total_cost)
 
             result = ((solo_debates[i], solos[j]) for i, j in indices if i < len(solo_debates))
@@ -202,18 +285,20 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
         # Allocate panellists
         if len(panellists) > 0 and len(panel_debates) > 0:
             logger.info("costing panellists")
-            cost_matrix = []
-            for i, debate in enumerate(panel_debates):
-                for j in range(3):
-                    # for the top half of these debates, the final panellist
-                    # can be of lower quality than the other 2
-                    adjustment = -1.0 if i < len(panel_debates)/2 and j == 2 else 0.0
-                    row = [self.calc_cost(debate, adj, adjustment) for adj in panellists]
-                    cost_matrix.append(row)
-
-            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indices)
+            with self.progress.phase("costing_panellists", _("Costing panellists")):
+                positions = []
+                adjustments = []
+                for i, debate in enumerate(panel_debates):
+                    for j in range(3):
+                        # for the top half of these debates, the final panellist
+                        # can be of lower quality than the other 2
+                        positions.append(debate)
+                        adjustments.append(-1.0 if i < len(panel_debates)/2 and j == 2 else 0.0)
+                cost_matrix = self.calc_cost_matrix(positions, panellists, adjustments=np.array(adjustments))
+
+            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", *cost_matrix.shape)
+            indices = self.solve_assignment_phase("solving_panellists", cost_matrix)
+            total_cost = sum(cost_matrix[i, j] for i, j in indices)
             logger.info('total cost for %d panel debates: %f', len(panel_debates), total_cost)
 
             # transfer the indices to the debates
@@ -289,17 +374,20 @@ class ConsensusHungarianAllocator(BaseHungarianAllocator):
 
         # Allocate voting
         logger.info("costing voting adjudicators")
-        cost_matrix = []
-        for debate, njudges in zip(debates_sorted, judges_per_room):
-            for i in range(njudges):
-                row = [self.calc_cost(debate, adj, adjustment=-i) for adj in voting]
-                cost_matrix.append(row)
+        with self.progress.phase("costing_voting", _("Costing voting adjudicators")):
+            positions = []
+            adjustments = []
+            for debate, njudges in zip(debates_sorted, judges_per_room):
+                for i in range(njudges):
+                    positions.append(debate)
+                    adjustments.append(-i)
+            cost_matrix = self.calc_cost_matrix(positions, voting, adjustments=np.array(adjustments, dtype=float))
 
         logger.info("optimizing voting adjudicators (matrix size: %d positions by %d adjudicators)",
-                len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
+                *cost_matrix.shape)
+        indices = self.solve_assignment_phase("solving_voting", cost_matrix)
         indices.sort()
-        total_cost = sum(cost_matrix[i][j] for i, j in indices)
+        total_cost = sum(cost_matrix[i, j] for i, j in indices)
         logger.info('total cost for %d debates: %f', n_debates, total_cost)
 
         # transfer the indices to the debates
@@ -1,23 +1,59 @@
 """Utilities for querying and listing conflicts and history between
 participants."""
 import logging
-from itertools import combinations, product
+
+import numpy as np
 
 from adjallocation.models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
                      AdjudicatorTeamConflict, TeamInstitutionConflict)
-from draw.models import Debate
-from participants.models import Adjudicator, Team
+from participants.models import Adjudicator, Institution, Team
+
+from .snapshot import ConflictsSnapshot, HistorySnapshot
 
 logger = logging.getLogger(__name__)
 
 
+def _pairs_to_matrix(pairs, rows, cols):
+    """Returns a boolean array whose (i, j)th element is True if the pair
+    `(rows[i].id, cols[j].id)` is in `pairs`."""
+    row_index = {obj.id: i for i, obj in enumerate(rows)}
+    col_index = {obj.id: j for j, obj in enumerate(cols)}
+    matrix = np.zeros((len(rows), len(cols)), dtype=bool)
+    for row_id, col_id in pairs:
+        if row_id in row_index and col_id in col_index:
+            matrix[row_index[row_id], col_index[col_id]] = True
+    return matrix
+
+
+def _shared_institutions_matrix(row_institutions, col_institutions):
+    """Takes two lists of sets of institutions, and returns a boolean array
+    whose (i, j)th element is True if the ith set of `row_institutions` and
+    the jth set of `col_institutions` intersect."""
+    inst_index = {}
+    for institutions in row_institutions:
+        for inst in institutions:
+            inst_index.setdefault(inst.id, len(inst_index))
+
+    def incidence(list_of_sets):
+        matrix = np.zeros((len(list_of_sets), len(inst_index)), dtype=np.int32)
+        for i, institutions in enumerate(list_of_sets):
+            for inst in institutions:
+                if inst.id in inst_index:
+                    matrix[i, inst_index[inst.id]] = 1
+        return matrix
+
+    return (incidence(row_institutions) @ incidence(col_institutions).T) > 0
+
+
 class ConflictsInfo:
     """Manages information about conflicts between participants.
 
     The main purpose of this class is to streamline queries about conflicts.
     This class hits the database once, on creation, with one query per type of
     conflict (adjudicator-team, adjudicator-adjudicator, adjudicator-institution
-    and adjudicator-team). It then can be used to find efficiently whether
+    and adjudicator-team). If `tournament` is given, conflicts are instead
+    taken from the tournament's cached snapshot (see `snapshot.py`), so only
+    institutions are fetched. It then can be used to find efficiently whether
     particular participants conflict, without a need for further SQL queries or
     excessive data processing.
 
@@ -30,10 +66,13 @@ class ConflictsInfo:
     methods of the class to access conflict information.
     """
 
-    def __init__(self, teams=None, adjudicators=None):
+    def __init__(self, teams=None, adjudicators=None, tournament=None):
         self.teams = teams or Team.objects.none()
         self.adjudicators = adjudicators or Adjudicator.objects.none()
-        self._fetch_conflicts_from_db()
+        if tournament is None:
+            self._fetch_conflicts_from_db()
+        else:
+            self._load_conflicts_from_snapshot(ConflictsSnapshot.get(tournament.id))
 
     def _fetch_conflicts_from_db(self):
         """Fetches relevant conflicts from the database, based on `self.teams`
@@ -94,6 +133,40 @@ class ConflictsInfo:
                 logger.warning("Couldnt add conflict for adjudicator ID %s to \
                                 institution %s" % (conflict.adjudicator_id, conflict.institution))
 
+    def _load_conflicts_from_snapshot(self, snapshot):
+        """Populates the same attributes as `_fetch_conflicts_from_db()`, but
+        from a `ConflictsSnapshot`."""
+
+        self.adjudicator_ids = {adj.id for adj in self.adjudicators}
+        self.team_ids = {team.id for team in self.teams}
+        adj_ids = list(self.adjudicator_ids)
+        team_ids = list(self.team_ids)
+
+        def covered(rows, first_ids, second_ids=None):
+            mask = np.isin(rows[:, 1], first_ids)
+            if second_ids is not None:
+                mask &= np.isin(rows[:, 2], second_ids)
+            return rows[mask, 1:].tolist()
+
+        self.adjteamconflicts = set(map(tuple, covered(snapshot.adjteam, adj_ids, team_ids)))
+
+        self.adjadjconflicts = set()
+        for adj1_id, adj2_id in covered(snapshot.adjadj, adj_ids, adj_ids):
+            self.adjadjconflicts.add((adj1_id, adj2_id))
+            self.adjadjconflicts.add((adj2_id, adj1_id))
+
+        teaminst = covered(snapshot.teaminst, team_ids)
+        adjinst = covered(snapshot.adjinst, adj_ids)
+        institutions = Institution.objects.in_bulk({inst_id for _, inst_id in teaminst + adjinst})
+
+        self.teaminstconflicts = {team_id: set() for team_id in self.team_ids}
+        for team_id, inst_id in teaminst:
+            self.teaminstconflicts[team_id].add(institutions[inst_id])
+
+        self.adjinstconflicts = {adj_id: set() for adj_id in self.adjudicator_ids}
+        for adj_id, inst_id in adjinst:
+            self.adjinstconflicts[adj_id].add(institutions[inst_id])
+
     def personal_conflict_adj_team(self, adj, team):
         """Returns True if the adjudicator and team personally conflict."""
         assert adj.id in self.adjudicator_ids, "adjudicator not covered"
@@ -132,6 +205,31 @@ class ConflictsInfo:
         return (self.personal_conflict_adj_adj(adj1, adj2) or
                 self.institutional_conflict_adj_adj(adj1, adj2))
 
+    def conflict_matrix_adj_team(self, adjudicators, teams):
+        """Returns a boolean NumPy array whose (i, j)th element is True if the
+        ith adjudicator in `adjudicators` and the jth team in `teams` conflict.
+        This is equivalent to calling `conflict_adj_team()` on every pair, but
+        much faster when there are many pairs."""
+        assert self.adjudicator_ids.issuperset(adj.id for adj in adjudicators), "adjudicator not covered"
+        assert self.team_ids.issuperset(team.id for team in teams), "team not covered"
+        personal = _pairs_to_matrix(self.adjteamconflicts, adjudicators, teams)
+        institutional = _shared_institutions_matrix(
+            [self.adjinstconflicts[adj.id] for adj in adjudicators],
+            [self.teaminstconflicts[team.id] for team in teams])
+        return personal | institutional
+
+    def conflict_matrix_adj_adj(self, adjudicators1, adjudicators2):
+        """Returns a boolean NumPy array whose (i, j)th element is True if the
+        ith adjudicator in `adjudicators1` and the jth adjudicator in
+        `adjudicators2` conflict."""
+        assert self.adjudicator_ids.issuperset(adj.id for adj in adjudicators1), "adjudicator 1 not covered"
+        assert self.adjudicator_ids.issuperset(adj.id for adj in adjudicators2), "adjudicator 2 not covered"
+        personal = _pairs_to_matrix(self.adjadjconflicts, adjudicators1, adjudicators2)
+        institutional = _shared_institutions_matrix(
+            [self.adjinstconflicts[adj.id] for adj in adjudicators1],
+            [self.adjinstconflicts[adj.id] for adj in adjudicators2])
+        return personal | institutional
+
     def serialized_by_participant(self):
         """Returns a tuple of two dicts, mapping primary keys of teams and
         adjudicators respectively to a three-key dict
@@ -167,8 +265,10 @@ class HistoryInfo:
     round.
 
     The main purpose of this class is to streamline queries about history. This
-    class hits the database once, on creation, with queries for
-    `DebateAdjudicator` and `DebateTeam`. It then can be used to find
+    class takes history from the round's cached snapshot (see `snapshot.py`),
+    which only hits the database, with queries for `DebateAdjudicator` and
+    `DebateTeam`, if something changed since it was last used. It then can be
+    used to find
     efficiently whether particular participants have seen each other, without a
     need for further SQL queries or excessive data processing.
 
@@ -181,23 +281,10 @@ class HistoryInfo:
     def __init__(self, round, teams=None, adjudicators=None):
         self.round = round
         self.tournament = round.tournament
-        self._fetch_histories_from_db()
+        self._load_histories(HistorySnapshot.get(round))
 
-    def _fetch_histories_from_db(self):
-        """Fetches history information from the database, based on `self.teams`
-        and `self.adjudicators`."""
-
-        # The prefetches don't need `.select_related('adjudicator')` and
-        # `.select_related('team')`, because we only deal with the primary keys
-        # of adjudicators and teams.
-
-        debates = Debate.objects.filter(
-            round__tournament=self.tournament,
-            round__seq__lt=self.round.seq,
-        ).prefetch_related(
-            'debateadjudicator_set',
-            'debateteam_set',
-        ).select_related('round')
+    def _load_histories(self, snapshot):
+        """Loads history information from a `HistorySnapshot` of the round."""
 
         # Histories are stored in a dict, where keys are (adj.id, team.id) or
         # (adj1.id, adj2.id) tuples, and values are lists of `seq` integers
@@ -214,16 +301,12 @@ class HistoryInfo:
         self.adjteamhistories = {}
         self.adjadjhistories = {}
 
-        for debate in debates:
-            r = debate.round.seq
-
-            for da, dt in product(debate.debateadjudicator_set.all(), debate.debateteam_set.all()):
-                pair = (da.adjudicator_id, dt.team_id)
-                self.adjteamhistories.setdefault(pair, []).append(r)
-
-            for da1, da2 in combinations(debate.debateadjudicator_set.all(), 2):
-                pair = (da1.adjudicator_id, da2.adjudicator_id)
-                self.adjadjhistories.setdefault(pair, []).append(r)
+        # Rows of the snapshot are (debate ID, seq, participant, participant)
+        for histories, rows in [(self.adjteamhistories, snapshot.adjteam),
+                                (self.adjadjhistories, snapshot.adjadj)]:
+            rows = rows[np.argsort(rows[:, 1], kind='stable')]
+            for _, r, id1, id2 in rows.tolist():
+                histories.setdefault((id1, id2), []).append(r)
 
     def seen_adj_team(self, adj, team):
         """Returns True if the adjudicator has seen this team in the history
@@ -235,6 +318,17 @@ class HistoryInfo:
         covered by this object."""
         return (adj1.id, adj2.id) in self.adjadjhistories
 
+    def seen_matrix_adj_team(self, adjudicators, teams):
+        """Returns a boolean NumPy array whose (i, j)th element is True if the
+        ith adjudicator in `adjudicators` has seen the jth team in `teams`."""
+        return _pairs_to_matrix(self.adjteamhistories, adjudicators, teams)
+
+    def seen_matrix_adj_adj(self, adjudicators1, adjudicators2):
+        """Returns a boolean NumPy array whose (i, j)th element is True if the
+        ith adjudicator in `adjudicators1` and the jth adjudicator in
+        `adjudicators2` have judged together."""
+        return _pairs_to_matrix(self.adjadjhistories, adjudicators1, adjudicators2)
+
     def serialized_by_participant(self):
         """Returns a tuple of two dicts, mapping primary keys of teams and
         adjudicators respectively to a two-key dict
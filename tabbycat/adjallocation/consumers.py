@@ -18,6 +18,7 @@ from .models import PreformedPanel
 from .preformed import copy_panels_to_debates
 from .preformed.anticipated import calculate_anticipated_draw
 from .preformed.hungarian import HungarianPreformedPanelAllocator
+from .progress import AllocationCancelledError, AllocationCancelToken, AllocationProgress
 from .serializers import (EditPanelAdjsPanelSerializer,
                           SimpleDebateAllocationSerializer, SimpleDebateImportanceSerializer,
                           SimplePanelAllocationSerializer, SimplePanelImportanceSerializer)
@@ -50,6 +51,18 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             else:
                 t.preferences[key] = value
 
+    def _get_progress(self, event):
+        group_name = event['extra']['group_name']
+        return AllocationProgress(
+            callback=lambda progress: self.return_progress(group_name, progress),
+            cancel_token=AllocationCancelToken(event['extra']['round_id']),
+        )
+
+    def _save_allocation(self, allocation, progress):
+        with progress.phase("saving", _("Saving allocation")):
+            for alloc in allocation:
+                alloc.save()
+
     def allocate_debate_adjs(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
         self._apply_allocation_settings(round, event['extra']['settings'])
@@ -71,12 +84,19 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
 
             logger.info("Preformed panels exist, allocating panels to debates")
 
-            debates = round.debate_set.all()
+            debates = round.debate_set_with_prefetches(adjudicators=False, speakers=False, venues=False)
             panels = round.preformedpanel_set.all()
-            allocator = HungarianPreformedPanelAllocator(debates, panels, round)
+            progress = self._get_progress(event)
 
-            debates, panels = allocator.allocate()
-            copy_panels_to_debates(debates, panels)
+            try:
+                allocator = HungarianPreformedPanelAllocator(debates, panels, round, progress=progress)
+                debates, panels = allocator.allocate()
+                with progress.phase("saving", _("Saving allocation")):
+                    copy_panels_to_debates(debates, panels)
+            except AllocationCancelledError as e:
+                self.return_error(event['extra']['group_name'], str(e), 'info')
+                return
+            logger.info("Preformed panel allocation took %.3f seconds", progress.total_time())
 
             self.log_action(event['extra'], round, ActionLogEntry.ACTION_TYPE_PREFORMED_PANELS_DEBATES_AUTO)
 
@@ -88,19 +108,22 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
 
             debates = round.debate_set.all()
             adjs = round.active_adjudicators.all()
+            progress = self._get_progress(event)
 
             try:
                 if round.ballots_per_debate == 'per-adj':
-                    allocator = VotingHungarianAllocator(debates, adjs, round)
+                    allocator = VotingHungarianAllocator(debates, adjs, round, progress=progress)
                 else:
-                    allocator = ConsensusHungarianAllocator(debates, adjs, round)
+                    allocator = ConsensusHungarianAllocator(debates, adjs, round, progress=progress)
                 allocation, user_warnings = allocator.allocate()
+                self._save_allocation(allocation, progress)
             except AdjudicatorAllocationError as e:
                 self.return_error(event['extra']['group_name'], str(e))
                 return
-
-            for alloc in allocation:
-                alloc.save()
+            except AllocationCancelledError as e:
+                self.return_error(event['extra']['group_name'], str(e), 'info')
+                return
+            logger.info("Adjudicator allocation took %.3f seconds", progress.total_time())
 
             self.log_action(event['extra'], round, ActionLogEntry.ACTION_TYPE_ADJUDICATORS_AUTO)
 
@@ -132,20 +155,23 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
             return
 
         adjs = round.active_adjudicators.all()
+        progress = self._get_progress(event)
 
         try:
             if round.ballots_per_debate == 'per-adj':
-                allocator = VotingHungarianAllocator(panels, adjs, round)
+                allocator = VotingHungarianAllocator(panels, adjs, round, progress=progress)
             else:
-                allocator = ConsensusHungarianAllocator(panels, adjs, round)
+                allocator = ConsensusHungarianAllocator(panels, adjs, round, progress=progress)
 
             allocation, user_warnings = allocator.allocate()
+            self._save_allocation(allocation, progress)
         except AdjudicatorAllocationError as e:
             self.return_error(event['extra']['group_name'], str(e))
             return
-
-        for alloc in allocation:
-            alloc.save()
+        except AllocationCancelledError as e:
+            self.return_error(event['extra']['group_name'], str(e), 'info')
+            return
+        logger.info("Adjudicator allocation to preformed panels took %.3f seconds", progress.total_time())
 
         self.log_action(event['extra'], round, ActionLogEntry.ACTION_TYPE_PREFORMED_PANELS_ADJUDICATOR_AUTO)
         content = self.reserialize_panels(SimplePanelAllocationSerializer, round)
@@ -248,14 +274,21 @@ class AdjudicatorAllocationWorkerConsumer(EditDebateOrPanelWorkerMixin):
 
     def create_preformed_panels(self, event):
         round = Round.objects.get(pk=event['extra']['round_id'])
+        existing = {panel.room_rank: panel for panel in round.preformedpanel_set.all()}
+        to_create, to_update = [], []
         for i, (bracket_min, bracket_max, liveness) in enumerate(
                 calculate_anticipated_draw(round), start=1):
-            PreformedPanel.objects.update_or_create(round=round, room_rank=i,
-                defaults={
-                    'bracket_max': bracket_max,
-                    'bracket_min': bracket_min,
-                    'liveness': liveness,
-                })
+            panel = existing.get(i)
+            if panel is None:
+                panel = PreformedPanel(round=round, room_rank=i)
+                to_create.append(panel)
+            else:
+                to_update.append(panel)
+            panel.bracket_max = bracket_max
+            panel.bracket_min = bracket_min
+            panel.liveness = liveness
+        PreformedPanel.objects.bulk_create(to_create)
+        PreformedPanel.objects.bulk_update(to_update, ['bracket_max', 'bracket_min', 'liveness'])
 
         self.log_action(event['extra'], round, ActionLogEntry.ACTION_TYPE_PREFORMED_PANELS_CREATE)
         content = self.reserialize_panels(EditPanelAdjsPanelSerializer, round)
@@ -2,6 +2,8 @@ from django.db.models import F
 
 from utils.management.base import TournamentCommand
 
+from ...snapshot import invalidate_snapshots
+
 
 class Command(TournamentCommand):
 
@@ -31,6 +33,7 @@ class Command(TournamentCommand):
         conflict_model.objects.bulk_create([
             conflict_model(**{field: obj, "institution": obj.institution}) for obj in qs
         ])
+        invalidate_snapshots(conflict_model)
         self.stdout.write("Done, created {missing} previously-missing {model} own-institution conflicts.".format(
             missing=missing, model=qs.model._meta.verbose_name))
         self.stdout.write("{existing} {models} already had own-institution conflicts defined.".format(
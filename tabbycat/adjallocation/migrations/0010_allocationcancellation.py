@@ -0,0 +1,27 @@
+# Generated by Django 3.1.4 on 2026-10-18 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0009_auto_20201126_0037'),
+        ('adjallocation', '0009_auto_20200902_1208'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationCancellation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(auto_now=True, verbose_name='timestamp')),
+                ('round', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+            ],
+            options={
+                'verbose_name': 'allocation cancellation',
+                'verbose_name_plural': 'allocation cancellations',
+            },
+        ),
+    ]
@@ -176,3 +176,24 @@ class PreformedPanelAdjudicator(models.Model):
 
     def __str__(self):
         return "[{x.id}] {x.adjudicator.name} in panel {x.panel_id}".format(x=self)
+
+
+# ==============================================================================
+# Allocation cancellation
+# ==============================================================================
+
+class AllocationCancellation(models.Model):
+    """Marks that the user has cancelled the adjudicator allocation running in
+    a round. Used by AllocationCancelToken in adjallocation/progress.py."""
+
+    round = models.OneToOneField('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+    timestamp = models.DateTimeField(auto_now=True,
+        verbose_name=_("timestamp"))
+
+    class Meta:
+        verbose_name = _("allocation cancellation")
+        verbose_name_plural = _("allocation cancellations")
+
+    def __str__(self):
+        return 'Cancellation in {}'.format(self.round)
@@ -1,10 +1,22 @@
 """Functions for computing an anticipated draw."""
 
+import hashlib
 import itertools
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
 
 from breakqual.utils import calculate_live_thresholds, determine_liveness
 from draw.generator.utils import ispow2, partial_break_round_split
+from draw.models import DebateTeam
 from participants.prefetch import populate_win_counts
+from standings.models import TeamStandingsRecord
+
+logger = logging.getLogger(__name__)
+
+ANTICIPATED_DRAW_KEY = "anticipated_draw_{round_id}_{digest}"
 
 
 def calculate_anticipated_draw(round):
@@ -23,6 +35,11 @@ def calculate_anticipated_draw(round):
 
     `round` should be the round for which you want an anticipated draw (the
     "next round").
+
+    Anticipated draws are cached under a key derived from the database state
+    they depend on (see `_anticipated_draw_key()`), rather than a version
+    number in the cache, since they're calculated in the adjallocation worker,
+    which might not share a cache with the web processes that change results.
     """
 
     nteamsindebate = 4 if round.tournament.pref('teams_in_debate') == 'bp' else 2
@@ -58,6 +75,38 @@ def calculate_anticipated_draw(round):
         npanels = nteams // nteamsindebate
         return [(0, 0, 0) for i in range(npanels)]
 
+    open_category = round.tournament.breakcategory_set.filter(is_general=True).first()
+    key = _anticipated_draw_key(round, open_category)
+    anticipated = cache.get(key)
+    if anticipated is None:
+        anticipated = _calculate_anticipated_draw(round, nteamsindebate, open_category)
+        cache.set(key, anticipated, settings.TAB_PAGES_CACHE_TIMEOUT)
+    else:
+        logger.debug("Using cached anticipated draw: %s", key)
+    return anticipated
+
+
+def _anticipated_draw_key(round, open_category):
+    """Returns the cache key for the anticipated draw for `round`. This covers
+    the previous round's draw, results before it, round weights and the open
+    break category. Standings records are deleted and recreated whenever a
+    result changes, so their count and maximum ID together change with any
+    result."""
+    draw = list(DebateTeam.objects.filter(debate__round=round.prev).order_by(
+        'debate__room_rank', 'debate_id', 'team_id').values_list('debate__room_rank', 'debate_id', 'team_id'))
+    results = TeamStandingsRecord.objects.filter(round__tournament=round.tournament,
+        round__seq__lt=round.prev.seq).aggregate(count=Count('id'), max_id=Max('id'))
+    weights = list(round.tournament.prelim_rounds().order_by('seq').values_list('seq', 'weight'))
+    category = (open_category.id, open_category.break_size) if open_category else None
+
+    spec = repr((draw, results['count'], results['max_id'], weights, category))
+    return ANTICIPATED_DRAW_KEY.format(round_id=round.id, digest=hashlib.sha1(spec.encode()).hexdigest())
+
+
+def _calculate_anticipated_draw(round, nteamsindebate, open_category):
+    """Does the work of `calculate_anticipated_draw()`, for rounds after the
+    first, and returns a list."""
+
     # 1. Take the (actual) draw of the last round, with team points
     debates = round.prev.debate_set_with_prefetches(ordering=('room_rank',),
         teams=True, adjudicators=False, speakers=False, venues=False)
@@ -102,7 +151,6 @@ def calculate_anticipated_draw(round):
     brackets_min = [max(r) for r in zip(*([iter(lowers)] * nteamsindebate))]
     brackets_max = [max(r) for r in zip(*([iter(uppers)] * nteamsindebate))]
 
-    open_category = round.tournament.breakcategory_set.filter(is_general=True).first()
     if open_category:
         live_thresholds = calculate_live_thresholds(open_category, round.tournament, round)
         liveness_by_lower = [determine_liveness(live_thresholds, x) for x in lowers]
@@ -112,4 +160,4 @@ def calculate_anticipated_draw(round):
     else:
         liveness = [0] * len(debates)
 
-    return zip(brackets_min, brackets_max, liveness)
+    return list(zip(brackets_min, brackets_max, liveness))
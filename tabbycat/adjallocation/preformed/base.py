@@ -8,6 +8,7 @@ from participants.models import Adjudicator, Team
 
 from ..allocators.base import AdjudicatorAllocationError
 from ..conflicts import ConflictsInfo, HistoryInfo
+from ..progress import AllocationProgress
 
 logger = logging.getLogger(__name__)
 
@@ -27,11 +28,13 @@ class BasePreformedPanelAllocator:
     have been created *and* the draw for the relevant round has been created.
     """
 
-    def __init__(self, debates, panels, round):
-        """`debates` and `panels` must both be QuerySets, not other iterables."""
+    def __init__(self, debates, panels, round, progress=None):
+        """`debates` and `panels` must both be QuerySets, not other iterables.
+        `progress`, if given, is an `AllocationProgress` instance."""
 
         self.tournament = round.tournament
         self.round = round
+        self.progress = progress or AllocationProgress()
         self.debates = debates
         self.panels = panels.prefetch_related(
             Prefetch('preformedpaneladjudicator_set',
@@ -46,8 +49,9 @@ class BasePreformedPanelAllocator:
 
         teams = Team.objects.filter(debateteam__debate__in=debates)
         adjudicators = Adjudicator.objects.filter(preformedpaneladjudicator__panel__in=panels)
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
-        self.history = HistoryInfo(round=round)
+        with self.progress.phase("loading_conflicts", _("Loading conflicts and history")):
+            self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators, tournament=self.tournament)
+            self.history = HistoryInfo(round=round)
 
     def allocate(self):
         """Must return a tuple of two lists: a list of `Debate` instances, and
@@ -1,28 +1,40 @@
 import logging
 
-from munkres import Munkres
+import numpy as np
+from django.utils.translation import gettext as _
 
 from .base import BasePreformedPanelAllocator, register
+from ..allocators.hungarian import BaseHungarianAllocator
 
 logger = logging.getLogger(__name__)
 
 
 @register
 class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
+    """Allocates preformed panels to debates by solving an assignment problem
+    between debates and panels.
+
+    The `assignment_backend` keyword argument chooses the solver, as for
+    `BaseHungarianAllocator`: "scipy" (default) or "munkres"."""
 
     key = "hungarian"
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, assignment_backend="scipy", **kwargs):
         super().__init__(*args, **kwargs)
 
+        if assignment_backend not in BaseHungarianAllocator.ASSIGNMENT_BACKEND_FUNCTIONS:
+            raise ValueError("Unrecognised assignment backend: %r" % assignment_backend)
+        self.assignment_backend = assignment_backend
+
         t = self.tournament
         self.conflict_penalty = t.pref('adj_conflict_penalty')
         self.history_penalty = t.pref('adj_history_penalty')
         self.mismatch_penalty = t.pref('preformed_panel_mismatch_penalty')
 
-        self.munkres = Munkres()
-
     def calc_cost(self, debate, panel):
+        """Returns the cost of a single debate-panel pair. `allocate()` uses
+        `calc_cost_matrix()`, which returns the same costs for all pairs at
+        once; this is kept as the reference implementation."""
         cost = 0
 
         mismatch = (debate.importance - panel.importance) ** 2
@@ -35,23 +47,62 @@ class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
 
         return cost
 
+    def calc_cost_matrix(self, debates, panels):
+        """Returns a NumPy array whose (i, j)th element is the same as
+        `self.calc_cost(debates[i], panels[j])`."""
+
+        # Importance mismatch between each debate and panel
+        debate_importances = np.array([debate.importance for debate in debates], dtype=float)
+        panel_importances = np.array([panel.importance for panel in panels], dtype=float)
+        cost = self.mismatch_penalty * (debate_importances[:, np.newaxis] - panel_importances[np.newaxis, :]) ** 2
+
+        # Conflict and history penalties for each adjudicator-team pair, summed
+        # over the teams in each debate and the adjudicators on each panel
+        teams = list({team.id: team for debate in debates for team in debate.teams}.values())
+        adjs = list({adj.id: adj for panel in panels for adj in panel.adjudicators.all()}.values())
+        if not teams or not adjs:
+            return cost
+
+        penalties = self.conflict_penalty * self.conflicts.conflict_matrix_adj_team(adjs, teams) + \
+            self.history_penalty * self.history.seen_matrix_adj_team(adjs, teams)
+
+        team_index = {team.id: k for k, team in enumerate(teams)}
+        debate_teams = np.zeros((len(debates), len(teams)))
+        for i, debate in enumerate(debates):
+            for team in debate.teams:
+                debate_teams[i, team_index[team.id]] += 1
+
+        adj_index = {adj.id: k for k, adj in enumerate(adjs)}
+        panel_adjs = np.zeros((len(panels), len(adjs)))
+        for j, panel in enumerate(panels):
+            for adj in panel.adjudicators.all():
+                panel_adjs[j, adj_index[adj.id]] += 1
+
+        cost += debate_teams @ penalties.T @ panel_adjs.T
+        return cost
+
     def allocate(self):
-        cost_matrix = [
-            [self.calc_cost(debate, panel) for panel in self.panels]
-            for debate in self.debates
-        ]
-
-        logger.info("optimizing panels (matrix size: %d debates by %d panels", len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
-        indices.sort()
-        total_cost = sum(cost_matrix[i][j] for i, j in indices)
+        debates = list(self.debates)
+        panels = list(self.panels)
+
+        with self.progress.phase("costing_panels", _("Costing preformed panels")):
+            cost_matrix = self.calc_cost_matrix(debates, panels)
+
+        nrows, ncols = cost_matrix.shape
+        logger.info("optimizing panels (matrix size: %d debates by %d panels)", nrows, ncols)
+        text = _("Solving matrix %(rows)d×%(columns)d") % {'rows': nrows, 'columns': ncols}
+        with self.progress.phase("solving_panels", text, rows=nrows, columns=ncols):
+            solver = getattr(BaseHungarianAllocator,
+                             BaseHungarianAllocator.ASSIGNMENT_BACKEND_FUNCTIONS[self.assignment_backend])
+            indices = sorted(solver(cost_matrix))
+        total_cost = sum(cost_matrix[i, j] for i, j in indices)
         logger.info("total cost: %f", total_cost)
 
         # Need to make sure all debates show up in the returned debates list,
         # corresponding to `None` if it didn't get assigned a panel.
-        panels = [None] * len(self.debates)
+        allocated = [None] * len(debates)
         for r, c in indices:
-            logger.info("debate %d, panel %d: cost %f", r, c, cost_matrix[r][c])
-            panels[r] = self.panels[c]
+            logger.debug("debate %d, panel %d: cost %f", r, c, cost_matrix[r, c])
+            allocated[r] = panels[c]
 
-        return list(self.debates), panels
+        return debates, allocated
@@ -0,0 +1,81 @@
+"""Progress reporting and cancellation for adjudicator allocations.
+
+Allocations run in the "adjallocation" channels worker, which handles one
+message at a time, so a request to cancel an allocation can't be sent to it
+through the channel layer: it would just wait in the queue until the
+allocation had finished. Instead, the websocket consumer records the
+cancellation in the database, and the allocator checks it between phases.
+The database is used rather than the cache, because the worker is a separate
+process, and the cache (e.g. the default LocMemCache) might not be shared
+between processes."""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from django.utils.translation import gettext as _
+
+from .models import AllocationCancellation
+
+logger = logging.getLogger(__name__)
+
+
+class AllocationCancelledError(RuntimeError):
+    pass
+
+
+class AllocationCancelToken:
+    """Cancellation flag for allocations in a round. The flag is cleared when
+    an allocation is requested, and set when the user cancels it."""
+
+    def __init__(self, round_id):
+        self.round_id = round_id
+
+    def cancel(self):
+        AllocationCancellation.objects.update_or_create(round_id=self.round_id)
+
+    def reset(self):
+        AllocationCancellation.objects.filter(round_id=self.round_id).delete()
+
+    def is_cancelled(self):
+        return AllocationCancellation.objects.filter(round_id=self.round_id).exists()
+
+
+class AllocationProgress:
+    """Passed to allocators, which wrap each phase of the allocation in
+    `phase()`. Each phase is reported to `callback` (if given) as a dict, and
+    timed, and before each phase starts, `cancel_token` (if given) is checked.
+
+    The callback gets a dict with keys:
+        "phase"  - short machine-readable key, e.g. "solving_panellists"
+        "text"   - translated description, for showing to the user
+        "number" - sequential number of the phase, starting from 1
+    and any other keyword arguments passed to `phase()`, e.g. "rows" and
+    "columns" for phases that solve an assignment problem.
+    """
+
+    def __init__(self, callback=None, cancel_token=None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.timings = []
+
+    def check_cancelled(self):
+        if self.cancel_token is not None and self.cancel_token.is_cancelled():
+            logger.info("Allocation cancelled after %d phases", len(self.timings))
+            raise AllocationCancelledError(_("The allocation was cancelled."))
+
+    @contextmanager
+    def phase(self, key, text, **info):
+        self.check_cancelled()
+        if self.callback is not None:
+            self.callback(dict(phase=key, text=text, number=len(self.timings) + 1, **info))
+
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+
+        logger.info("Allocation phase %s took %.3f seconds", key, elapsed)
+        self.timings.append((key, elapsed))
+
+    def total_time(self):
+        return sum(elapsed for key, elapsed in self.timings)
@@ -0,0 +1,40 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from tournaments.models import Round
+
+from .models import DebateAdjudicator
+from .snapshot import conflicts_log, ConflictsSnapshot, history_log
+
+
+def record_conflict_change(sender, instance, **kwargs):
+    kind = next(kind for kind, (model, *_) in ConflictsSnapshot.KINDS.items() if model is sender)
+    conflicts_log.record(kind, instance.id)
+
+
+def record_conflicts_changed(sender, action, **kwargs):
+    # Changes through related managers, e.g. `adj.team_conflicts.add(team)`,
+    # don't say which conflicts changed, so snapshots need to be rebuilt.
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        conflicts_log.invalidate()
+
+
+for model, *_ in ConflictsSnapshot.KINDS.values():
+    post_save.connect(record_conflict_change, sender=model)
+    post_delete.connect(record_conflict_change, sender=model)
+    m2m_changed.connect(record_conflicts_changed, sender=model)
+
+
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+def record_debate_change(sender, instance, **kwargs):
+    history_log.record('debate', instance.debate_id)
+
+
+@receiver(post_save, sender=Round)
+def record_round_change(sender, instance, **kwargs):
+    # Draws are deleted and created in bulk, but the round is then saved.
+    history_log.record('round', instance.id)
@@ -0,0 +1,285 @@
+"""Snapshots of conflicts and history, cached between allocation runs.
+
+Building `ConflictsInfo` and `HistoryInfo` from scratch means fetching every
+conflict in the tournament, and walking every debate in every previous round.
+Since the same information is needed for every allocation attempt, every
+preformed panel allocation and every load of the allocation pages, it's kept
+in the cache as compact snapshots: integer arrays of participant IDs, one row
+per conflict or encounter. There's one conflicts snapshot per tournament, and
+one history snapshot per round (covering the rounds before it).
+
+Snapshots aren't invalidated wholesale when something changes. Instead, the
+signals in `signals.py` record which conflicts and debates changed in a
+change log, and when a snapshot is next used, only those rows are fetched
+again. The log is numbered by a version counter in the cache, and each
+snapshot remembers the version it's up to date with. If the log doesn't go
+back far enough (say, because entries expired), the snapshot is rebuilt.
+
+This only works if the cache is shared between processes, since allocations
+run in a worker process, and changes are made in web processes (and vice
+versa). Otherwise, a process would never see changes logged by others, so
+snapshots are built from the database every time."""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from itertools import combinations, groupby, product
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from draw.models import DebateTeam
+from tournaments.models import Round
+from utils.misc import cache_is_shared
+
+from .models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
+                     AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TIMEOUT = 60 * 60 * 24  # seconds
+
+# Beyond this many changes, it's quicker to rebuild a snapshot than update it
+MAX_CHANGES = 200
+
+
+def _rows(queryset, *fields):
+    """Returns the `fields` of the rows in `queryset` as an integer array with
+    one row per object."""
+    rows = list(queryset.values_list(*fields))
+    return np.array(rows, dtype=np.int32).reshape(len(rows), len(fields))
+
+
+class ChangeLog:
+    """A log, kept in the cache, of changes to objects covered by snapshots.
+    Entries are sets of hashable tuples describing what changed; what they
+    mean is up to the snapshot class, except that snapshots must be rebuilt
+    for `('all', None)`."""
+
+    def __init__(self, name):
+        self.version_key = name + "_version"
+        self.entry_key = name + "_change_{version}"
+        self._local = threading.local()
+
+    def version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Start from the current time rather than from zero, so that if the
+            # version is evicted, versions used before the eviction aren't reused.
+            cache.add(self.version_key, int(time.time() * 1000), None)
+            version = cache.get(self.version_key)
+        return version
+
+    def record(self, *entry):
+        """Records `entry` once the current transaction commits, so that
+        snapshots never fetch changes that aren't visible yet. Entries
+        recorded in the same transaction are logged together."""
+        if getattr(self._local, 'pending', None) is None:
+            self._local.pending = set()
+        self._local.pending.add(entry)
+        # Every callback flushes everything pending, so only the first to run
+        # does anything; the rest are cheap no-ops.
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        entries = getattr(self._local, 'pending', None)
+        if not entries:
+            return
+        self._local.pending = set()
+        try:
+            version = cache.incr(self.version_key)
+        except ValueError:  # no version yet, so no snapshots to update
+            return
+        cache.set(self.entry_key.format(version=version), entries, SNAPSHOT_TIMEOUT)
+
+    def invalidate(self):
+        """Forces all snapshots using this log to be rebuilt, once the current
+        transaction commits. This must be called after changes that don't send
+        signals, like `bulk_create()`."""
+        self.record('all', None)
+
+    def changes(self, since, until):
+        """Returns the set of entries logged after version `since`, up to and
+        including version `until`, or None if any of them are missing."""
+        if not 0 <= until - since <= MAX_CHANGES:
+            return None
+        keys = [self.entry_key.format(version=v) for v in range(since + 1, until + 1)]
+        found = cache.get_many(keys)
+        if len(found) < len(keys):
+            return None
+        return set().union(*found.values())
+
+
+conflicts_log = ChangeLog("conflicts")
+history_log = ChangeLog("history")
+
+
+class BaseSnapshot:
+    """Base class for snapshots. Subclasses set `log` and `key`, and implement
+    `build()` and `update()`. `key` is formatted with the first argument to
+    the constructor."""
+
+    log = None
+    key = None
+
+    @classmethod
+    def get(cls, *args):
+        """Returns an up-to-date snapshot, from the cache if possible."""
+        if not cache_is_shared():
+            snapshot = cls(*args)
+            snapshot.build()
+            return snapshot
+
+        version = cls.log.version()
+        key = cls.key.format(*args)
+        snapshot = cache.get(key)
+
+        if snapshot is not None and snapshot.version != version:
+            changes = cls.log.changes(snapshot.version, version)
+            if changes is None or not snapshot.update(changes):
+                logger.debug("Can't update %s from version %s to %s", key, snapshot.version, version)
+                snapshot = None
+
+        if snapshot is None:
+            logger.debug("Building %s", key)
+            snapshot = cls(*args)
+            snapshot.build()
+        elif snapshot.version == version:
+            return snapshot
+
+        snapshot.version = version
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+        return snapshot
+
+    def build(self):
+        raise NotImplementedError
+
+    def update(self, changes):
+        """Updates the snapshot with the set of log entries `changes`. Returns
+        False if the snapshot must be rebuilt instead."""
+        raise NotImplementedError
+
+
+class ConflictsSnapshot(BaseSnapshot):
+    """All conflicts in a tournament. Each of `adjteam`, `adjadj`, `adjinst`
+    and `teaminst` is an array with columns (conflict ID, participant ID,
+    participant or institution ID), in the order of the fields in `KINDS`.
+    Log entries are `(kind, id)`."""
+
+    log = conflicts_log
+    key = "conflicts_snapshot_{}"
+
+    KINDS = {
+        'adjteam': (AdjudicatorTeamConflict, 'adjudicator_id', 'team_id'),
+        'adjadj': (AdjudicatorAdjudicatorConflict, 'adjudicator1_id', 'adjudicator2_id'),
+        'adjinst': (AdjudicatorInstitutionConflict, 'adjudicator_id', 'institution_id'),
+        'teaminst': (TeamInstitutionConflict, 'team_id', 'institution_id'),
+    }
+
+    def __init__(self, tournament_id):
+        self.tournament_id = tournament_id
+        self.version = None
+
+    def queryset(self, kind):
+        model = self.KINDS[kind][0]
+        if kind == 'adjadj':
+            return model.objects.filter(Q(adjudicator1__tournament_id=self.tournament_id) |
+                                        Q(adjudicator2__tournament_id=self.tournament_id))
+        elif kind == 'adjinst':
+            return model.objects.filter(adjudicator__tournament_id=self.tournament_id)
+        else:
+            return model.objects.filter(team__tournament_id=self.tournament_id)
+
+    def fetch(self, kind, queryset):
+        return _rows(queryset, 'id', *self.KINDS[kind][1:])
+
+    def build(self):
+        for kind in self.KINDS:
+            setattr(self, kind, self.fetch(kind, self.queryset(kind)))
+
+    def update(self, changes):
+        changed = defaultdict(list)
+        for kind, pk in changes:
+            if kind not in self.KINDS:
+                return False
+            changed[kind].append(pk)
+
+        for kind, pks in changed.items():
+            rows = getattr(self, kind)
+            rows = rows[~np.isin(rows[:, 0], pks)]
+            fetched = self.fetch(kind, self.queryset(kind).filter(id__in=pks))
+            setattr(self, kind, np.concatenate([rows, fetched]))
+        return True
+
+
+class HistorySnapshot(BaseSnapshot):
+    """All encounters between participants before a round. `adjteam` and
+    `adjadj` are arrays with columns (debate ID, round seq, adjudicator ID,
+    team or adjudicator ID). Log entries are `('debate', id)` if a debate's
+    participants changed, or `('round', id)` if a round changed in some other
+    way, e.g. its draw was regenerated in bulk."""
+
+    log = history_log
+    key = "history_snapshot_{}"
+
+    def __init__(self, round_id, tournament_id, seq):
+        self.round_id = round_id
+        self.tournament_id = tournament_id
+        self.seq = seq
+        self.version = None
+
+    @classmethod
+    def get(cls, round):
+        return super().get(round.id, round.tournament_id, round.seq)
+
+    def fetch(self, **filters):
+        """Returns the `adjteam` and `adjadj` arrays for debates matching
+        `filters` in previous rounds."""
+        filters.update(debate__round__tournament_id=self.tournament_id, debate__round__seq__lt=self.seq)
+        adjs = _rows(DebateAdjudicator.objects.filter(**filters).order_by('debate_id', 'id'),
+                     'debate_id', 'debate__round__seq', 'adjudicator_id')
+        teams = {debate_id: [row[1] for row in rows] for debate_id, rows in groupby(
+                 _rows(DebateTeam.objects.filter(**filters).order_by('debate_id', 'id'), 'debate_id', 'team_id'),
+                 key=lambda row: row[0])}
+
+        adjteam, adjadj = [], []
+        for debate_id, rows in groupby(adjs, key=lambda row: row[0]):
+            rows = list(rows)
+            seq = rows[0][1]
+            adj_ids = [row[2] for row in rows]
+            adjteam.extend((debate_id, seq, adj, team) for adj, team in product(adj_ids, teams.get(debate_id, [])))
+            adjadj.extend((debate_id, seq, adj1, adj2) for adj1, adj2 in combinations(adj_ids, 2))
+
+        return (np.array(adjteam, dtype=np.int32).reshape(len(adjteam), 4),
+                np.array(adjadj, dtype=np.int32).reshape(len(adjadj), 4))
+
+    def build(self):
+        self.adjteam, self.adjadj = self.fetch()
+
+    def update(self, changes):
+        debate_ids = [pk for kind, pk in changes if kind == 'debate']
+        round_ids = [pk for kind, pk in changes if kind == 'round']
+        if len(debate_ids) + len(round_ids) < len(changes):
+            return False
+        if round_ids and Round.objects.filter(id__in=round_ids, tournament_id=self.tournament_id,
+                                              seq__lt=self.seq).exists():
+            return False
+
+        if debate_ids:
+            adjteam, adjadj = self.fetch(debate_id__in=debate_ids)
+            self.adjteam = np.concatenate([self.adjteam[~np.isin(self.adjteam[:, 0], debate_ids)], adjteam])
+            self.adjadj = np.concatenate([self.adjadj[~np.isin(self.adjadj[:, 0], debate_ids)], adjadj])
+        return True
+
+
+def invalidate_snapshots(model):
+    """Forces snapshots covering instances of `model` to be rebuilt. Call this
+    after creating, updating or deleting them in bulk, which doesn't send the
+    signals that would otherwise update snapshots."""
+    if model in (kind[0] for kind in ConflictsSnapshot.KINDS.values()):
+        conflicts_log.invalidate()
+    if model in (DebateAdjudicator, DebateTeam):
+        history_log.invalidate()
@@ -0,0 +1,71 @@
+import logging
+import random
+
+from django.test import TestCase
+
+from participants.models import Adjudicator
+from tournaments.models import Tournament
+from utils.tests import suppress_logs
+
+from ..allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
+
+
+class TestHungarianCostMatrix(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+        self.debates = list(self.round.debate_set.all())
+        self.adjs = list(Adjudicator.objects.filter(tournament=self.tournament))
+
+    def get_allocator(self, klass=VotingHungarianAllocator, **kwargs):
+        allocator = klass(self.debates, self.adjs, self.round, **kwargs)
+        allocator.populate_adj_scores(self.adjs)
+        return allocator
+
+    def test_matches_calc_cost(self):
+        allocator = self.get_allocator()
+        adjustments = [-(i % 3) for i in range(len(self.debates))]
+        matrix = allocator.calc_cost_matrix(self.debates, self.adjs, adjustments=adjustments)
+        self.assertEqual(matrix.shape, (len(self.debates), len(self.adjs)))
+        for i, (debate, adjustment) in enumerate(zip(self.debates, adjustments)):
+            for j, adj in enumerate(self.adjs):
+                self.assertAlmostEqual(matrix[i, j], allocator.calc_cost(debate, adj, adjustment))
+
+    def test_matches_calc_cost_with_chairs(self):
+        allocator = self.get_allocator()
+        chairs = [self.adjs[i % len(self.adjs)] for i in range(len(self.debates))]
+        chairs[0] = None
+        matrix = allocator.calc_cost_matrix(self.debates, self.adjs, adjustments=-2.0, chairs=chairs)
+        for i, (debate, chair) in enumerate(zip(self.debates, chairs)):
+            for j, adj in enumerate(self.adjs):
+                self.assertAlmostEqual(matrix[i, j], allocator.calc_cost(debate, adj, -2.0, chair=chair))
+
+    def test_backends_same_cost(self):
+        allocator = self.get_allocator()
+        matrix = allocator.calc_cost_matrix(self.debates, self.adjs)
+        totals = []
+        for backend in ["scipy", "munkres"]:
+            allocator.assignment_backend = backend
+            indices = allocator.solve_assignment(matrix)
+            self.assertEqual(len(indices), min(matrix.shape))
+            totals.append(sum(matrix[i, j] for i, j in indices))
+        self.assertAlmostEqual(totals[0], totals[1])
+
+    def test_backends_allocate(self):
+        for klass in [VotingHungarianAllocator, ConsensusHungarianAllocator]:
+            for backend in ["scipy", "munkres"]:
+                with self.subTest(allocator=klass.__name__, backend=backend):
+                    random.seed(0)
+                    allocator = klass(self.debates, self.adjs, self.round, assignment_backend=backend)
+                    with suppress_logs('adjallocation.allocators.hungarian', logging.WARNING):
+                        allocation, user_warnings = allocator.allocate()
+                    self.assertLessEqual(len(allocation), len(self.debates))
+                    allocated = [adj for aa in allocation for adj in aa.all()]
+                    self.assertEqual(len(allocated), len(set(allocated)))
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            self.get_allocator(assignment_backend="nonexistent")
@@ -0,0 +1,99 @@
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from results.models import BallotSubmission
+from tournaments.models import Tournament
+
+from ..models import PreformedPanel, PreformedPanelAdjudicator
+from ..preformed.anticipated import calculate_anticipated_draw
+from ..preformed.hungarian import HungarianPreformedPanelAllocator
+
+
+class TestHungarianPreformedPanelAllocator(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+
+        # Make a panel out of each debate's adjudicators, with varied importances
+        for i, debate in enumerate(self.round.debate_set.order_by('id'), start=1):
+            panel = PreformedPanel.objects.create(round=self.round, room_rank=i, importance=i % 5 - 2)
+            PreformedPanelAdjudicator.objects.bulk_create([
+                PreformedPanelAdjudicator(panel=panel, adjudicator_id=da.adjudicator_id, type=da.type)
+                for da in debate.debateadjudicator_set.all()
+            ])
+
+    def get_allocator(self, **kwargs):
+        debates = self.round.debate_set_with_prefetches(adjudicators=False, speakers=False, venues=False)
+        return HungarianPreformedPanelAllocator(debates, self.round.preformedpanel_set.all(), self.round, **kwargs)
+
+    def test_matrix_matches_reference(self):
+        allocator = self.get_allocator()
+        debates, panels = list(allocator.debates), list(allocator.panels)
+        expected = [[allocator.calc_cost(debate, panel) for panel in panels] for debate in debates]
+        np.testing.assert_allclose(allocator.calc_cost_matrix(debates, panels), expected)
+
+    def test_allocate(self):
+        debates, panels = self.get_allocator().allocate()
+        self.assertEqual(len(debates), self.round.debate_set.count())
+        self.assertNotIn(None, panels)
+        self.assertEqual(len(set(panels)), len(panels))
+
+    def test_backends_agree(self):
+        def total_cost(allocator):
+            debates, panels = allocator.allocate()
+            return sum(allocator.calc_cost(debate, panel) for debate, panel in zip(debates, panels))
+
+        scipy_cost = total_cost(self.get_allocator(assignment_backend="scipy"))
+        munkres_cost = total_cost(self.get_allocator(assignment_backend="munkres"))
+        self.assertAlmostEqual(scipy_cost, munkres_cost)
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            self.get_allocator(assignment_backend="nonexistent")
+
+
+class TestAnticipatedDraw(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            anticipated = calculate_anticipated_draw(self.round)
+        return anticipated, len(context.captured_queries)
+
+    def test_cached(self):
+        anticipated, uncached = self.count_queries()
+        self.assertEqual(len(anticipated), self.round.prev.debate_set.count())
+        cached_anticipated, cached = self.count_queries()
+        self.assertEqual(cached_anticipated, anticipated)
+        self.assertLess(cached, uncached)
+
+    def test_invalidated_by_result_change(self):
+        self.count_queries()
+        _, cached = self.count_queries()
+        ballotsub = BallotSubmission.objects.filter(debate__round=self.round.prev.prev, confirmed=True).first()
+        ballotsub.save()  # rebuilds its standings records
+        _, after_change = self.count_queries()
+        self.assertGreater(after_change, cached)
+
+    def test_invalidated_by_draw_change(self):
+        self.count_queries()
+        _, cached = self.count_queries()
+        dt1, dt2 = [debate.debateteam_set.first() for debate in self.round.prev.debate_set.all()[:2]]
+        dt1.team, dt2.team = dt2.team, dt1.team
+        dt1.save()
+        dt2.save()
+        _, after_change = self.count_queries()
+        self.assertGreater(after_change, cached)
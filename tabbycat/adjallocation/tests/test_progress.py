@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from participants.models import Adjudicator
+from tournaments.models import Tournament
+
+from ..allocators.hungarian import ConsensusHungarianAllocator
+from ..progress import AllocationCancelledError, AllocationCancelToken, AllocationProgress
+
+
+class TestAllocationProgress(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+        self.token = AllocationCancelToken(self.round.id)
+        self.updates = []
+
+    def get_allocator(self, progress):
+        adjs = Adjudicator.objects.filter(tournament=self.tournament)
+        return ConsensusHungarianAllocator(self.round.debate_set.all(), adjs, self.round, progress=progress)
+
+    def test_phases_reported(self):
+        progress = AllocationProgress(callback=self.updates.append, cancel_token=self.token)
+        self.get_allocator(progress).allocate()
+
+        phases = [update['phase'] for update in self.updates]
+        self.assertEqual(phases[0], "loading_conflicts")
+        self.assertIn("costing_voting", phases)
+        self.assertIn("solving_voting", phases)
+        self.assertEqual([update['number'] for update in self.updates], list(range(1, len(phases) + 1)))
+        self.assertEqual([key for key, elapsed in progress.timings], phases)
+
+        for update in self.updates:
+            if update['phase'].startswith("solving_"):
+                self.assertIn("rows", update)
+                self.assertIn("columns", update)
+
+    def test_cancel_before_start(self):
+        self.token.cancel()
+        progress = AllocationProgress(callback=self.updates.append, cancel_token=self.token)
+        with self.assertRaises(AllocationCancelledError):
+            self.get_allocator(progress)
+        self.assertEqual(self.updates, [])
+
+    def test_cancel_between_phases(self):
+        def cancel_after_costing(update):
+            self.updates.append(update)
+            if update['phase'] == "costing_voting":
+                self.token.cancel()
+
+        progress = AllocationProgress(callback=cancel_after_costing, cancel_token=self.token)
+        allocator = self.get_allocator(progress)
+        with self.assertRaises(AllocationCancelledError):
+            allocator.allocate()
+        self.assertEqual(self.updates[-1]['phase'], "costing_voting")
+
+    def test_reset(self):
+        self.token.cancel()
+        self.assertTrue(self.token.is_cancelled())
+        self.token.reset()
+        self.assertFalse(self.token.is_cancelled())
+        self.assertFalse(AllocationCancelToken(self.round.id + 1).is_cancelled())
@@ -0,0 +1,141 @@
+from itertools import combinations, product
+
+from django.core.cache import cache
+from django.test import override_settings, TestCase
+
+from draw.models import Debate
+from tournaments.models import Tournament
+
+from ..conflicts import ConflictsInfo, HistoryInfo
+from ..models import AdjudicatorAdjudicatorConflict, AdjudicatorTeamConflict
+from ..snapshot import conflicts_log, ConflictsSnapshot, history_log, HistorySnapshot
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class TestHistorySnapshot(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        history_log.flush()  # discard anything left over from other tests
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+
+    def walk_history(self):
+        """Returns the histories as `HistoryInfo` used to find them, by walking
+        through every previous debate."""
+        adjteam, adjadj = {}, {}
+        debates = Debate.objects.filter(round__tournament=self.tournament, round__seq__lt=self.round.seq)
+        for debate in debates.prefetch_related('debateadjudicator_set', 'debateteam_set').order_by('round__seq'):
+            das = sorted(debate.debateadjudicator_set.all(), key=lambda da: da.id)
+            for da, dt in product(das, debate.debateteam_set.all()):
+                adjteam.setdefault((da.adjudicator_id, dt.team_id), []).append(debate.round.seq)
+            for da1, da2 in combinations(das, 2):
+                adjadj.setdefault((da1.adjudicator_id, da2.adjudicator_id), []).append(debate.round.seq)
+        return adjteam, adjadj
+
+    def assertHistoryMatches(self, history):  # noqa: N802
+        adjteam, adjadj = self.walk_history()
+        self.assertEqual(history.adjteamhistories, adjteam)
+        self.assertEqual(history.adjadjhistories, adjadj)
+
+    def test_matches_walk(self):
+        self.assertHistoryMatches(HistoryInfo(self.round))
+
+    def test_cached(self):
+        HistorySnapshot.get(self.round)
+        with self.assertNumQueries(0):
+            history = HistoryInfo(self.round)
+        self.assertHistoryMatches(history)
+
+    def test_incremental_update(self):
+        HistorySnapshot.get(self.round)
+
+        da = self.tournament.round_set.get(seq=2).debate_set.first().debateadjudicator_set.first()
+        other = self.tournament.adjudicator_set.exclude(
+            debateadjudicator__debate=da.debate).first()
+        da.adjudicator = other
+        da.save()
+        history_log.flush()  # test transactions never commit
+
+        with self.assertNumQueries(2):  # one each for adjudicators and teams
+            history = HistoryInfo(self.round)
+        self.assertHistoryMatches(history)
+
+    def test_current_round_changes_ignored(self):
+        snapshot = HistorySnapshot.get(self.round)
+        da = self.round.debate_set.first().debateadjudicator_set.first()
+        da.delete()
+        history_log.flush()
+
+        updated = HistorySnapshot.get(self.round)
+        self.assertEqual(updated.adjteam.tolist(), snapshot.adjteam.tolist())
+        self.assertEqual(updated.adjadj.tolist(), snapshot.adjadj.tolist())
+
+    def test_invalidate(self):
+        HistorySnapshot.get(self.round)
+        history_log.invalidate()
+        history_log.flush()
+        with self.assertNumQueries(2):
+            HistorySnapshot.get(self.round)
+
+
+@override_settings(CACHE_IS_SHARED=True)
+class TestConflictsSnapshot(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        conflicts_log.flush()
+        self.tournament = Tournament.objects.first()
+        self.teams = self.tournament.team_set.all()
+        self.adjs = self.tournament.adjudicator_set.all()
+
+    def assertConflictsMatch(self, conflicts):  # noqa: N802
+        expected = ConflictsInfo(teams=self.teams, adjudicators=self.adjs)
+        self.assertEqual(conflicts.adjteamconflicts, expected.adjteamconflicts)
+        self.assertEqual(conflicts.adjadjconflicts, expected.adjadjconflicts)
+        self.assertEqual(conflicts.adjinstconflicts, expected.adjinstconflicts)
+        self.assertEqual(conflicts.teaminstconflicts, expected.teaminstconflicts)
+
+    def test_matches_database(self):
+        self.assertConflictsMatch(ConflictsInfo(teams=self.teams, adjudicators=self.adjs, tournament=self.tournament))
+
+    def test_cached(self):
+        ConflictsSnapshot.get(self.tournament.id)
+        with self.assertNumQueries(0):
+            ConflictsSnapshot.get(self.tournament.id)
+
+    @override_settings(CACHE_IS_SHARED=False)
+    def test_not_cached_if_cache_not_shared(self):
+        ConflictsSnapshot.get(self.tournament.id)
+        with self.assertNumQueries(len(ConflictsSnapshot.KINDS)):
+            ConflictsSnapshot.get(self.tournament.id)
+
+    def test_incremental_update(self):
+        ConflictsSnapshot.get(self.tournament.id)
+        adj1, adj2 = self.adjs[:2]
+        AdjudicatorAdjudicatorConflict.objects.create(adjudicator1=adj1, adjudicator2=adj2)
+        AdjudicatorTeamConflict.objects.filter(team__tournament=self.tournament).first().delete()
+        conflicts_log.flush()
+
+        with self.assertNumQueries(2):  # one for each kind of conflict changed
+            snapshot = ConflictsSnapshot.get(self.tournament.id)
+        self.assertIn([adj1.id, adj2.id], snapshot.adjadj[:, 1:].tolist())
+
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=self.adjs, tournament=self.tournament)
+        self.assertTrue(conflicts.personal_conflict_adj_adj(adj2, adj1))
+        self.assertConflictsMatch(conflicts)
+
+    def test_related_manager_change(self):
+        ConflictsSnapshot.get(self.tournament.id)
+        adj = self.adjs[0]
+        team = self.teams.exclude(adjudicatorteamconflict__adjudicator=adj).first()
+        adj.team_conflicts.add(team)
+        conflicts_log.flush()
+
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=self.adjs, tournament=self.tournament)
+        self.assertTrue(conflicts.personal_conflict_adj_team(adj, team))
+        self.assertConflictsMatch(conflicts)
@@ -1,21 +1,72 @@
+from urllib.parse import quote
+
 from django.db.models import Q
-from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField, SlugRelatedField
+from django.urls import get_script_prefix, NoReverseMatch
+from django.urls import reverse as django_reverse
+from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField, PKOnlyObject, SlugRelatedField
 from rest_framework.reverse import reverse
 
 from participants.models import Speaker
 
+# Stand-ins for URL arguments when working out URL templates. They must match
+# every path converter used in API URLs, and not appear in URLs otherwise.
+URL_TEMPLATE_SENTINEL = 7305190000
+
+# Characters left unquoted in URL arguments, as in `django.urls.reverse()`
+URL_SAFE_CHARACTERS = "!$&'()*+,;=~:@"
+
+_url_templates = {}
+
+
+def get_url_template(view_name, kwarg_names):
+    """Returns a template for the path of `view_name`, with a replacement field
+    for each of `kwarg_names`, for use with `str.format()`; or None if one
+    can't be worked out. Templates are worked out once using `reverse()`, so
+    that hyperlinks can be built by string formatting, which is much faster
+    than reversing the URL for every hyperlink in a large response."""
+    key = (view_name, kwarg_names, get_script_prefix())
+    if key not in _url_templates:
+        sentinels = {name: str(URL_TEMPLATE_SENTINEL + i) for i, name in enumerate(kwarg_names)}
+        try:
+            template = django_reverse(view_name, kwargs=sentinels).replace('{', '{{').replace('}', '}}')
+        except NoReverseMatch:
+            template = None
+        for name, sentinel in sentinels.items():
+            if template is None or template.count(sentinel) != 1:
+                template = None
+                break
+            template = template.replace(sentinel, '{' + name + '}')
+        _url_templates[key] = template
+    return _url_templates[key]
+
+
+def get_url_root(request):
+    """Returns the scheme and host of URLs for `request`, working it out only
+    once per request."""
+    if not hasattr(request, '_url_root'):
+        request._url_root = request.build_absolute_uri('/')[:-1]
+    return request._url_root
+
 
 class TournamentHyperlinkedRelatedField(HyperlinkedRelatedField):
     default_tournament_field = 'tournament'
 
+    # Whether related objects can be represented by their primary keys alone,
+    # taking their tournament from the serializer context. This avoids fetching
+    # related objects (and their tournaments), but subclasses that need other
+    # attributes of related objects must set this to False.
+    pk_only = True
+
     def __init__(self, *args, **kwargs):
         self.tournament_field = kwargs.pop('tournament_field', self.default_tournament_field)
         super().__init__(*args, **kwargs)
 
     def use_pk_only_optimization(self):
-        return False
+        return self.pk_only and self.lookup_field == 'pk' and 'tournament' in self.context
 
     def get_tournament(self, obj):
+        if isinstance(obj, PKOnlyObject):  # see use_pk_only_optimization()
+            return self.context['tournament']
         return obj.tournament
 
     def get_url_kwargs(self, obj):
@@ -27,7 +78,13 @@ class TournamentHyperlinkedRelatedField(HyperlinkedRelatedField):
         return kwargs
 
     def get_url(self, obj, view_name, request, format):
-        return reverse(view_name, kwargs=self.get_url_kwargs(obj), request=request, format=format)
+        kwargs = self.get_url_kwargs(obj)
+        if format is None and getattr(request, 'versioning_scheme', None) is None:
+            template = get_url_template(view_name, tuple(kwargs))
+            if template is not None:
+                path = template.format(**{name: quote(str(value), safe=URL_SAFE_CHARACTERS) for name, value in kwargs.items()})
+                return path if request is None else get_url_root(request) + path
+        return reverse(view_name, kwargs=kwargs, request=request, format=format)
 
     def get_object(self, view_name, view_args, view_kwargs):
         lookup_value = view_kwargs[self.lookup_url_kwarg]
@@ -44,12 +101,13 @@ class TournamentHyperlinkedRelatedField(HyperlinkedRelatedField):
 
 
 class TournamentHyperlinkedIdentityField(TournamentHyperlinkedRelatedField, HyperlinkedIdentityField):
-    pass
+    pk_only = False  # already has the whole object
 
 
 class RoundHyperlinkedRelatedField(TournamentHyperlinkedRelatedField):
     default_tournament_field = 'round__tournament'
     round_field = 'round'
+    pk_only = False
 
     def get_tournament(self, obj):
         return self.get_round(obj).tournament
@@ -94,6 +152,7 @@ class DebateHyperlinkedIdentityField(RoundHyperlinkedIdentityField):
 
 class AnonymisingHyperlinkedTournamentRelatedField(TournamentHyperlinkedRelatedField):
     default_tournament_field = 'team__tournament'
+    pk_only = False
 
     def __init__(self, view_name=None, queryset=Speaker.objects.all(), **kwargs):
         self.null_when = kwargs.pop('anonymous_source')
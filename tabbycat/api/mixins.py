@@ -1,14 +1,30 @@
 import operator
 
-from rest_framework.generics import get_object_or_404
-from rest_framework.permissions import IsAdminUser
+from rest_framework.permissions import IsAdminUser, SAFE_METHODS
 
-from tournaments.models import Round, Tournament
+from tournaments.cache import get_round, get_tournament
 
 from .permissions import APIEnabledPermission, IsAdminOrReadOnly, PublicIfReleasedPermission, PublicPreferencePermission
 
 
-class TournamentAPIMixin:
+class SparseFieldsetsMixin:
+    """Lets clients ask for only the fields they need, as a comma-separated
+    list in the `fields` query parameter, e.g. `?fields=id,name`, so that
+    others (particularly nested objects and hyperlinks) aren't rendered."""
+    fields_query_param = 'fields'
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        requested = self.request.query_params.get(self.fields_query_param)
+        if requested and self.request.method in SAFE_METHODS:
+            requested = {name.strip() for name in requested.split(',')}
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in [name for name in fields if name not in requested]:
+                fields.pop(name)
+        return serializer
+
+
+class TournamentAPIMixin(SparseFieldsetsMixin):
     tournament_field = 'tournament'
 
     access_operator = operator.eq
@@ -17,7 +33,7 @@ class TournamentAPIMixin:
     @property
     def tournament(self):
         if not hasattr(self, "_tournament"):
-            self._tournament = get_object_or_404(Tournament, slug=self.kwargs['tournament_slug'])
+            self._tournament = get_tournament(self.kwargs['tournament_slug'])
         return self._tournament
 
     def lookup_kwargs(self):
@@ -42,7 +58,7 @@ class RoundAPIMixin(TournamentAPIMixin):
     @property
     def round(self):
         if not hasattr(self, "_round"):
-            self._round = get_object_or_404(Round, tournament=self.tournament, seq=self.kwargs['round_seq'])
+            self._round = get_round(self.tournament, self.kwargs['round_seq'])
         return self._round
 
     def perform_create(self, serializer):
@@ -0,0 +1,41 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class PKCursorPagination(CursorPagination):
+    """Keyset pagination on primary keys. Unlike limit-offset pagination, the
+    database doesn't need to count or skip over earlier rows, so fetching each
+    page is equally fast however deep into the collection it is."""
+    ordering = 'pk'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class CursorOrLimitOffsetPagination(LimitOffsetPagination):
+    """Uses cursor pagination if the request asks for it (by passing `cursor`
+    or `page_size`), and limit-offset pagination otherwise. Without any
+    parameters, collections aren't paginated at all, as before cursor
+    pagination was available, so existing clients are unaffected."""
+
+    cursor_pagination_class = PKCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = self.cursor_pagination_class()
+        self.use_cursor = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        query_params = request.query_params
+        self.use_cursor = (self.cursor_paginator.cursor_query_param in query_params or
+                           self.cursor_paginator.page_size_query_param in query_params)
+        if self.use_cursor:
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.use_cursor:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return (super().get_schema_operation_parameters(view) +
+                self.cursor_paginator.get_schema_operation_parameters(view))
@@ -19,6 +19,7 @@ from privateurls.utils import populate_url_keys
 from results.mixins import TabroomSubmissionFieldsMixin
 from results.models import BallotSubmission
 from results.result import DebateResult
+from standings.cache import invalidate_standings
 from tournaments.models import Round, Tournament
 from venues.models import Venue, VenueCategory
 
@@ -1040,6 +1041,11 @@ class BallotSerializer(TabroomSubmissionFieldsMixin, serializers.ModelSerializer
         result._errors = []
         result.save(ballot=ballot)
 
+        # The ballot was saved before its scores, so the cached standings
+        # need to be invalidated now that the scores exist.
+        if ballot.confirmed:
+            invalidate_standings(ballot.debate.round.tournament_id)
+
         return ballot
 
     def update(self, instance, validated_data):
@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory
+
+from participants.models import Team
+from tournaments.models import Tournament
+
+from ..fields import get_url_template, TournamentHyperlinkedRelatedField
+from ..pagination import CursorOrLimitOffsetPagination
+
+
+class TestTournamentHyperlinkedRelatedField(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.first()
+        self.request = Request(APIRequestFactory().get('/api/v1/tournaments'))
+
+    def get_field(self, **context):
+        field = TournamentHyperlinkedRelatedField(view_name='api-team-detail', read_only=True)
+        field._context = context
+        return field
+
+    def test_url_template(self):
+        template = get_url_template('api-team-detail', ('tournament_slug', 'pk'))
+        self.assertEqual(template.format(tournament_slug='abc', pk=3),
+            reverse('api-team-detail', kwargs={'tournament_slug': 'abc', 'pk': 3}))
+
+    def test_url_template_no_match(self):
+        self.assertIsNone(get_url_template('api-team-detail', ('pk',)))
+
+    def test_urls_match_reverse(self):
+        field = self.get_field()
+        for team in self.tournament.team_set.all():
+            self.assertEqual(field.get_url(team, 'api-team-detail', self.request, None),
+                reverse('api-team-detail', request=self.request,
+                        kwargs={'tournament_slug': self.tournament.slug, 'pk': team.pk}))
+
+    def test_pk_only(self):
+        team = self.tournament.team_set.first()
+        self.assertFalse(self.get_field().use_pk_only_optimization())
+        field = self.get_field(tournament=self.tournament, request=self.request)
+        self.assertTrue(field.use_pk_only_optimization())
+        speaker = team.speaker_set.first()
+        field.bind('team', None)
+        with self.assertNumQueries(0):
+            self.assertEqual(field.to_representation(field.get_attribute(speaker)),
+                field.get_url(team, 'api-team-detail', self.request, None))
+
+
+class TestCursorOrLimitOffsetPagination(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def paginate(self, path):
+        self.paginator = CursorOrLimitOffsetPagination()
+        queryset = Team.objects.order_by('pk')
+        return self.paginator.paginate_queryset(queryset, Request(APIRequestFactory().get(path)))
+
+    def test_unpaginated(self):
+        self.assertIsNone(self.paginate('/teams'))
+
+    def test_limit_offset(self):
+        teams = list(Team.objects.order_by('pk'))
+        self.assertEqual(self.paginate('/teams?limit=3&offset=2'), teams[2:5])
+        self.assertIn('count', self.paginator.get_paginated_response([]).data)
+
+    def test_cursor(self):
+        teams = list(Team.objects.order_by('pk'))
+        self.assertEqual(self.paginate('/teams?page_size=5'), teams[:5])
+        next_link = self.paginator.get_paginated_response([]).data['next']
+        self.assertEqual(self.paginate(next_link), teams[5:10])
@@ -19,6 +19,7 @@ from checkins.utils import create_identifiers, get_unexpired_checkins
 from draw.models import Debate
 from options.models import TournamentPreferenceModel
 from participants.models import Adjudicator, Institution, Speaker, SpeakerCategory, Team
+from standings.cache import generate_cached
 from standings.speakers import SpeakerStandingsGenerator
 from standings.teams import TeamStandingsGenerator
 from tournaments.mixins import TournamentFromUrlMixin
@@ -26,7 +27,9 @@ from tournaments.models import Round, Tournament
 from venues.models import Venue, VenueCategory
 
 from . import serializers
-from .mixins import AdministratorAPIMixin, PublicAPIMixin, RoundAPIMixin, TournamentAPIMixin, TournamentPublicAPIMixin
+from .mixins import (AdministratorAPIMixin, PublicAPIMixin, RoundAPIMixin, SparseFieldsetsMixin,
+                     TournamentAPIMixin, TournamentPublicAPIMixin)
+from .pagination import CursorOrLimitOffsetPagination
 from .permissions import APIEnabledPermission, PublicPreferencePermission
 
 
@@ -173,6 +176,7 @@ class BreakingTeamsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenerateBr
 
 class InstitutionViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.PerTournamentInstitutionSerializer
+    pagination_class = CursorOrLimitOffsetPagination
     access_preference = 'public_institutions_list'
 
     def perform_create(self, serializer):
@@ -194,6 +198,7 @@ class InstitutionViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelView
 
 class TeamViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.TeamSerializer
+    pagination_class = CursorOrLimitOffsetPagination
     access_preference = 'public_participants'
 
     def get_queryset(self):
@@ -213,6 +218,7 @@ class TeamViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
 
 class AdjudicatorViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.AdjudicatorSerializer
+    pagination_class = CursorOrLimitOffsetPagination
     access_preference = 'public_participants'
 
     def get_break_permission(self):
@@ -230,8 +236,9 @@ class AdjudicatorViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelView
         ).filter(filters)
 
 
-class GlobalInstitutionViewSet(AdministratorAPIMixin, ModelViewSet):
+class GlobalInstitutionViewSet(SparseFieldsetsMixin, AdministratorAPIMixin, ModelViewSet):
     serializer_class = serializers.InstitutionSerializer
+    pagination_class = CursorOrLimitOffsetPagination
 
     def get_queryset(self):
         filters = Q()
@@ -242,6 +249,7 @@ class GlobalInstitutionViewSet(AdministratorAPIMixin, ModelViewSet):
 
 class SpeakerViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.SpeakerSerializer
+    pagination_class = CursorOrLimitOffsetPagination
     tournament_field = "team__tournament"
     access_preference = 'public_participants'
 
@@ -407,7 +415,7 @@ class BaseStandingsView(TournamentAPIMixin, TournamentPublicAPIMixin, GenericAPI
     def get(self, request, **kwargs):
         metrics, extra_metrics = self.get_metrics()
         generator = self.generator(metrics, ('rank',), extra_metrics)
-        standings = generator.generate(self.get_queryset(), round=self.get_max_round())
+        standings = generate_cached(generator, self.get_queryset(), round=self.get_max_round())
         serializer = self.get_serializer(iter(standings), many=True)
         return Response(serializer.data)
 
@@ -458,6 +466,7 @@ class PairingViewSet(RoundAPIMixin, ModelViewSet):
 
     serializer_class = serializers.RoundPairingSerializer
     lookup_url_kwarg = 'debate_pk'
+    pagination_class = CursorOrLimitOffsetPagination
 
     access_preference = 'public_draw'
 
@@ -524,6 +533,7 @@ class FeedbackQuestionViewSet(TournamentAPIMixin, PublicAPIMixin, ModelViewSet):
 
 class FeedbackViewSet(TournamentAPIMixin, AdministratorAPIMixin, ModelViewSet):
     serializer_class = serializers.FeedbackSerializer
+    pagination_class = CursorOrLimitOffsetPagination
     tournament_field = 'adjudicator__tournament'
 
     def perform_create(self, serializer):
@@ -15,7 +15,7 @@ from django.views.generic.base import TemplateView, View
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
 from availability.models import RoundAvailability
-from checkins.utils import get_checkins
+from checkins.utils import annotate_checkins, get_checkins
 from draw.generator.utils import partial_break_round_split
 from draw.models import Debate
 from participants.models import Adjudicator, Team
@@ -231,7 +231,7 @@ class AvailabilityTypeAdjudicatorView(AvailabilityTypeBase):
     update_view = 'availability-update-adjudicators'
 
     def get_queryset(self):
-        return super().get_queryset().select_related('checkin_identifier')
+        return annotate_checkins(super().get_queryset(), self.tournament, 'checkin_window_people')
 
     @staticmethod
     def add_description_columns(table, adjudicators):
@@ -250,7 +250,8 @@ class AvailabilityTypeVenueView(AvailabilityTypeBase):
     update_view = 'availability-update-venues'
 
     def get_queryset(self):
-        return super().get_queryset().select_related('checkin_identifier').prefetch_related('venuecategory_set')
+        queryset = annotate_checkins(super().get_queryset(), self.tournament, 'checkin_window_venues')
+        return queryset.prefetch_related('venuecategory_set')
 
     @staticmethod
     def add_description_columns(table, venues):
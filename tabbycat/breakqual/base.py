@@ -8,6 +8,7 @@ from django.utils.encoding import force_str
 from django.utils.translation import gettext as _
 
 from breakqual.models import BreakingTeam
+from standings.cache import generate_cached
 from standings.teams import TeamStandingsGenerator
 
 logger = logging.getLogger(__name__)
@@ -117,7 +118,7 @@ class BaseBreakGenerator:
         self.check_required_metrics(metrics)
 
         generator = TeamStandingsGenerator(metrics, self.rankings)
-        generated = generator.generate(self.team_queryset)
+        generated = generate_cached(generator, self.team_queryset)
         self.standings = list(generated)
 
     def filter_eligible_teams(self):
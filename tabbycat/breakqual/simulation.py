@@ -0,0 +1,158 @@
+"""Monte Carlo estimates of break probabilities.
+
+Unlike the closed-form thresholds in `liveness.py`, which assume that teams
+are spread perfectly evenly across brackets, this plays out the remaining
+preliminary rounds many times from the real current standings, and counts how
+often each team breaks in each category.
+
+Each simulated round is power-paired: teams are sorted by points (ties broken
+randomly) and each consecutive group of two (or four, in BP) teams forms a
+debate, so that teams are pulled up from the top of the bracket below. Every
+ordering of teams in a debate is taken to be equally likely. After the last
+round, teams are ranked by points, with ties broken randomly (in lieu of
+speaker scores), and the break is taken category by category in descending
+order of priority, excluding teams that have already broken in a category of
+higher priority.
+
+All simulations in a batch are run together as NumPy arrays, one row per
+simulation. Batches can be run in parallel in a process pool. (Categories
+can't be, since whether a team breaks in one category depends on whether it
+broke in categories of higher priority.)
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TWO_TEAM_POSITION_POINTS = (1, 0)
+BP_POSITION_POINTS = (3, 2, 1, 0)
+
+
+class BreakCategorySpec:
+    """The information about a break category that the simulation needs.
+    `eligible` is a boolean sequence, one element per team."""
+
+    def __init__(self, eligible, break_size, priority):
+        self.eligible = np.asarray(eligible, dtype=bool)
+        self.break_size = break_size
+        self.priority = priority
+
+
+def _order_with_random_tiebreak(totals, rng):
+    """Returns the indices that sort each row of `totals` in descending order,
+    breaking ties randomly. Since points are integers, adding a random number
+    in [0, 1) breaks ties without changing the order of different totals."""
+    return np.argsort(-(totals + rng.random(totals.shape)), axis=1)
+
+
+def simulate_final_points(points, weights, position_points, nsimulations, rng):
+    """Returns an array of shape (nsimulations, nteams), each row of which is
+    the points of each team after a simulation of the remaining rounds.
+
+    `points` is the teams' current points, `weights` is a list of the weights
+    of the remaining rounds, and `position_points` is the points awarded to
+    each position in a debate, e.g. (1, 0) for two-team formats. All of these
+    must be integers. If the number of teams isn't a multiple of the number of
+    teams per debate, the leftover teams at the bottom of the draw don't get
+    any points."""
+
+    teams_per_debate = len(position_points)
+    nteams = len(points)
+    ndebates = nteams // teams_per_debate
+    nplaying = ndebates * teams_per_debate
+
+    # Every ordering of the teams in a debate is equally likely, so pick one
+    # of all possible orderings of the position points for each debate
+    outcomes = np.array(list(permutations(position_points)), dtype=np.int64)
+
+    totals = np.tile(np.asarray(points, dtype=np.int64), (nsimulations, 1))
+    rows = np.arange(nsimulations)[:, np.newaxis]
+
+    for weight in weights:
+        order = _order_with_random_tiebreak(totals, rng)[:, :nplaying]
+        choices = rng.integers(len(outcomes), size=(nsimulations, ndebates))
+        totals[rows, order] += weight * outcomes[choices].reshape(nsimulations, nplaying)
+
+    return totals
+
+
+def count_breaks(totals, categories, rng):
+    """Returns an integer array of shape (ncategories, nteams), whose (i, j)th
+    element is the number of simulations (rows of `totals`) in which the jth
+    team broke in the ith category of `categories`, a list of
+    `BreakCategorySpec` objects."""
+
+    nsimulations, nteams = totals.shape
+    rows = np.arange(nsimulations)[:, np.newaxis]
+
+    # Rank each team in each simulation; lower is better, and there are no ties
+    order = _order_with_random_tiebreak(totals, rng)
+    rank = np.empty_like(order)
+    rank[rows, order] = np.arange(nteams)
+
+    # Highest priority of the categories each team has broken in so far
+    broken_priority = np.full(totals.shape, -np.inf)
+    counts = np.zeros((len(categories), nteams), dtype=np.int64)
+
+    for i in sorted(range(len(categories)), key=lambda i: -categories[i].priority):
+        category = categories[i]
+        candidates = category.eligible[np.newaxis, :] & ~(broken_priority > category.priority)
+        if category.break_size >= nteams:
+            breaks = candidates
+        else:
+            key = np.where(candidates, rank, nteams)
+            top = np.argpartition(key, category.break_size - 1, axis=1)[:, :category.break_size]
+            breaks = np.zeros(totals.shape, dtype=bool)
+            breaks[rows, top] = True
+            breaks &= candidates
+        counts[i] = breaks.sum(axis=0)
+        broken_priority[breaks] = np.maximum(broken_priority[breaks], category.priority)
+
+    return counts
+
+
+def _simulate_batch(points, categories, weights, position_points, nsimulations, seed):
+    rng = np.random.default_rng(seed)
+    totals = simulate_final_points(points, weights, position_points, nsimulations, rng)
+    return count_breaks(totals, categories, rng)
+
+
+def simulate_break_probabilities(points, categories, weights, position_points=TWO_TEAM_POSITION_POINTS,
+                                 nsimulations=10000, batch_size=2000, processes=1, seed=None):
+    """Returns an array of shape (ncategories, nteams), whose (i, j)th element
+    is the estimated probability that the jth team breaks in the ith category.
+
+    `points` is a sequence of the teams' current points, and `categories` is
+    a list of `BreakCategorySpec` objects. `weights` is a list of the weights
+    of the remaining preliminary rounds; if it's empty, the break is computed
+    from the current points (with ties broken randomly). `position_points` is
+    the points awarded to each position in a debate.
+
+    Simulations are run in batches of at most `batch_size`, to limit memory
+    use; if `processes` is greater than 1, batches are run in parallel in a
+    pool of that many processes. `seed` is passed to NumPy's random number
+    generator, for reproducible results."""
+
+    nteams = len(points)
+    if nteams == 0 or not categories:
+        return np.zeros((len(categories), nteams))
+
+    batch_sizes = [batch_size] * (nsimulations // batch_size)
+    if nsimulations % batch_size:
+        batch_sizes.append(nsimulations % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    args = [(points, categories, weights, position_points, n, s) for n, s in zip(batch_sizes, seeds)]
+
+    if processes > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(_simulate_batch, *zip(*args)))
+    else:
+        results = [_simulate_batch(*a) for a in args]
+
+    logger.info("Simulated %d rounds %d times for %d teams in %d categories",
+                len(weights), nsimulations, nteams, len(categories))
+    return sum(results) / nsimulations
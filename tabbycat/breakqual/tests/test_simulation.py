@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from tournaments.models import Tournament
+
+from ..simulation import BP_POSITION_POINTS, BreakCategorySpec, simulate_break_probabilities
+from ..utils import calculate_break_probabilities
+
+
+class TestBreakSimulation(TestCase):
+
+    def test_sums_to_break_size(self):
+        points = [4, 4, 3, 3, 3, 2, 2, 2, 2, 1, 1, 1, 0, 0, 0, 0]
+        categories = [
+            BreakCategorySpec([True] * 16, 4, 1),
+            BreakCategorySpec([i % 3 == 0 for i in range(16)], 2, 0),
+        ]
+        probabilities = simulate_break_probabilities(points, categories, [1, 1], nsimulations=500, seed=1)
+        self.assertEqual(probabilities.shape, (2, 16))
+        self.assertAlmostEqual(probabilities[0].sum(), 4)
+        self.assertAlmostEqual(probabilities[1].sum(), 2)
+        for i in range(16):
+            if i % 3 != 0:
+                self.assertEqual(probabilities[1][i], 0)
+
+    def test_no_rounds_remaining(self):
+        points = [5, 4, 3, 2, 1, 0]
+        categories = [BreakCategorySpec([True] * 6, 2, 0)]
+        probabilities = simulate_break_probabilities(points, categories, [], nsimulations=100, seed=1)
+        self.assertEqual(probabilities[0].tolist(), [1, 1, 0, 0, 0, 0])
+
+    def test_safe_and_dead(self):
+        # The top two teams meet in the last round; nobody else can catch them
+        points = [3, 3, 1, 1, 1, 1, 0, 0]
+        categories = [BreakCategorySpec([True] * 8, 2, 0)]
+        probabilities = simulate_break_probabilities(points, categories, [1], nsimulations=200, seed=1)
+        self.assertEqual(probabilities[0].tolist(), [1, 1, 0, 0, 0, 0, 0, 0])
+
+    def test_ties_shared(self):
+        points = [2, 2, 2, 2]
+        categories = [BreakCategorySpec([True] * 4, 2, 0)]
+        probabilities = simulate_break_probabilities(points, categories, [], nsimulations=4000, seed=1)
+        for p in probabilities[0]:
+            self.assertAlmostEqual(p, 0.5, delta=0.05)
+
+    def test_higher_priority_excluded(self):
+        points = [5, 4, 3, 2, 1, 0]
+        categories = [
+            BreakCategorySpec([True] * 6, 2, 1),
+            BreakCategorySpec([True, False, True, True, False, False], 2, 0),
+        ]
+        probabilities = simulate_break_probabilities(points, categories, [], nsimulations=100, seed=1)
+        self.assertEqual(probabilities[0].tolist(), [1, 1, 0, 0, 0, 0])
+        self.assertEqual(probabilities[1].tolist(), [0, 0, 1, 1, 0, 0])
+
+    def test_same_priority_not_excluded(self):
+        points = [5, 4, 3, 2, 1, 0]
+        categories = [
+            BreakCategorySpec([True] * 6, 2, 0),
+            BreakCategorySpec([True, False, True, True, False, False], 2, 0),
+        ]
+        probabilities = simulate_break_probabilities(points, categories, [], nsimulations=100, seed=1)
+        self.assertEqual(probabilities[1].tolist(), [1, 0, 1, 0, 0, 0])
+
+    def test_bp(self):
+        points = [6, 6, 5, 4, 4, 3, 3, 3, 2, 1, 1, 0]
+        categories = [BreakCategorySpec([True] * 12, 4, 0)]
+        probabilities = simulate_break_probabilities(points, categories, [1, 1], BP_POSITION_POINTS,
+            nsimulations=500, seed=1)
+        self.assertAlmostEqual(probabilities[0].sum(), 4)
+        self.assertGreater(probabilities[0][0], probabilities[0][-1])
+
+    def test_reproducible(self):
+        points = list(range(20))
+        categories = [BreakCategorySpec([True] * 20, 4, 0)]
+        first = simulate_break_probabilities(points, categories, [1, 1, 1], nsimulations=300, batch_size=100, seed=7)
+        second = simulate_break_probabilities(points, categories, [1, 1, 1], nsimulations=300, batch_size=100, seed=7)
+        self.assertEqual(first.tolist(), second.tolist())
+
+
+class TestCalculateBreakProbabilities(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=2)
+
+    def test_probabilities(self):
+        probabilities = calculate_break_probabilities(self.tournament, self.round, nsimulations=200)
+        for category in self.tournament.breakcategory_set.all():
+            category_probabilities = probabilities[category.id]
+            self.assertEqual(set(category_probabilities.keys()), set(category.team_set.values_list('id', flat=True)))
+            for p in category_probabilities.values():
+                self.assertGreaterEqual(p, 0)
+                self.assertLessEqual(p, 1)
+            self.assertLessEqual(sum(category_probabilities.values()), category.break_size + 1e-9)
+
+    def test_cached(self):
+        calculate_break_probabilities(self.tournament, self.round, nsimulations=200)
+        with self.assertNumQueries(3):  # categories, eligibility and rounds, to build the key
+            calculate_break_probabilities(self.tournament, self.round, nsimulations=200)
@@ -1,13 +1,20 @@
+import hashlib
 import itertools
 import logging
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Count, Max, Q, Sum
 from django.utils.translation import gettext_lazy as _
 
+from participants.models import Team
+from standings.cache import generate_cached, get_standings_version
 from standings.teams import TeamStandingsGenerator
 from tournaments.models import Round
 
 from .liveness import liveness_bp, liveness_twoteam
+from .models import BreakCategory
+from .simulation import BP_POSITION_POINTS, BreakCategorySpec, simulate_break_probabilities, TWO_TEAM_POSITION_POINTS
 
 logger = logging.getLogger(__name__)
 
@@ -52,32 +59,58 @@ def breakcategories_with_counts(tournament):
     return categories
 
 
-def liveness(self, team, teams_count, prelims, current_round):
-    live_info = {'text': team.wins_count, 'tooltip': ''}
-
-    # The actual calculation should be shifed to be a cached method on
-    # the relevant break category
-    highest_liveness = 3
-    for bc in team.break_categories.all():
-        import random
-        status = random.choice([1, 2, 3])
-        highest_liveness = 3
-        if status == 1:
-            live_info['tooltip'] += 'Definitely in for the %s break<br>test' % bc.name
-            if highest_liveness != 2:
-                highest_liveness = 1  # Live not ins are the most important highlight
-        elif status == 2:
-            live_info['tooltip'] += 'Still live for the %s break<br>test' % bc.name
-            highest_liveness = 2
-        elif status == 3:
-            live_info['tooltip'] += 'Cannot break in %s break<br>test' % bc.name
-
-    if highest_liveness == 1:
-        live_info['class'] = 'bg-success'
-    elif highest_liveness == 2:
-        live_info['class'] = 'bg-warning'
-
-    return live_info
+BREAK_PROBABILITIES_KEY = "break_probabilities_{tournament_id}_{version}_{digest}"
+
+
+def calculate_break_probabilities(tournament, round, nsimulations=10000, processes=1):
+    """Estimates the probability of each team breaking in each break category,
+    by simulating the preliminary rounds after `round` from the standings as of
+    `round` (see `simulation.py`). Returns a dict mapping break category IDs to
+    dicts mapping team IDs to probabilities, including only eligible teams.
+
+    Results are cached until the standings change (see `standings/cache.py`)
+    or break categories or eligibility are edited."""
+
+    categories = list(tournament.breakcategory_set.order_by('id').values_list('id', 'break_size', 'priority'))
+    eligibility = sorted(BreakCategory.team_set.through.objects.filter(
+        breakcategory__tournament=tournament).values_list('breakcategory_id', 'team_id'))
+    weights = list(tournament.prelim_rounds().filter(seq__gt=round.seq).order_by('seq').values_list('weight', flat=True))
+
+    spec = repr((round.id, nsimulations, categories, eligibility, weights))
+    key = BREAK_PROBABILITIES_KEY.format(tournament_id=tournament.id,
+        version=get_standings_version(tournament.id), digest=hashlib.sha1(spec.encode()).hexdigest())
+    probabilities = cache.get(key)
+    if probabilities is not None:
+        return probabilities
+
+    teams = tournament.team_set.exclude(type=Team.TYPE_BYE)
+    standings = generate_cached(TeamStandingsGenerator(('points',), ()), teams, round=round)
+    team_ids = [info.team.id for info in standings]
+    team_index = {team_id: i for i, team_id in enumerate(team_ids)}
+    points = [info.metrics['points'] or 0 for info in standings]
+
+    eligible_by_category = {category_id: [False] * len(team_ids) for category_id, break_size, priority in categories}
+    for category_id, team_id in eligibility:
+        if team_id in team_index:
+            eligible_by_category[category_id][team_index[team_id]] = True
+    specs = [BreakCategorySpec(eligible_by_category[category_id], break_size, priority)
+             for category_id, break_size, priority in categories]
+
+    if tournament.pref('teams_in_debate') == 'bp':
+        position_points = BP_POSITION_POINTS
+    else:
+        position_points = TWO_TEAM_POSITION_POINTS
+
+    result = simulate_break_probabilities(points, specs, weights, position_points,
+        nsimulations=nsimulations, processes=processes, seed=round.id)
+
+    probabilities = {}
+    for (category_id, break_size, priority), spec, row in zip(categories, specs, result):
+        probabilities[category_id] = {team_id: p for team_id, p, eligible
+                in zip(team_ids, row.tolist(), spec.eligible) if eligible}
+
+    cache.set(key, probabilities, settings.TAB_PAGES_CACHE_TIMEOUT)
+    return probabilities
 
 
 def determine_liveness(thresholds, points):
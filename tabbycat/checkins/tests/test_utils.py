@@ -0,0 +1,96 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from participants.models import Adjudicator, Speaker, Team
+from tournaments.models import Tournament
+
+from ..models import Event, Identifier, PersonIdentifier
+from ..utils import annotate_checkins, create_identifiers, get_checkin_times, get_checkins
+
+
+class TestCreateIdentifiers(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="checkinstest", name="Check-ins test")
+        for i in range(5):
+            Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator %d" % i)
+
+    def tearDown(self):
+        self.tournament.delete()
+
+    def test_create_identifiers(self):
+        adjs = self.tournament.adjudicator_set.all()
+        create_identifiers(PersonIdentifier, adjs)
+        self.assertEqual(PersonIdentifier.objects.filter(person__in=adjs).count(), 5)
+        for adj in adjs.select_related('checkin_identifier'):
+            self.assertRegex(adj.checkin_identifier.barcode, r'^[1-9][0-9]{5}$')
+            self.assertIsInstance(Identifier.objects.get(barcode=adj.checkin_identifier.barcode), PersonIdentifier)
+
+    def test_skips_existing(self):
+        adjs = self.tournament.adjudicator_set.all()
+        existing = PersonIdentifier.objects.create(person=adjs.first())
+        create_identifiers(PersonIdentifier, adjs)
+        self.assertEqual(PersonIdentifier.objects.filter(person__in=adjs).count(), 5)
+        self.assertEqual(adjs.first().checkin_identifier.barcode, existing.barcode)
+
+
+class TestGetCheckins(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="checkinstest", name="Check-ins test")
+        self.adj1 = Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator 1")
+        self.adj2 = Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator 2")
+        Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator 3")  # no identifier
+        self.team = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
+        self.speaker = Speaker.objects.create(team=self.team, name="Speaker")
+        create_identifiers(PersonIdentifier, self.tournament.adjudicator_set.exclude(name="Adjudicator 3"))
+        create_identifiers(PersonIdentifier, Speaker.objects.filter(team=self.team))
+
+        now = timezone.now()
+        self.earlier = now - datetime.timedelta(hours=1)
+        self.later = now - datetime.timedelta(minutes=5)
+        self.adj1.refresh_from_db()
+        self.speaker.refresh_from_db()
+        for time in [self.earlier, self.later]:
+            Event.objects.create(identifier=self.adj1.checkin_identifier, tournament=self.tournament, time=time)
+        Event.objects.create(identifier=self.speaker.checkin_identifier, tournament=self.tournament, time=self.later)
+
+    def tearDown(self):
+        self.tournament.delete()
+
+    def check_adjudicators(self, adjs):
+        adjs = {adj.name: adj for adj in adjs}
+        self.assertTrue(adjs["Adjudicator 1"].checked_in)
+        self.assertEqual(adjs["Adjudicator 1"].time, self.later)
+        self.assertFalse(adjs["Adjudicator 2"].checked_in)
+        self.assertIsNotNone(adjs["Adjudicator 2"].barcode)
+        self.assertFalse(adjs["Adjudicator 3"].checked_in)
+        self.assertIsNone(adjs["Adjudicator 3"].barcode)
+
+    def test_checkin_times(self):
+        times = get_checkin_times(self.tournament, None)
+        self.assertEqual(times, {
+            self.adj1.checkin_identifier.barcode: self.later,
+            self.speaker.checkin_identifier.barcode: self.later,
+        })
+
+    def test_unannotated(self):
+        adjs = self.tournament.adjudicator_set.select_related('checkin_identifier')
+        with self.assertNumQueries(2):
+            get_checkins(adjs, self.tournament, None)
+        self.check_adjudicators(adjs)
+
+    def test_annotated(self):
+        adjs = annotate_checkins(self.tournament.adjudicator_set.all(), self.tournament, None)
+        with self.assertNumQueries(1):
+            get_checkins(adjs, self.tournament, None)
+        self.check_adjudicators(adjs)
+
+    def test_teams(self):
+        teams = self.tournament.team_set.prefetch_related('speaker_set__checkin_identifier')
+        get_checkins(teams, self.tournament, None)
+        speaker = teams[0].speaker_set.all()[0]
+        self.assertTrue(speaker.checked_in)
+        self.assertEqual(speaker.time, self.later)
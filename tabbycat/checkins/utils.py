@@ -3,12 +3,16 @@ import logging
 import random
 import string
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, OuterRef, Q, QuerySet, Subquery
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from .models import DebateIdentifier, Event, PersonIdentifier, VenueIdentifier
+from importer.importers.base import bulk_create
+
+from .models import DebateIdentifier, Event, generate_barcode, Identifier, PersonIdentifier, VenueIdentifier
 
 logger = logging.getLogger(__name__)
 
@@ -42,44 +46,110 @@ def get_unexpired_checkins(tournament, window_preference_type):
     return Event.objects.filter(filters).select_related('identifier').order_by('time')
 
 
-def create_identifiers(model_to_make, items_to_check):
+def get_checkin_times(tournament, window_preference_type):
+    """Returns a dict mapping barcodes to the time of the latest unexpired
+    check-in event for that barcode."""
+    events = get_unexpired_checkins(tournament, window_preference_type).order_by()
+    return dict(events.values_list('identifier__barcode').annotate(latest=Max('time')))
+
+
+def annotate_checkins(queryset, tournament, window_preference_type):
+    """Annotates each person, debate or room in `queryset` with
+    `checkin_barcode`, its barcode (or None), and `checkin_time`, the time of
+    its latest unexpired check-in event (or None), so that check-in statuses
+    are fetched in the same query as the instances themselves. `get_checkins()`
+    uses these annotations if they're present."""
+    events = get_unexpired_checkins(tournament, window_preference_type).filter(
+        identifier=OuterRef('checkin_identifier__pk')).order_by('-time')
+    return queryset.annotate(
+        checkin_barcode=F('checkin_identifier__barcode'),
+        checkin_time=Subquery(events.values('time')[:1]),
+    )
+
+
+def generate_barcodes(n):
+    """Returns a set of `n` new barcodes, none of which are already in use.
+    Uses one query, rather than one per barcode as the model default does."""
+    barcodes = set()
+    while len(barcodes) < n:
+        candidates = {generate_barcode() for _ in range(n - len(barcodes))}
+        candidates -= set(Identifier.objects.filter(barcode__in=candidates).values_list('barcode', flat=True))
+        barcodes |= candidates
+    return barcodes
+
+
+def create_identifiers(model_to_make, items_to_check, attempts=5):
+    """Creates identifiers in bulk for all items in `items_to_check` that don't
+    already have one. If a barcode is taken between being generated and being
+    saved (e.g. by a concurrent request), the whole batch is retried with new
+    barcodes."""
     kind = model_to_make.instance_attr
-    identifiers_to_make = items_to_check.filter(checkin_identifier__isnull=True)
-
-    for item in identifiers_to_make:
-        model_to_make.objects.create(**{kind: item})
+    items = list(items_to_check.filter(checkin_identifier__isnull=True))
+    if not items:
+        return
+
+    for attempt in range(1, attempts + 1):
+        barcodes = generate_barcodes(len(items))
+        identifiers = [model_to_make(barcode=barcode, **{kind: item})
+                       for barcode, item in zip(barcodes, items)]
+        try:
+            with transaction.atomic():
+                bulk_create_identifiers(model_to_make, identifiers)
+        except IntegrityError:
+            logger.warning("Barcode collision creating %d identifiers (attempt %d of %d)",
+                len(identifiers), attempt, attempts)
+        else:
+            return
+
+    raise IntegrityError("Could not create unique barcodes after %d attempts" % attempts)
+
+
+def bulk_create_identifiers(model, identifiers):
+    """Saves `identifiers`, instances of a subclass `model` of the polymorphic
+    `Identifier`, in bulk. This sets the polymorphic content type, which
+    `save()` would otherwise set."""
+    content_type = ContentType.objects.get_for_model(model, for_concrete_model=False)
+    for identifier in identifiers:
+        identifier.polymorphic_ctype = content_type
+    bulk_create(model, identifiers)
+
+
+def set_checkin_status(instance, barcode, time):
+    """Sets the attributes used by tables to show check-in statuses."""
+    instance.barcode = barcode
+    instance.time = time
+    instance.checked_in = time is not None
+    if time is not None:
+        instance.checked_icon = 'check'
+        instance.checked_tooltip = _("checked in at %(time)s") % {'time': time.strftime('%H:%M')}
+    else:
+        instance.checked_icon = ''
+        if barcode is not None:
+            instance.checked_tooltip = _("Not checked in (barcode %(barcode)s)") % {'barcode': barcode}
+        else:
+            instance.checked_tooltip = _("Not checked in; no barcode assigned")
+    return instance
 
-    return
 
+def single_checkin(instance, checkin_times):
+    """`checkin_times` is a dict as returned by `get_checkin_times()`."""
+    if hasattr(instance, 'checkin_time'):  # from annotate_checkins()
+        return set_checkin_status(instance, instance.checkin_barcode, instance.checkin_time)
 
-def single_checkin(instance, events):
-    instance.checked_icon = ''
-    instance.checked_in = False
     try:
-        identifier = instance.checkin_identifier
-        instance.barcode = identifier.barcode
-        instance.checked_tooltip = _("Not checked in (barcode %(barcode)s)") % {'barcode': identifier.barcode}
+        barcode = instance.checkin_identifier.barcode
     except ObjectDoesNotExist:
-        identifier = None
-        instance.barcode = None
-        instance.checked_tooltip = _("Not checked in; no barcode assigned")
-
-    if identifier:
-        instance.time = next((e['time'] for e in events if e['identifier__barcode'] == identifier.barcode), None)
-        if instance.time:
-            instance.checked_in = True
-            instance.checked_icon = 'check'
-            instance.checked_tooltip = _("checked in at %(time)s") % {'time': instance.time.strftime('%H:%M')}
-    return instance
+        return set_checkin_status(instance, None, None)
+    return set_checkin_status(instance, barcode, checkin_times.get(barcode))
 
 
-def multi_checkin(team, events, t):
+def multi_checkin(team, checkin_times, t):
     team.checked_icon = ''
     team.checked_in = False
     tooltips = []
 
     for speaker in team.speaker_set.all():
-        speaker = single_checkin(speaker, events)
+        speaker = single_checkin(speaker, checkin_times)
         if speaker.checked_in:
             tooltip = _("%(speaker)s checked in at %(time)s.") % {'speaker': speaker.name, 'time': speaker.time.strftime('%H:%M')}
         else:
@@ -101,12 +171,19 @@ def multi_checkin(team, events, t):
 
 
 def get_checkins(queryset, t, window_preference_type):
-    events = get_unexpired_checkins(t, window_preference_type).values(
-        'time', 'identifier__barcode')
+    """Sets check-in status attributes on each instance in `queryset`, which
+    may be a list. If `queryset` was annotated by `annotate_checkins()`, this
+    doesn't need any further queries; otherwise it runs one query for the
+    latest check-in times, and `checkin_identifier` should be prefetched."""
+    if isinstance(queryset, QuerySet) and 'checkin_time' in queryset.query.annotations:
+        checkin_times = {}
+    else:
+        checkin_times = get_checkin_times(t, window_preference_type)
+
     for instance in queryset:
         if hasattr(instance, 'use_institution_prefix'):
-            instance = multi_checkin(instance, events, t)
+            instance = multi_checkin(instance, checkin_times, t)
         else:
-            instance = single_checkin(instance, events)
+            instance = single_checkin(instance, checkin_times)
 
     return queryset
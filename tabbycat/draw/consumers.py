@@ -6,6 +6,7 @@ from channels.generic.websocket import JsonWebsocketConsumer
 from channels.layers import get_channel_layer
 
 from actionlog.models import ActionLogEntry
+from adjallocation.progress import AllocationCancelToken
 from adjallocation.serializers import SimpleDebateAllocationSerializer, SimpleDebateImportanceSerializer
 from tournaments.mixins import RoundWebsocketMixin
 from utils.mixins import SuperuserRequiredWebsocketMixin
@@ -36,8 +37,17 @@ class BaseAdjudicatorContainerConsumer(SuperuserRequiredWebsocketMixin, RoundWeb
                 self.receive_adjudicators(content)
 
     def receive_action(self, action_function, action_settings, user):
+        # Cancellation can't go through the worker, since it'll be busy with
+        # the allocation being cancelled; see adjallocation/progress.py
+        if action_function == "cancel_allocation":
+            AllocationCancelToken(self.round.id).cancel()
+            return
+
         # TODO: Make this selection mechanism more robust
         worker = "venues" if action_function == "allocate_debate_venues" else "adjallocation"
+        if worker == "adjallocation":
+            # Clear any cancellation left over from an earlier allocation
+            AllocationCancelToken(self.round.id).reset()
         async_to_sync(get_channel_layer().send)(worker, {
             "type": action_function, # Corresponds to the function
             "extra": {'user_id': user.id, 'round_id': self.round.id,
@@ -212,11 +222,11 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
         serialized_debates = serialiser(debates, many=True)
         return serialized_debates
 
-    def return_error(self, group_name, error_text):
+    def return_error(self, group_name, error_text, error_type='danger'):
         """ Because the worker can't do proper returns we can't really catch
         exceptions across each function; provide a manual handler instead. """
         logger.warning(error_text)
-        content = {'message': {'text': error_text, 'type': 'danger'}}
+        content = {'message': {'text': error_text, 'type': error_type}}
         async_to_sync(get_channel_layer().group_send)(
             group_name, {
                 'type': 'broadcast_debates_or_panels',
@@ -224,6 +234,16 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
             },
         )
 
+    def return_progress(self, group_name, progress):
+        """ Sends an update on a long-running action, without ending it (the
+        front-end stays in its loading state until a message arrives). """
+        async_to_sync(get_channel_layer().group_send)(
+            group_name, {
+                'type': 'broadcast_debates_or_panels',
+                'content': {'progress': progress},
+            },
+        )
+
     def return_response(self, serialized_debates_or_panels, group_name,
                         message_text, message_type):
         content = {
@@ -15,6 +15,9 @@ DRAW_FLAG_DESCRIPTIONS = (
     ("1u1d_hist", _("One-up-one-down (history)")),
     ("1u1d_inst", _("One-up-one-down (institution)")),
     ("1u1d_other", _("One-up-one-down (to accommodate)")),
+    ("swap_hist", _("Reassigned (history)")),
+    ("swap_inst", _("Reassigned (institution)")),
+    ("swap_other", _("Reassigned (to accommodate)")),
     ("bub_up_hist", _("Bubble up (history)")),
     ("bub_dn_hist", _("Bubble down (history)")),
     ("bub_up_inst", _("Bubble up (institution)")),
@@ -2,13 +2,18 @@ import logging
 import random
 import time
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from math import log2
 from statistics import pvariance
 
 import munkres
+import numpy as np
 from django.utils.translation import gettext as _
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import bmat, csr_matrix
+from scipy.sparse.csgraph import connected_components
 
-from .common import BaseBPDrawGenerator, DrawUserError
+from .common import BaseBPDrawGenerator, DrawFatalError, DrawUserError
 from .pairing import BPPairing
 
 logger = logging.getLogger(__name__)
@@ -64,24 +69,47 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             "hungarian_preshuffled" - Hungarian algorithm, with the rows and
                                       columns of the cost matrix permuted
                                       randomly beforehand.
+
+        "assignment_backend" - Solver used to compute the assignment. Permitted
+                               values:
+
+            "scipy"   - scipy.optimize.linear_sum_assignment, which works
+                        directly on the dense cost matrix.
+
+            "munkres" - The pure-Python munkres package. Much slower on large
+                        tournaments; retained mainly for parity testing.
+
+        "assignment_blocks" - (bool) If True, the assignment problem is split
+                              into independent blocks, being the connected
+                              components of the graph of allowed team-position
+                              pairs, and each block is solved separately. Since
+                              disallowed pairs can never be in the solution,
+                              this yields the same total cost as solving the
+                              full matrix.
+
+        "assignment_processes" - (int) If greater than 1, blocks are solved in
+                                 parallel in a pool of this many processes.
+                                 Only worthwhile for very large tournaments.
     """
 
     requires_even_teams = True
     requires_prev_result = False
 
     DEFAULT_OPTIONS = {
-        "pullup"           : "anywhere",
-        "position_cost"    : "entropy",
-        "renyi_order"      : 1.0,
-        "exponent"         : 4.0,
-        "assignment_method": "hungarian_preshuffled",
+        "pullup"              : "anywhere",
+        "position_cost"       : "entropy",
+        "renyi_order"         : 1.0,
+        "exponent"            : 4.0,
+        "assignment_method"   : "hungarian_preshuffled",
+        "assignment_backend"  : "scipy",
+        "assignment_blocks"   : True,
+        "assignment_processes": 1,
     }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.check_teams_for_attribute("points")
         self.check_teams_for_attribute("side_history")
-        self.munkres = munkres.Munkres()
 
     def generate(self):
         self._rooms = self.define_rooms([team.points for team in self.teams])
@@ -217,33 +245,114 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             return (2 - log2(sum([p ** α for p in probs])) / (1 - α)) * n
         return _position_cost_renyi_entropy
 
+    # Vectorized position cost functions. Each takes an array of shape
+    # (nteams, 4) of position histories, and returns an array of the same shape
+    # whose (t, pos) element is the cost of team t being in position pos. They
+    # must agree with the scalar functions above, which are still used to
+    # report position costs in the position balance report.
+
+    POSITION_COST_ARRAY_FUNCTIONS = {
+        "simple" : "_position_cost_array_simple",
+        "variance": "_position_cost_array_variance",
+    }
+
+    @staticmethod
+    def get_entropy_position_cost_array_function(α):  # noqa: N803
+        if α == 1.0:
+            return BPHungarianDrawGenerator._position_cost_array_shannon_entropy
+        elif α == 0.0:
+            return BPHungarianDrawGenerator._position_cost_array_min_entropy
+        elif α > 0.0:
+            return BPHungarianDrawGenerator._get_position_cost_array_renyi_entropy_function(α)
+        else:
+            raise DrawUserError(_("The Rényi order can't be negative, and it's currently set "
+                "to %(alpha)f.") % {'alpha': α})
+
+    def get_position_cost_array_function(self):
+        """Returns a vectorized position cost function. If the "position_cost"
+        option is a custom (scalar) function, it is wrapped so that it applies
+        to every team and position."""
+        option = self.options["position_cost"]
+        if callable(option):
+            def _position_cost_array_custom(histories):
+                return np.array([[option(pos, list(history)) for pos in range(4)]
+                                 for history in histories.tolist()], dtype=float)
+            return _position_cost_array_custom
+        if option == "entropy":
+            return self.get_entropy_position_cost_array_function(self.options["renyi_order"])
+        return self.get_option_function("position_cost", self.POSITION_COST_ARRAY_FUNCTIONS)
+
+    @staticmethod
+    def _update_histories(histories):
+        """Returns an array of shape (nteams, 4, 4), whose (t, pos) element is
+        the position history of team t after being in position pos."""
+        return histories[:, np.newaxis, :] + np.eye(4)
+
+    @staticmethod
+    def _position_cost_array_simple(histories):
+        return histories.astype(float)
+
+    @staticmethod
+    def _position_cost_array_variance(histories):
+        histories = BPHungarianDrawGenerator._update_histories(histories)
+        return histories.var(axis=2)
+
+    @staticmethod
+    def _position_cost_array_shannon_entropy(histories):
+        histories = BPHungarianDrawGenerator._update_histories(histories)
+        n = histories.sum(axis=2)
+        probs = histories / n[:, :, np.newaxis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            selfinfo = np.where(probs > 0, -probs * np.log2(probs), 0.0)
+        return (2 - selfinfo.sum(axis=2)) * n
+
+    @staticmethod
+    def _position_cost_array_min_entropy(histories):
+        histories = BPHungarianDrawGenerator._update_histories(histories)
+        return (2 - np.log2(np.count_nonzero(histories, axis=2))) * histories.sum(axis=2)
+
+    @staticmethod
+    def _get_position_cost_array_renyi_entropy_function(α):  # noqa: N803
+        def _position_cost_array_renyi_entropy(histories):
+            histories = BPHungarianDrawGenerator._update_histories(histories)
+            n = histories.sum(axis=2)
+            probs = histories / n[:, :, np.newaxis]
+            return (2 - np.log2((probs ** α).sum(axis=2)) / (1 - α)) * n
+        return _position_cost_array_renyi_entropy
+
     def generate_cost_matrix(self, rooms):
-        """Returns a cost matrix for the tournament.
-        Rows (inner lists) are teams, in the same order as in `self.teams`.
-        Columns (elements) are positions in rooms, ordered first by room in the
-        order returned by `rooms`, then in speaking order (OG, OO, CG, CO).
+        """Returns a cost matrix for the tournament, as a NumPy array.
+        Rows are teams, in the same order as in `self.teams`.
+        Columns are positions in rooms, ordered first by room in the order
+        returned by `rooms`, then in speaking order (OG, OO, CG, CO).
         Rules:
          - if the team (given its points) is not allowed in the room, use
-           DISALLOWED.
+           infinity (i.e., disallowed).
          - otherwise, for each position, use the position cost for that position
            (for a team with that position history).
         """
         nteams = len(self.teams)
-        cost = self.get_position_cost_function()
+        cost = self.get_position_cost_array_function()
         exponent = self.options["exponent"]
 
-        costs = []
-        for team in self.teams:
-            row = []
-            for level, allowed in rooms:
-                if team.points not in allowed:
-                    row.extend([munkres.DISALLOWED] * 4)
-                else:
-                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
-            assert len(row) == nteams
-            costs.append(row)
-
-        assert len(costs) == nteams
+        histories = np.array([team.side_history for team in self.teams], dtype=float).reshape(nteams, 4)
+        position_costs = cost(histories) ** exponent
+
+        # Rooms in the same bracket share the same allowed set, so only compute
+        # each team's eligibility once per distinct set.
+        points = [team.points for team in self.teams]
+        eligibility = {}
+        allowed_columns = []
+        for level, allowed in rooms:
+            key = frozenset(allowed)
+            if key not in eligibility:
+                eligibility[key] = np.fromiter((p in allowed for p in points), dtype=bool, count=nteams)
+            allowed_columns.append(eligibility[key])
+
+        allowed = np.repeat(np.column_stack(allowed_columns), 4, axis=1)
+        costs = np.where(allowed, np.tile(position_costs, len(rooms)), np.inf)
+
+        assert costs.shape == (nteams, nteams)
         return costs
 
     # Assignment algorithms
@@ -267,16 +376,74 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         return indices
 
     def _assign_hungarian(self, costs):
-        return self.munkres.compute(costs)
+        solve = self.get_option_function("assignment_backend", self.ASSIGNMENT_BACKEND_FUNCTIONS)
+        if not self.options["assignment_blocks"]:
+            return solve(costs)
+
+        blocks = self.find_blocks(costs)
+        logger.info("Split assignment problem into %d blocks, largest has %d teams",
+                len(blocks), max(len(rows) for rows, cols in blocks))
+        submatrices = [costs[np.ix_(rows, cols)] for rows, cols in blocks]
+
+        if self.options["assignment_processes"] > 1 and len(blocks) > 1:
+            with ProcessPoolExecutor(max_workers=self.options["assignment_processes"]) as executor:
+                solutions = list(executor.map(solve, submatrices))
+        else:
+            solutions = [solve(submatrix) for submatrix in submatrices]
+
+        indices = []
+        for (rows, cols), solution in zip(blocks, solutions):
+            indices.extend((rows[i], cols[j]) for i, j in solution)
+        return indices
 
     def _assign_hungarian_preshuffled(self, costs):
         n = len(costs)
         K = random.sample(range(n), n)             # noqa: N806
         J = random.sample(range(n), n)             # noqa: N806
-        C = [[costs[i][j] for j in J] for i in K]  # noqa: N806
-        indices = self.munkres.compute(C)
+        C = costs[np.ix_(K, J)]                    # noqa: N806
+        indices = self._assign_hungarian(C)
         return [(K[i], J[j]) for i, j in indices]
 
+    @staticmethod
+    def find_blocks(costs):
+        """Partitions the cost matrix into independent blocks. Returns a list of
+        2-tuples `(rows, cols)`, each being a list of indices, one for each
+        connected component of the bipartite graph whose edges are the allowed
+        (finite-cost) team-position pairs."""
+        nrows, ncols = costs.shape
+        allowed = csr_matrix(np.isfinite(costs))
+        graph = bmat([[None, allowed], [allowed.T, None]])
+        ncomponents, labels = connected_components(graph, directed=False)
+
+        row_labels = labels[:nrows]
+        col_labels = labels[nrows:]
+        blocks = []
+        for component in range(ncomponents):
+            rows = np.flatnonzero(row_labels == component).tolist()
+            cols = np.flatnonzero(col_labels == component).tolist()
+            if len(rows) != len(cols):
+                raise DrawFatalError("Assignment block has %d teams but %d positions" % (len(rows), len(cols)))
+            blocks.append((rows, cols))
+        return blocks
+
+    # Assignment backends
+    # These are static so that they can be sent to worker processes.
+
+    ASSIGNMENT_BACKEND_FUNCTIONS = {
+        "scipy"  : "_solve_scipy",
+        "munkres": "_solve_munkres",
+    }
+
+    @staticmethod
+    def _solve_scipy(costs):
+        rows, cols = linear_sum_assignment(costs)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    @staticmethod
+    def _solve_munkres(costs):
+        matrix = [[munkres.DISALLOWED if x == np.inf else x for x in row] for row in costs.tolist()]
+        return munkres.Munkres().compute(matrix)
+
     # Make pairings
 
     def make_pairings(self, rooms, indices):
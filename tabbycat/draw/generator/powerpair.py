@@ -1,7 +1,9 @@
 import random
 from collections import OrderedDict
 
+import numpy as np
 from django.utils.translation import gettext as _
+from scipy.optimize import linear_sum_assignment
 
 from .common import BasePairDrawGenerator, DrawFatalError, DrawUserError
 from .one_up_one_down import OneUpOneDownSwapper
@@ -56,6 +58,16 @@ class PowerPairedDrawGenerator(BasePairDrawGenerator):
             "one_up_one_down" - Swap conflicted teams with the debate above or
                                 below, in accordance with Australasian
                                 Intervarsity Debating Association rules.
+            "assignment"      - Reassign the second team in each debate within
+                                each bracket, so that the total conflict badness
+                                in the bracket is minimised. Among solutions
+                                with equal badness, the one that moves teams
+                                the least (squared) distance is chosen.
+
+        "team_history" - Optional dict mapping team IDs to dicts (or Counters)
+            mapping opponent team IDs to the number of times the teams have met.
+            If given, the "assignment" conflict avoidance method uses this
+            instead of calling `seen()` for every pair of teams.
     """
 
     requires_even_teams = True
@@ -66,6 +78,7 @@ class PowerPairedDrawGenerator(BasePairDrawGenerator):
         "pairing_method"        : "slide",
         "avoid_conflicts"       : "one_up_one_down",
         "pullup_restriction"    : "none",
+        "team_history"          : None,
     }
 
     def __init__(self, *args, **kwargs):
@@ -353,6 +366,7 @@ class PowerPairedDrawGenerator(BasePairDrawGenerator):
 
     AVOID_CONFLICT_FUNCTIONS = {
         "one_up_one_down": "_one_up_one_down",
+        "assignment"     : "_assignment",
     }
 
     def avoid_conflicts(self, pairings):
@@ -388,6 +402,101 @@ class PowerPairedDrawGenerator(BasePairDrawGenerator):
                         pairing.add_flag("1u1d_other")
                     pairing.teams = list(new)
 
+    def _conflict_matrices(self, affs, negs):
+        """Returns a 2-tuple of arrays `(hist, inst)`, where `hist[i, j]` is the
+        number of times `affs[i]` has seen `negs[j]`, and `inst[i, j]` is True if
+        they are from the same institution (and it isn't None)."""
+        history = self.options["team_history"]
+        hist = np.zeros((len(affs), len(negs)), dtype=int)
+        if history is not None:
+            neg_indices = {team.id: j for j, team in enumerate(negs)}
+            for i, aff in enumerate(affs):
+                for opponent, count in history.get(aff.id, {}).items():
+                    if opponent in neg_indices:
+                        hist[i, neg_indices[opponent]] = count
+        else:
+            for i, aff in enumerate(affs):
+                for j, neg in enumerate(negs):
+                    hist[i, j] = aff.seen(neg)
+
+        codes = {}
+        aff_insts = np.array([codes.setdefault(t.institution, len(codes)) if t.institution is not None else -1 for t in affs])
+        neg_insts = np.array([codes.setdefault(t.institution, len(codes)) if t.institution is not None else -2 for t in negs])
+        inst = aff_insts[:, np.newaxis] == neg_insts[np.newaxis, :]
+        return hist, inst
+
+    # How many debates either side of a conflicted debate `_assignment()` may
+    # move teams between
+    ASSIGNMENT_WINDOW = 3
+
+    def _conflicted_runs(self, affs, negs, history_penalty, institution_penalty):
+        """Returns a list of `(start, stop)` slices of a bracket covering every
+        debate with a conflict, and `ASSIGNMENT_WINDOW` debates either side of
+        it, merging slices that touch."""
+        history = self.options["team_history"]
+        runs = []
+        for i, (aff, neg) in enumerate(zip(affs, negs)):
+            if history is not None:
+                seen = history.get(aff.id, {}).get(neg.id, 0)
+            else:
+                seen = aff.seen(neg) if history_penalty else 0
+            same_inst = aff.institution is not None and aff.institution == neg.institution
+            if not (seen and history_penalty) and not (same_inst and institution_penalty):
+                continue
+            start, stop = max(i - self.ASSIGNMENT_WINDOW, 0), min(i + self.ASSIGNMENT_WINDOW + 1, len(affs))
+            if runs and start <= runs[-1][1]:
+                runs[-1] = (runs[-1][0], stop)
+            else:
+                runs.append((start, stop))
+        return runs
+
+    def _assignment(self, pairings):
+        """Reassigns the second team of each pairing within each bracket, by
+        solving an assignment problem whose costs are the conflict badness of
+        each possible pairing. A small cost proportional to how far each team
+        moves breaks ties, so that the draw is disturbed as little as possible.
+
+        Teams are only moved within runs of debates around conflicted debates
+        (see `_conflicted_runs()`), each of which is solved separately. In a
+        large bracket with few conflicts, this is much faster than solving one
+        assignment problem for the whole bracket. Since every swap that
+        one-up-one-down could make is within a run, the result is never worse
+        than that of one-up-one-down."""
+
+        history_penalty = self.options["history_penalty"] if self.options["avoid_history"] else 0
+        institution_penalty = self.options["institution_penalty"] if self.options["avoid_institution"] else 0
+
+        for bracket in pairings.values():
+            if len(bracket) < 2:
+                continue
+
+            affs = [pairing.teams[0] for pairing in bracket]
+            negs = [pairing.teams[1] for pairing in bracket]
+
+            for start, stop in self._conflicted_runs(affs, negs, history_penalty, institution_penalty):
+                hist, inst = self._conflict_matrices(affs[start:stop], negs[start:stop])
+                badness = hist * history_penalty + inst * institution_penalty
+
+                # The total distance penalty must be smaller than the smallest
+                # possible difference in badness, so that it only breaks ties.
+                # Squaring the distance prefers several short moves to a long one.
+                n = stop - start
+                distance = np.subtract.outer(np.arange(n), np.arange(n)) ** 2
+                epsilon = badness[badness > 0].min() * 1e-3 / (n ** 3)
+                rows, cols = linear_sum_assignment(badness + epsilon * distance)
+
+                for i, j in zip(rows.tolist(), cols.tolist()):
+                    if i == j:
+                        continue
+                    pairing = bracket[start + i]
+                    if hist[i, i] and history_penalty:
+                        pairing.add_flag("swap_hist")
+                    if inst[i, i] and institution_penalty:
+                        pairing.add_flag("swap_inst")
+                    if not ((hist[i, i] and history_penalty) or (inst[i, i] and institution_penalty)):
+                        pairing.add_flag("swap_other")
+                    pairing.teams = [affs[start + i], negs[start + j]]
+
 
 class PowerPairedWithAllocatedSidesDrawGenerator(PowerPairedDrawGenerator):
     """Power-paired draw with allocated sides.
@@ -418,6 +527,7 @@ class PowerPairedWithAllocatedSidesDrawGenerator(PowerPairedDrawGenerator):
         "pairing_method"        : "fold",
         "avoid_conflicts"       : None,
         "pullup_restriction"    : "none",
+        "team_history"          : None,
     }
 
     def __init__(self, *args, **kwargs):
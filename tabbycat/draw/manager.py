@@ -1,5 +1,6 @@
 import logging
 import random
+from collections import Counter
 
 from django.utils.translation import gettext as _
 
@@ -66,6 +67,14 @@ class BaseDrawManager:
     def get_generator_type(self):
         return self.generator_type
 
+    def get_options(self, teams):
+        options = dict()
+        for key in self.get_relevant_options():
+            options[key] = self.round.tournament.preferences[OPTIONS_TO_CONFIG_MAPPING[key]]
+        if options.get("side_allocations") == "manual-ballot":
+            options["side_allocations"] = "balance"
+        return options
+
     def get_teams(self):
         if self.active_only:
             return self.round.active_teams.all()
@@ -135,13 +144,8 @@ class BaseDrawManager:
 
         self.delete()
 
-        options = dict()
-        for key in self.get_relevant_options():
-            options[key] = self.round.tournament.preferences[OPTIONS_TO_CONFIG_MAPPING[key]]
-        if options.get("side_allocations") == "manual-ballot":
-            options["side_allocations"] = "balance"
-
         teams = self.get_teams()
+        options = self.get_options(teams)
         results = self.get_results()
         rrseq = self.get_rrseq()
 
@@ -190,6 +194,24 @@ class PowerPairedDrawManager(BaseDrawManager):
             options.extend(["pullup", "position_cost", "assignment_method", "renyi_order", "exponent"])
         return options
 
+    def get_options(self, teams):
+        options = super().get_options(teams)
+        if options.get("avoid_conflicts") == "assignment":
+            options["team_history"] = self._get_team_history(teams)
+        return options
+
+    def _get_team_history(self, teams):
+        """Returns a dict mapping team IDs to Counters of the IDs of the teams
+        they've faced before this round, using a single query."""
+        history = {team.id: Counter() for team in teams}
+        pairs = DebateTeam.objects.filter(
+            team__in=teams, debate__round__seq__lt=self.round.seq,
+        ).values_list('team_id', 'debate__debateteam__team_id')
+        for team_id, opponent_id in pairs:
+            if team_id != opponent_id:
+                history[team_id][opponent_id] += 1
+        return history
+
     def get_teams(self):
         """Get teams in ranked order."""
         teams = super().get_teams()
@@ -199,6 +221,8 @@ class PowerPairedDrawManager(BaseDrawManager):
 
         generator = TeamStandingsGenerator(metrics, ('rank', 'subrank'), tiebreak="random",
             extra_metrics=(pullup_metric,) if pullup_metric and pullup_metric not in metrics else ())
+        # Not cached: the draw must reflect every result confirmed so far, even
+        # if another process's standings cache hasn't caught up yet
         standings = generator.generate(teams, round=self.round.prev)
 
         ranked = []
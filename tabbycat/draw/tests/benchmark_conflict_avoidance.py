@@ -0,0 +1,101 @@
+"""Benchmarks the conflict avoidance methods of the power-paired draw generator
+on single large brackets. For each method and each bracket size (in debates),
+prints the wall time taken to avoid conflicts in the bracket, the number of
+calls to Team.seen() it made, and the number of history and institution
+conflicts left afterwards.
+
+Brackets of hundreds of debates occur in early rounds of large tournaments,
+where most teams are on the same number of wins. With real teams, every call
+to Team.seen() is a database query, so the "seen" column matters as much as
+the time. The assignment method is given the team history precomputed, as the
+draw manager does, so it makes no such calls.
+
+Like benchmark_generators, this doesn't interact with the database. Run it
+from the tabbycat directory, for example:
+    python -m draw.tests.benchmark_conflict_avoidance --debates 200 500 1000"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from draw.generator.pairing import Pairing
+from draw.generator.powerpair import PowerPairedDrawGenerator
+from draw.tests.benchmark_generators import make_teams
+
+DEFAULT_DEBATE_COUNTS = [50, 200, 500, 1000]
+METHODS = ["one_up_one_down", "assignment"]
+
+
+class CountingTeam:
+    """Wraps a TestTeam, counting calls to seen() in `counter`."""
+
+    def __init__(self, team, counter):
+        self.team = team
+        self.id = team.id
+        self.institution = team.institution
+        self.points = 0  # all in one bracket
+        self.counter = counter
+
+    def seen(self, other):
+        self.counter["seen"] += 1
+        return self.team.seen(other.team)
+
+
+def make_bracket(teams):
+    """Returns a list of pairings folding `teams` into a single bracket."""
+    half = len(teams) // 2
+    return [Pairing([teams[i], teams[-i-1]], 0, i + 1) for i in range(half)]
+
+
+def run_method(method, teams, repeats):
+    counter = Counter()
+    counting_teams = [CountingTeam(team, counter) for team in teams]
+    options = {"avoid_conflicts": method}
+    if method == "assignment":
+        options["team_history"] = {team.id: Counter(team.hist) for team in teams}
+    generator = PowerPairedDrawGenerator(counting_teams, **options)
+
+    times = []
+    for i in range(repeats):
+        bracket = make_bracket(counting_teams)
+        counter.clear()
+        start = time.perf_counter()
+        generator.avoid_conflicts({0: bracket})
+        times.append(time.perf_counter() - start)
+    seen = counter["seen"]
+
+    hist = sum(pairing.teams[0].team.seen(pairing.teams[1].team) > 0 for pairing in bracket)
+    inst = sum(pairing.teams[0].institution == pairing.teams[1].institution for pairing in bracket)
+    return {"time": min(times), "seen": seen, "hist": hist, "inst": inst}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--debates", type=int, nargs="+", default=DEFAULT_DEBATE_COUNTS,
+        help="Bracket sizes, in debates, to benchmark (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=3,
+        help="Number of previous rounds to simulate (default: %(default)s)")
+    parser.add_argument("--insts", type=float, default=0.2,
+        help="Number of institutions, as a fraction of the number of teams (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=5,
+        help="Number of timed runs per case; the fastest is reported (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None,
+        help="Random seed, for reproducible synthetic tournaments")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    print("{:<16s} {:>7s} {:>10s} {:>8s} {:>5s} {:>5s}".format("method", "debates", "time (ms)", "seen", "hist", "inst"))
+    for ndebates in args.debates:
+        nteams = 2 * ndebates
+        teams = make_teams(nteams, 2, args.rounds, max(int(nteams * args.insts), 1))
+        for method in METHODS:
+            result = run_method(method, teams, args.repeats)
+            print("{method:<16s} {ndebates:>7d} {time_ms:>10.2f} {seen:>8d} {hist:>5d} {inst:>5d}".format(
+                method=method, ndebates=ndebates, time_ms=result["time"] * 1000, **result))
+
+
+if __name__ == "__main__":
+    main()
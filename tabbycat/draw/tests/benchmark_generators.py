@@ -0,0 +1,309 @@
+"""Benchmarks the draw generators on synthetic tournaments. For each generator
+(and each combination of options) that DrawGenerator can return, and each team
+count, prints the wall time, peak memory allocated and a score describing the
+quality of the draw.
+
+The score columns are the number of history conflicts ("hist"), the number of
+institution conflicts ("inst") and, for BP, the total position cost of the draw
+under the generator's position cost settings ("poscost").
+
+This script does not interact with the database at all. Like the draw
+generator unit tests, it uses TestTeam objects, with points, side histories,
+institutions and team histories built by simulating random prior rounds.
+Round-robin draws aren't included, because DrawGenerator doesn't currently
+provide a round-robin generator.
+
+Run it from the tabbycat directory, for example:
+    python -m draw.tests.benchmark_generators --teams 16 64 256 --filter bp"""
+
+import argparse
+import itertools
+import os.path
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+tabbycat_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if tabbycat_dir not in sys.path:
+    sys.path.append(tabbycat_dir)
+del tabbycat_dir
+
+from django.conf import settings  # noqa: E402 (has to come after path modification above)
+
+if not settings.configured:
+    settings.configure(USE_I18N=False)  # so that error messages can be formatted
+
+from draw.generator import DrawGenerator  # noqa: E402
+from draw.generator.bphungarian import BPHungarianDrawGenerator  # noqa: E402
+from draw.generator.pairing import BPEliminationResultPairing, ResultPairing  # noqa: E402
+from draw.generator.powerpair import PowerPairedDrawGenerator, PowerPairedWithAllocatedSidesDrawGenerator  # noqa: E402
+from draw.tests.utils import TestTeam  # noqa: E402
+
+DEFAULT_TEAM_COUNTS = [16, 32, 64, 128, 256, 512, 1024]
+
+
+# ==============================================================================
+# Synthetic tournaments
+# ==============================================================================
+
+def make_teams(nteams, teams_per_debate, nrounds, ninsts, allocated_sides=False):
+    """Returns a list of `nteams` TestTeams, in descending order of points, as
+    if `nrounds` randomly drawn rounds had been held."""
+    insts = ["I%d" % i for i in range(ninsts)]
+    teams = [TestTeam(i, random.choice(insts), 0, side_history=[0] * teams_per_debate) for i in range(nteams)]
+
+    for r in range(nrounds):
+        order = random.sample(teams, nteams)
+        for debate in zip(*([iter(order)] * teams_per_debate)):
+            if teams_per_debate == 2:
+                results = random.sample([1, 0], 2)
+            else:
+                results = random.sample([3, 2, 1, 0], 4)
+            for pos, (team, points) in enumerate(zip(debate, results)):
+                team.points += points
+                team.side_history[pos] += 1
+                team.hist.extend(other.id for other in debate if other is not team)
+
+    if allocated_sides:
+        sides = ["aff", "neg"] * (nteams // 2)
+        random.shuffle(sides)
+        for team, side in zip(teams, sides):
+            team.allocated_side = side
+
+    teams.sort(key=lambda team: team.points, reverse=True)
+    return teams
+
+
+def make_results(pairings, result_pairing_class):
+    """Returns result pairings for the given (elimination) pairings, with
+    winners or advancing teams chosen at random."""
+    results = []
+    for pairing in pairings:
+        if result_pairing_class is ResultPairing:
+            result = ResultPairing(pairing.teams, pairing.bracket, pairing.room_rank,
+                    winner=random.choice(pairing.teams))
+        else:
+            result = BPEliminationResultPairing(pairing.teams, pairing.bracket, pairing.room_rank,
+                    advancing=random.sample(pairing.teams, 2))
+        results.append(result)
+    return results
+
+
+def largest_break(nteams, multiple):
+    """Returns the largest break size no greater than nteams of the form
+    multiple * 2^n."""
+    size = multiple
+    while size * 2 <= nteams:
+        size *= 2
+    return size
+
+
+# ==============================================================================
+# Cases
+# ==============================================================================
+
+class Case:
+    """A generator configuration to benchmark. `setup(nteams)` returns the
+    positional and keyword arguments to DrawGenerator, or None if the
+    configuration doesn't apply to that number of teams."""
+
+    def __init__(self, name, teams_per_debate, draw_type, options={}, allocated_sides=False, break_multiple=None):
+        self.name = name
+        self.teams_per_debate = teams_per_debate
+        self.draw_type = draw_type
+        self.options = options
+        self.allocated_sides = allocated_sides
+        self.break_multiple = break_multiple
+
+    def __str__(self):
+        options = ",".join("%s=%s" % item for item in self.options.items())
+        return "%s[%s]" % (self.name, options) if options else self.name
+
+    def setup(self, nteams, nrounds, ninsts):
+        tpd = 2 if self.teams_per_debate == "two" else 4
+        if nteams % tpd != 0:
+            return None
+        teams = make_teams(nteams, tpd, nrounds, ninsts, self.allocated_sides)
+
+        if self.break_multiple is None:
+            options = dict(self.options)
+            if options.get("avoid_conflicts") == "assignment":
+                # as precomputed by the draw manager
+                options["team_history"] = {team.id: Counter(team.hist) for team in teams}
+            return (self.teams_per_debate, self.draw_type, teams), options
+
+        breaking = teams[:largest_break(nteams, self.break_multiple)]
+        if self.draw_type in ("first_elimination", "partial_elimination"):
+            return (self.teams_per_debate, self.draw_type, breaking), dict(self.options)
+
+        # Subsequent elimination rounds take the results of a previous round
+        if self.teams_per_debate == "two":
+            prev = DrawGenerator("two", "first_elimination", breaking).generate()
+            results = make_results(prev, ResultPairing)
+        elif self.draw_type == "after_partial_elimination":
+            prev = DrawGenerator("bp", "partial_elimination", breaking).generate()
+            results = make_results(prev, BPEliminationResultPairing)
+        else:
+            prev = DrawGenerator("bp", "first_elimination", breaking).generate()
+            results = make_results(prev, BPEliminationResultPairing)
+            breaking = []
+        return (self.teams_per_debate, self.draw_type, breaking), dict(self.options, results=results)
+
+
+def all_cases(bp_backends):
+    cases = []
+
+    for avoid_conflicts in ["off", "on"]:
+        cases.append(Case("random", "two", "random", {"avoid_conflicts": avoid_conflicts}))
+    cases.append(Case("random-allocated", "two", "random", {"side_allocations": "preallocated"}, allocated_sides=True))
+
+    avoid_conflicts_options = ["off"] + list(PowerPairedDrawGenerator.AVOID_CONFLICT_FUNCTIONS.keys())
+    for odd_bracket, pairing_method, avoid_conflicts in itertools.product(
+            PowerPairedDrawGenerator.ODD_BRACKET_FUNCTIONS.keys(),
+            PowerPairedDrawGenerator.PAIRING_FUNCTIONS.keys(),
+            avoid_conflicts_options):
+        cases.append(Case("powerpair", "two", "power_paired", {"odd_bracket": odd_bracket,
+                "pairing_method": pairing_method, "avoid_conflicts": avoid_conflicts}))
+
+    # The other pairing methods are inherited, but don't support allocated sides,
+    # and conflict avoidance would swap teams between debates, ignoring sides
+    for odd_bracket, pairing_method in itertools.product(
+            PowerPairedWithAllocatedSidesDrawGenerator.ODD_BRACKET_FUNCTIONS.keys(),
+            ["fold", "slide", "random"]):
+        cases.append(Case("powerpair-allocated", "two", "power_paired", {"side_allocations": "preallocated",
+                "odd_bracket": odd_bracket, "pairing_method": pairing_method, "avoid_conflicts": "off"},
+                allocated_sides=True))
+
+    cases.append(Case("elimination-first", "two", "first_elimination", break_multiple=1))
+    cases.append(Case("elimination", "two", "elimination", break_multiple=2))
+
+    cases.append(Case("bp-random", "bp", "random"))
+
+    position_costs = [
+        {"position_cost": "simple"},
+        {"position_cost": "variance"},
+        {"position_cost": "entropy", "renyi_order": 1.0},
+        {"position_cost": "entropy", "renyi_order": 0.0},
+        {"position_cost": "entropy", "renyi_order": 2.0},
+    ]
+    for position_cost, pullup, method, backend in itertools.product(position_costs,
+            BPHungarianDrawGenerator.DEFINE_ROOM_FUNCTIONS.keys(),
+            BPHungarianDrawGenerator.ASSIGNMENT_ALGORITHM_FUNCTIONS.keys(), bp_backends):
+        cases.append(Case("bphungarian", "bp", "power_paired", dict(position_cost, pullup=pullup,
+                assignment_method=method, assignment_backend=backend)))
+
+    cases.append(Case("bp-elimination-partial", "bp", "partial_elimination", break_multiple=6))
+    cases.append(Case("bp-elimination-after-partial", "bp", "after_partial_elimination", break_multiple=6))
+    cases.append(Case("bp-elimination-first", "bp", "first_elimination", break_multiple=4))
+    cases.append(Case("bp-elimination", "bp", "elimination", break_multiple=4))
+
+    return cases
+
+
+# ==============================================================================
+# Scoring
+# ==============================================================================
+
+def score_draw(pairings, options):
+    """Returns a tuple `(hist, inst, poscost)` for the draw. `poscost` is None
+    for two-team draws."""
+    hist = 0
+    inst = 0
+    for pairing in pairings:
+        for team1, team2 in itertools.combinations(pairing.teams, 2):
+            hist += team1.seen(team2) > 0
+            inst += team1.institution == team2.institution
+
+    if len(pairings) == 0 or len(pairings[0].teams) != 4:
+        return hist, inst, None
+
+    generator_options = dict(BPHungarianDrawGenerator.DEFAULT_OPTIONS)
+    generator_options.update({k: v for k, v in options.items() if k in generator_options})
+    if generator_options["position_cost"] == "entropy":
+        cost = BPHungarianDrawGenerator.get_entropy_position_cost_function(generator_options["renyi_order"])
+    else:
+        cost = getattr(BPHungarianDrawGenerator, BPHungarianDrawGenerator.POSITION_COST_FUNCTIONS[generator_options["position_cost"]])
+    poscost = sum(cost(pos, team.side_history) ** generator_options["exponent"]
+                  for pairing in pairings for pos, team in enumerate(pairing.teams))
+    return hist, inst, poscost
+
+
+# ==============================================================================
+# Running
+# ==============================================================================
+
+def run_case(case, nteams, nrounds, ninsts, repeats):
+    """Returns a dict of results for the given case and team count, or None if
+    the case doesn't apply."""
+    times = []
+    for i in range(repeats):
+        setup = case.setup(nteams, nrounds, ninsts)
+        if setup is None:
+            return None
+        args, kwargs = setup
+        start = time.perf_counter()
+        pairings = DrawGenerator(*args, **kwargs).generate()
+        times.append(time.perf_counter() - start)
+
+    # Memory is measured in a separate run, since tracing slows allocations.
+    args, kwargs = case.setup(nteams, nrounds, ninsts)
+    tracemalloc.start()
+    DrawGenerator(*args, **kwargs).generate()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    hist, inst, poscost = score_draw(pairings, case.options)
+    return {"time": min(times), "peak": peak, "hist": hist, "inst": inst, "poscost": poscost}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, nargs="+", default=DEFAULT_TEAM_COUNTS,
+        help="Team counts to benchmark (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=5,
+        help="Number of previous rounds to simulate (default: %(default)s)")
+    parser.add_argument("--insts", type=float, default=0.2,
+        help="Number of institutions, as a fraction of the number of teams (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=1,
+        help="Number of timed runs per case; the fastest is reported (default: %(default)s)")
+    parser.add_argument("--filter", type=str, default=None,
+        help="Only run cases whose description contains this string")
+    parser.add_argument("--bp-backends", nargs="+", default=["scipy"],
+        choices=BPHungarianDrawGenerator.ASSIGNMENT_BACKEND_FUNCTIONS.keys(),
+        help="BP assignment backends to benchmark; munkres is slow on large draws (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None,
+        help="Random seed, for reproducible synthetic tournaments")
+    parser.add_argument("--csv", action="store_true", default=False,
+        help="Print comma-separated values instead of a table")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    cases = [case for case in all_cases(args.bp_backends) if args.filter is None or args.filter in str(case)]
+
+    if args.csv:
+        print("case,teams,time_s,peak_bytes,hist,inst,poscost")
+    else:
+        print("{:<100s} {:>5s} {:>10s} {:>10s} {:>5s} {:>5s} {:>12s}".format(
+            "case", "teams", "time (ms)", "peak (KiB)", "hist", "inst", "poscost"))
+
+    for case in cases:
+        for nteams in args.teams:
+            result = run_case(case, nteams, args.rounds, max(int(nteams * args.insts), 1), args.repeats)
+            if result is None:
+                continue
+            if args.csv:
+                print("{case},{nteams},{time:.6f},{peak},{hist},{inst},{poscost}".format(
+                    case=str(case).replace(",", ";"), nteams=nteams, **result))
+            else:
+                poscost = "" if result["poscost"] is None else "{:.1f}".format(result["poscost"])
+                print("{:<100s} {:>5d} {:>10.2f} {:>10.1f} {:>5d} {:>5d} {:>12s}".format(str(case), nteams,
+                    result["time"] * 1000, result["peak"] / 1024, result["hist"], result["inst"], poscost))
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
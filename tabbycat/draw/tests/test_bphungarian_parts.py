@@ -1,3 +1,5 @@
+import math
+import random
 import unittest
 
 from .utils import TestTeam
@@ -45,3 +47,107 @@ class TestDefineRooms(unittest.TestCase):
 
     def test_pullup_one_room(self):
         self._test_define_rooms("one_room", self.one_room)
+
+
+class TestCostMatrix(unittest.TestCase):
+    """Checks that the vectorized cost matrix agrees with the scalar position
+    cost functions, and that both assignment backends find optimal solutions."""
+
+    def setUp(self):
+        random.seed(2020)
+        self.teams = []
+        for i in range(48):
+            points = random.choice([0, 1, 2, 3, 3, 4, 5, 6])
+            history = [random.randint(0, 3) for _ in range(4)]
+            self.teams.append(TestTeam(i, 'ABCDEF'[i % 6], points=points, side_history=history))
+
+    def _reference_cost_matrix(self, generator, rooms):
+        cost = generator.get_position_cost_function()
+        exponent = generator.options["exponent"]
+        costs = []
+        for team in self.teams:
+            row = []
+            for level, allowed in rooms:
+                if team.points not in allowed:
+                    row.extend([math.inf] * 4)
+                else:
+                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
+            costs.append(row)
+        return costs
+
+    def test_cost_matrix(self):
+        for options in [{"position_cost": "simple"}, {"position_cost": "variance"},
+                        {"position_cost": "entropy", "renyi_order": 1.0},
+                        {"position_cost": "entropy", "renyi_order": 0.0},
+                        {"position_cost": "entropy", "renyi_order": 2.0},
+                        {"position_cost": "entropy", "renyi_order": 0.5, "exponent": 2.0}]:
+            with self.subTest(**options):
+                generator = BPHungarianDrawGenerator(self.teams, **options)
+                rooms = generator.define_rooms([team.points for team in self.teams])
+                costs = generator.generate_cost_matrix(rooms)
+                expected = self._reference_cost_matrix(generator, rooms)
+                self.assertEqual(costs.shape, (len(self.teams), len(self.teams)))
+                for row, expected_row in zip(costs.tolist(), expected):
+                    for actual, expected_cost in zip(row, expected_row):
+                        if math.isinf(expected_cost):
+                            self.assertTrue(math.isinf(actual))
+                        else:
+                            self.assertAlmostEqual(actual, expected_cost)
+
+    def test_custom_cost_function(self):
+        generator = BPHungarianDrawGenerator(self.teams, position_cost=lambda pos, history: history[pos] + pos)
+        rooms = generator.define_rooms([team.points for team in self.teams])
+        costs = generator.generate_cost_matrix(rooms)
+        self.assertEqual(costs.tolist(), self._reference_cost_matrix(generator, rooms))
+
+    def test_backend_parity(self):
+        for method in ["hungarian", "hungarian_preshuffled"]:
+            with self.subTest(method=method):
+                totals = []
+                for backend in ["munkres", "scipy"]:
+                    generator = BPHungarianDrawGenerator(self.teams, assignment_method=method,
+                            assignment_backend=backend)
+                    rooms = generator.define_rooms([team.points for team in self.teams])
+                    costs = generator.generate_cost_matrix(rooms)
+                    indices = generator.solve_assignment(costs)
+                    self.assertCountEqual([i for i, j in indices], range(len(self.teams)))
+                    self.assertCountEqual([j for i, j in indices], range(len(self.teams)))
+                    totals.append(sum(costs[i][j] for i, j in indices))
+                self.assertAlmostEqual(*totals)
+
+    def test_generate(self):
+        for backend in ["munkres", "scipy"]:
+            with self.subTest(backend=backend):
+                generator = BPHungarianDrawGenerator(self.teams, assignment_backend=backend)
+                pairings = generator.generate()
+                self.assertEqual(len(pairings), len(self.teams) // 4)
+                self.assertCountEqual([t for p in pairings for t in p.teams], self.teams)
+
+    def test_find_blocks(self):
+        generator = BPHungarianDrawGenerator(self.teams)
+        rooms = generator.define_rooms([team.points for team in self.teams])
+        costs = generator.generate_cost_matrix(rooms)
+        blocks = generator.find_blocks(costs)
+        self.assertGreater(len(blocks), 1)
+        self.assertCountEqual([i for rows, cols in blocks for i in rows], range(len(self.teams)))
+        self.assertCountEqual([j for rows, cols in blocks for j in cols], range(len(self.teams)))
+        for rows, cols in blocks:
+            # no team in this block is allowed in any position outside it
+            outside = [j for j in range(len(self.teams)) if j not in cols]
+            self.assertFalse(any(math.isfinite(costs[i][j]) for i in rows for j in outside))
+
+    def test_blocks_parity(self):
+        for backend in ["munkres", "scipy"]:
+            for processes in [1, 2]:
+                with self.subTest(backend=backend, processes=processes):
+                    totals = []
+                    for blocks in [False, True]:
+                        generator = BPHungarianDrawGenerator(self.teams, assignment_backend=backend,
+                                assignment_blocks=blocks, assignment_processes=processes)
+                        rooms = generator.define_rooms([team.points for team in self.teams])
+                        costs = generator.generate_cost_matrix(rooms)
+                        indices = generator.solve_assignment(costs)
+                        self.assertCountEqual([i for i, j in indices], range(len(self.teams)))
+                        self.assertCountEqual([j for i, j in indices], range(len(self.teams)))
+                        totals.append(sum(costs[i][j] for i, j in indices))
+                    self.assertAlmostEqual(*totals)
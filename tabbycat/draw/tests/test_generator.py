@@ -1,4 +1,5 @@
 import copy
+import random
 import unittest
 
 from collections import OrderedDict
@@ -336,6 +337,83 @@ class TestPowerPairedDrawGeneratorParts(unittest.TestCase):
                     ((4, 7), ["1u1d_hist"])]
         self.one_up_one_down(data, expected)
 
+    def assignment(self, data, expected, **options):
+        self.ppd.options["avoid_conflicts"] = "assignment"
+        self.one_up_one_down(data, expected, **options)
+
+    def test_assignment_no_swap(self):
+        data = (((1, 'A'), (5, 'B')),
+                ((2, 'C'), (6, 'A')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = self._1u1d_no_change(data)
+        self.assignment(data, expected)
+
+    def test_assignment_swap_institution(self):
+        data = (((1, 'A'), (5, 'A')),
+                ((2, 'C'), (6, 'B')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = [((1, 6), ["swap_inst"]),
+                    ((2, 5), ["swap_other"]),
+                    ((3, 7), []),
+                    ((4, 8), [])]
+        self.assignment(data, expected)
+
+    def test_assignment_no_swap_institution(self):
+        data = (((1, 'A'), (5, 'A')),
+                ((2, 'C'), (6, 'B')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        expected = self._1u1d_no_change(data)
+        self.assignment(data, expected, avoid_institution=False)
+
+    def test_assignment_swap_history(self):
+        data = (((1, 'A', None, 5), (5, 'B')),
+                ((2, 'C'), (6, 'A')),
+                ((3, 'B'), (7, 'D')),
+                ((4, 'C'), (8, 'A')))
+        # Unlike one-up-one-down, this avoids creating an institution conflict
+        expected = [((1, 7), ["swap_hist"]),
+                    ((2, 5), ["swap_other"]),
+                    ((3, 6), ["swap_other"]),
+                    ((4, 8), [])]
+        self.assignment(data, expected)
+        self.assignment(data, expected, team_history={1: {5: 1}})
+
+    def test_assignment_beyond_adjacent(self):
+        # One-up-one-down can only resolve the middle two conflicts here.
+        data = (((1, 'A'), (5, 'A')),
+                ((2, 'A'), (6, 'A')),
+                ((3, 'B'), (7, 'B')),
+                ((4, 'B'), (8, 'B')))
+        expected = [((1, 5), []),
+                    ((2, 7), ["1u1d_inst"]),
+                    ((3, 6), ["1u1d_inst"]),
+                    ((4, 8), [])]
+        self.one_up_one_down(data, expected)
+        expected = [((1, 7), ["swap_inst"]),
+                    ((2, 8), ["swap_inst"]),
+                    ((3, 5), ["swap_inst"]),
+                    ((4, 6), ["swap_inst"])]
+        self.assignment(data, expected)
+
+    def test_assignment_not_worse_than_one_up_one_down(self):
+        random.seed(1004)
+
+        def badness(pairings):
+            return sum(p.conflict_hist * 1e3 + p.conflict_inst for p in pairings)
+
+        for i in range(50):
+            teams = [TestTeam(j, random.choice('ABCDEF'), 0, random.sample(range(40), 4)) for j in range(40)]
+            results = []
+            for method in ["one_up_one_down", "assignment"]:
+                pairings = [Pairing([teams[j], teams[j+20]], None, None) for j in range(20)]
+                self.ppd.options["avoid_conflicts"] = method
+                self.ppd.avoid_conflicts({0: pairings})
+                results.append(badness(pairings))
+            self.assertLessEqual(results[1], results[0])
+
 
 class TestPowerPairedDrawGenerator(unittest.TestCase):
     """Test the entire draw functions as a black box."""
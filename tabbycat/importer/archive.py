@@ -1,14 +1,23 @@
-from xml.etree.ElementTree import Element, SubElement
-
-from django.core.exceptions import ObjectDoesNotExist
+import zlib
+from ast import literal_eval
+from collections import Counter, defaultdict
+from math import isclose
+from statistics import mean
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import quoteattr
+
+from django.db import transaction
 from django.db.models import Prefetch, Q
 from django.utils.text import slugify
 
-from adjallocation.models import AdjudicatorAdjudicatorConflict, DebateAdjudicator
+from adjallocation.allocation import AdjudicatorAllocation
+from adjallocation.models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
+                                  AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+from adjallocation.snapshot import invalidate_snapshots
 from adjfeedback.models import AdjudicatorFeedback, AdjudicatorFeedbackQuestion
 from breakqual.models import BreakCategory
 from draw.models import Debate, DebateTeam
-from motions.models import DebateTeamMotionPreference, Motion
+from motions.models import DebateTeamMotionPreference, Motion, RoundMotion
 from options.presets import (AustralianEastersPreferences, AustralsPreferences, BritishParliamentaryPreferences,
                              CanadianParliamentaryPreferences, JoyntPreferences, NZEastersPreferences, save_presets,
                              UADCPreferences, WADLPreferences, WSDCPreferences)
@@ -17,9 +26,14 @@ from participants.models import Adjudicator, Institution, Region, Speaker, Speak
 from results.models import BallotSubmission, Submission
 from results.prefetch import populate_confirmed_ballots, populate_wins
 from results.result import DebateResult
+from standings.cache import invalidate_standings
+from standings.records import rebuild_tournament_records
+from standings.teams import TeamStandingsGenerator
 from tournaments.models import Round, Tournament
 from venues.models import Venue
 
+from .importers.base import BULK_BATCH_SIZE, bulk_create
+
 
 # As ID/IDREF(S) must be unique to the whole document, prefix IDs
 ADJ_PREFIX = "A"
@@ -35,40 +49,94 @@ QUESTION_PREFIX = "Q"
 
 
 class Exporter:
+    """Exports a tournament to an XML archive.
+
+    The archive is generated as a stream of events, each a 2-tuple
+    `(event, element)`: "start" and "end" events open and close container
+    elements like `<round>`, whose children are generated between them, and
+    "element" events give complete elements. `iter_xml()` serializes these
+    incrementally, so that only one element needs to be in memory at a time;
+    `create_all()` builds the whole tree instead. Debates and participants are
+    fetched in chunks of `chunk_size`, each using a fixed number of queries."""
+
+    chunk_size = 200
 
     def __init__(self, tournament):
         self.t = tournament
         self.root = Element('tournament', {'name': tournament.name, 'short': tournament.short_name})
 
     def create_all(self):
-        self.add_rounds()
-        self.add_participants()
-        self.add_break_categories()
-        self.add_institutions()
-        self.add_motions()
-        self.add_venues()
-        self.add_questions()
+        stack = []
+        for event, element in self.iter_events():
+            if event == 'start':
+                if stack:
+                    stack[-1].append(element)
+                stack.append(element)
+            elif event == 'end':
+                stack.pop()
+            else:
+                stack[-1].append(element)
 
         return self.root
 
-    def add_rounds(self):
-        results_prefetch = Prefetch('ballotsubmission_set', queryset=BallotSubmission.objects.filter(confirmed=True).prefetch_related(
-            'speakerscore_set', 'speakerscorebyadj_set', 'teamscore_set'))
+    def iter_xml(self, buffer_size=65536):
+        """Generates the archive as UTF-8-encoded chunks of bytes, each (except
+        possibly the last) at least `buffer_size` bytes long."""
+        buffer = ['<?xml version="1.0" encoding="utf-8"?>\n']
+        length = 0
+        for event, element in self.iter_events():
+            if event == 'start':
+                attrs = "".join(" %s=%s" % (key, quoteattr(value)) for key, value in element.items())
+                chunk = "<%s%s>" % (element.tag, attrs)
+            elif event == 'end':
+                chunk = "</%s>" % element.tag
+            else:
+                chunk = tostring(element, encoding='unicode')
+            buffer.append(chunk)
+            length += len(chunk)
+            if length >= buffer_size:
+                yield "".join(buffer).encode('utf-8')
+                buffer = []
+                length = 0
+        yield "".join(buffer).encode('utf-8')
+
+    def iter_gzip(self, buffer_size=65536):
+        """Like `iter_xml()`, but gzip-compressed."""
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in self.iter_xml(buffer_size):
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def iter_events(self):
+        yield 'start', self.root
+        yield from self.iter_rounds()
+        yield from self.iter_participants()
+        yield from self.iter_break_categories()
+        yield from self.iter_institutions()
+        yield from self.iter_motions()
+        yield from self.iter_venues()
+        yield from self.iter_questions()
+        yield 'end', self.root
+
+    def iter_chunks(self, queryset):
+        """Yields lists of instances in `queryset`, in order, fetching
+        `chunk_size` instances (with any prefetches) at a time."""
+        ids = list(queryset.values_list('id', flat=True))
+        for start in range(0, len(ids), self.chunk_size):
+            yield list(queryset.filter(id__in=ids[start:start + self.chunk_size]))
+
+    def iter_rounds(self):
         veto_prefetch = Prefetch('debateteammotionpreference_set', queryset=DebateTeamMotionPreference.objects.filter(
             preference=3, ballot_submission__confirmed=True,
         ))
         dt_prefetch = Prefetch('debateteam_set', queryset=DebateTeam.objects.all().select_related(
             'team', 'team__institution',
         ).prefetch_related(veto_prefetch))
-        debate_prefetch = Prefetch('debate_set', queryset=Debate.objects.all().prefetch_related(
-            'debateadjudicator_set', dt_prefetch, results_prefetch,
-        ))
-
-        for round in self.t.round_set.all().prefetch_related(debate_prefetch, 'motion_set').order_by('seq'):
-            populate_confirmed_ballots(round.debate_set.all(), motions=True, results=True)
-            populate_wins(round.debate_set.all())
 
-            round_tag = SubElement(self.root, 'round', {
+        for round in self.t.round_set.all().prefetch_related('motion_set').order_by('seq'):
+            round_tag = Element('round', {
                 'name': round.name,
                 'abbreviation': round.abbreviation,
                 'elimination': str(round.stage == Round.STAGE_ELIMINATION).lower(),
@@ -81,23 +149,32 @@ class Exporter:
             if round.starts_at is not None and round.starts_at != "":
                 round_tag.set('start', str(round.starts_at))
 
+            yield 'start', round_tag
+
             motion = round.motion_set.first()
+            debates = round.debate_set.all().order_by('id').prefetch_related('debateadjudicator_set', dt_prefetch)
+            for chunk in self.iter_chunks(debates):
+                populate_confirmed_ballots(chunk, motions=True, results=True)
+                populate_wins(chunk)
+                for debate in chunk:
+                    yield 'element', self.debate_element(motion, debate)
 
-            for debate in round.debate_set.all():
-                self.add_debates(round_tag, motion, debate)
+            yield 'end', round_tag
 
-    def add_debates(self, round_tag, motion, debate):
-        debate_tag = SubElement(round_tag, 'debate', {
+    def debate_element(self, motion, debate):
+        debate_tag = Element('debate', {
             'id': DEBATE_PREFIX + str(debate.id),
         })
 
         # Add list of motions as attribute
-        adjs = " ".join([ADJ_PREFIX + str(d_adj.adjudicator_id) for d_adj in debate.debateadjudicator_set.all()])
+        debateadjs = debate.debateadjudicator_set.all()
+        adjs = " ".join([ADJ_PREFIX + str(d_adj.adjudicator_id) for d_adj in debateadjs])
         if adjs != "":
             debate_tag.set('adjudicators', adjs)
 
-            chair = debate.debateadjudicator_set.get(type=DebateAdjudicator.TYPE_CHAIR).adjudicator_id
-            debate_tag.set('chair', ADJ_PREFIX + str(chair))
+            chair = next((d_adj.adjudicator_id for d_adj in debateadjs if d_adj.type == DebateAdjudicator.TYPE_CHAIR), None)
+            if chair is not None:
+                debate_tag.set('chair', ADJ_PREFIX + str(chair))
 
         # Venue
         if debate.venue_id is not None:
@@ -110,16 +187,16 @@ class Exporter:
             debate_tag.set('motion', MOTION_PREFIX + str(motion.id))
 
         if debate.confirmed_ballot is not None:
-            result = DebateResult(debate.confirmed_ballot, tournament=self.t)
+            result = debate.confirmed_ballot.result
 
             for side in self.t.sides:
                 side_tag = SubElement(debate_tag, 'side', {
                     'team': TEAM_PREFIX + str(debate.get_team(side).id),
                 })
 
-                dt = debate.get_dt(side)
-                if dt.debateteammotionpreference_set.exists():
-                    side_tag.set('motion-veto', MOTION_PREFIX + str(dt.debateteammotionpreference_set.first().motion_id))
+                vetoes = debate.get_dt(side).debateteammotionpreference_set.all()
+                if vetoes:
+                    side_tag.set('motion-veto', MOTION_PREFIX + str(vetoes[0].motion_id))
 
                 if result.is_voting:
                     for (adj, scoresheet) in result.scoresheets.items():
@@ -142,7 +219,9 @@ class Exporter:
                     )
 
                 if result.uses_speakers:
-                    self.add_speakers(side_tag, debate, result, side)
+                    self.add_speakers(side_tag, adjs, result, side)
+
+        return debate_tag
 
     def add_team_ballots(self, side_tag, result, adj, scoresheet, side):
         ballot_tag = SubElement(side_tag, 'ballot')
@@ -169,14 +248,14 @@ class Exporter:
         else:
             ballot_tag.text = str(side in scoresheet.get_winner())
 
-    def add_speakers(self, side_tag, debate, result, side):
+    def add_speakers(self, side_tag, adjs, result, side):
         for pos in self.t.positions:
             speaker = result.get_speaker(side, pos)
 
             if speaker is not None:
                 speech_tag = SubElement(side_tag, 'speech', {
-                    'speaker': SPEAKER_PREFIX + str(result.get_speaker(side, pos).id),
-                    'reply': str(pos > self.t.pref('substantive_speakers')),
+                    'speaker': SPEAKER_PREFIX + str(speaker.id),
+                    'reply': str(pos > self.t.pref('substantive_speakers')).lower(),
                 })
 
                 if result.is_voting:
@@ -187,101 +266,137 @@ class Exporter:
                         ballot_tag.text = str(scoresheet.get_score(side, pos))
                 else:
                     ballot_tag = SubElement(speech_tag, 'ballot', {
-                        'adjudicators': " ".join([ADJ_PREFIX + str(d_adj.adjudicator_id) for d_adj in debate.debateadjudicator_set.all()]),
+                        'adjudicators': adjs,
                     })
                     ballot_tag.text = str(result.scoresheet.get_score(side, pos))
 
-    def add_participants(self):
-        participants_tag = SubElement(self.root, 'participants')
+    def iter_participants(self):
+        participants_tag = Element('participants')
+        yield 'start', participants_tag
 
         speaker_category_prefetch = Prefetch('speaker_set', queryset=Speaker.objects.all().prefetch_related('categories'))
-        for team in self.t.team_set.all().prefetch_related(speaker_category_prefetch, 'break_categories'):
-            team_tag = SubElement(participants_tag, 'team', {
-                'name': team.long_name,
-                'code': team.code_name,
-                'id': TEAM_PREFIX + str(team.id),
-            })
-
-            team_tag.set('break-eligibilities', " ".join([BREAK_CATEGORY_PREFIX + str(bc.id) for bc in team.break_categories.all()]))
+        teams = self.t.team_set.all().order_by('id').prefetch_related(speaker_category_prefetch, 'break_categories')
+        for chunk in self.iter_chunks(teams):
+            for team in chunk:
+                yield 'element', self.team_element(team)
+
+        questions = list(self.t.adjudicatorfeedbackquestion_set.all())
+        feedback_prefetch = Prefetch('adjudicatorfeedback_set', queryset=AdjudicatorFeedback.objects.filter(
+            confirmed=True).select_related('source_adjudicator', 'source_team'))
+        adjs = self.t.relevant_adjudicators.order_by('id').prefetch_related(feedback_prefetch)
+        for chunk in self.iter_chunks(adjs):
+            answers = self.get_feedback_answers(chunk, questions)
+            for adj in chunk:
+                yield 'element', self.adjudicator_element(adj, questions, answers)
+
+        yield 'end', participants_tag
+
+    def team_element(self, team):
+        team_tag = Element('team', {
+            'name': team.long_name,
+            'code': team.code_name,
+            'id': TEAM_PREFIX + str(team.id),
+        })
 
-            for speaker in team.speaker_set.all():
-                speaker_tag = SubElement(team_tag, 'speaker', {
-                    'id': SPEAKER_PREFIX + str(speaker.id),
-                })
-                speaker_tag.text = speaker.name
+        team_tag.set('break-eligibilities', " ".join([BREAK_CATEGORY_PREFIX + str(bc.id) for bc in team.break_categories.all()]))
 
-                if team.institution is not None:
-                    speaker_tag.set('institutions', INST_PREFIX + str(team.institution_id))
+        for speaker in team.speaker_set.all():
+            speaker_tag = SubElement(team_tag, 'speaker', {
+                'id': SPEAKER_PREFIX + str(speaker.id),
+            })
+            speaker_tag.text = speaker.name
+
+            if team.institution_id is not None:
+                speaker_tag.set('institutions', INST_PREFIX + str(team.institution_id))
+
+            if speaker.gender != "":
+                speaker_tag.set('gender', speaker.gender)
+
+            speaker_tag.set('categories', " ".join([SPEAKER_CATEGORY_PREFIX + str(sc.id) for sc in speaker.categories.all()]))
+
+        return team_tag
+
+    @staticmethod
+    def get_feedback_answers(adjs, questions):
+        """Returns a dict mapping (feedback ID, question ID) to the answer, for
+        all confirmed feedback on the given adjudicators, using one query for
+        each type of answer."""
+        feedback_ids = [feedback.id for adj in adjs for feedback in adj.adjudicatorfeedback_set.all()]
+        question_ids_by_class = {}
+        for question in questions:
+            answer_class = AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES[question.answer_type]
+            question_ids_by_class.setdefault(answer_class, []).append(question.id)
+
+        answers = {}
+        for answer_class, question_ids in question_ids_by_class.items():
+            for answer in answer_class.objects.filter(feedback_id__in=feedback_ids, question_id__in=question_ids):
+                answers[(answer.feedback_id, answer.question_id)] = answer
+        return answers
+
+    def adjudicator_element(self, adj, questions, answers):
+        adj_tag = Element('adjudicator', {
+            'id': ADJ_PREFIX + str(adj.id),
+            'name': adj.name,
+            'core': str(adj.adj_core).lower(),
+            'independent': str(adj.independent).lower(),
+            'score': str(adj.base_score),
+        })
 
-                if speaker.gender != "":
-                    speaker_tag.set('gender', speaker.gender)
+        if adj.institution_id is not None:
+            adj_tag.set('institutions', INST_PREFIX + str(adj.institution_id))
 
-                speaker_tag.set('categories', " ".join([SPEAKER_CATEGORY_PREFIX + str(sc.id) for sc in speaker.categories.all()]))
+        if adj.gender != "":
+            adj_tag.set('gender', adj.gender)
 
-        for adj in self.t.relevant_adjudicators.prefetch_related('adjudicatorfeedback_set'):
-            adj_tag = SubElement(participants_tag, 'adjudicator', {
-                'id': ADJ_PREFIX + str(adj.id),
-                'name': adj.name,
-                'core': str(adj.adj_core).lower(),
-                'independent': str(adj.independent).lower(),
-                'score': str(adj.base_score),
+        for feedback in adj.adjudicatorfeedback_set.all():
+            feedback_tag = SubElement(adj_tag, 'feedback', {
+                'score': str(feedback.score),
             })
+            if feedback.source_adjudicator is not None:
+                feedback_tag.set('source-adjudicator', ADJ_PREFIX + str(feedback.source_adjudicator.adjudicator_id))
+                feedback_tag.set('debate', DEBATE_PREFIX + str(feedback.source_adjudicator.debate_id))
+            else:
+                feedback_tag.set('source-team', TEAM_PREFIX + str(feedback.source_team.team_id))
+                feedback_tag.set('debate', DEBATE_PREFIX + str(feedback.source_team.debate_id))
 
-            if adj.institution is not None:
-                adj_tag.set('institutions', INST_PREFIX + str(adj.institution_id))
-
-            if adj.gender != "":
-                adj_tag.set('gender', adj.gender)
+            for question in questions:
+                answer = answers.get((feedback.id, question.id))
+                if answer is None:
+                    continue
 
-            for feedback in adj.adjudicatorfeedback_set.filter(confirmed=True):
-                feedback_tag = SubElement(adj_tag, 'feedback', {
-                    'score': str(feedback.score),
+                answer_tag = SubElement(feedback_tag, 'answer', {
+                    'question': QUESTION_PREFIX + str(answer.question_id),
                 })
-                if feedback.source_adjudicator is not None:
-                    feedback_tag.set('source-adjudicator', ADJ_PREFIX + str(feedback.source_adjudicator.adjudicator_id))
-                    feedback_tag.set('debate', DEBATE_PREFIX + str(feedback.source_adjudicator.debate_id))
-                else:
-                    feedback_tag.set('source-team', TEAM_PREFIX + str(feedback.source_team.team_id))
-                    feedback_tag.set('debate', DEBATE_PREFIX + str(feedback.source_team.debate_id))
-
-                for question in self.t.adjudicatorfeedbackquestion_set.all():
-                    try:
-                        answer = AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES[question.answer_type].objects.get(
-                            feedback=feedback,
-                            question=question,
-                        )
-                    except ObjectDoesNotExist:
-                        continue
+                answer_tag.text = str(answer.answer)
 
-                    answer_tag = SubElement(feedback_tag, 'answer', {
-                        'question': QUESTION_PREFIX + str(answer.question_id),
-                    })
-                    answer_tag.text = str(answer.answer)
+        return adj_tag
 
-    def add_break_categories(self):
+    def iter_break_categories(self):
         speaker_categories = self.t.speakercategory_set.all().order_by('seq')
 
         for category in speaker_categories:
-            sc_tag = SubElement(self.root, 'speaker-category', {
+            sc_tag = Element('speaker-category', {
                 'id': SPEAKER_CATEGORY_PREFIX + str(category.id),
             })
             sc_tag.text = category.name
+            yield 'element', sc_tag
 
         break_categories = self.t.breakcategory_set.all().order_by('seq')
 
         for category in break_categories:
-            bc_tag = SubElement(self.root, 'break-category', {
+            bc_tag = Element('break-category', {
                 'id': BREAK_CATEGORY_PREFIX + str(category.id),
             })
             bc_tag.text = category.name
+            yield 'element', bc_tag
 
-    def add_institutions(self):
+    def iter_institutions(self):
         institution_query = Institution.objects.filter(
             Q(id__in=self.t.relevant_adjudicators.values_list('institution_id')) |
             Q(id__in=self.t.team_set.all().values_list('institution_id')),
         ).select_related('region')
         for institution in institution_query:
-            institution_tag = SubElement(self.root, 'institution', {
+            institution_tag = Element('institution', {
                 'id': INST_PREFIX + str(institution.id),
                 'reference': institution.code,
             })
@@ -290,9 +405,11 @@ class Exporter:
             if institution.region is not None:
                 institution_tag.set('region', institution.region.name)
 
-    def add_motions(self):
-        for motion in Motion.objects.filter(round__tournament=self.t):
-            motion_tag = SubElement(self.root, 'motion', {
+            yield 'element', institution_tag
+
+    def iter_motions(self):
+        for motion in Motion.objects.filter(tournament=self.t):
+            motion_tag = Element('motion', {
                 'id': MOTION_PREFIX + str(motion.id),
                 'reference': motion.reference,
             })
@@ -302,17 +419,19 @@ class Exporter:
                 info_slide.text = motion.info_slide
 
             motion_tag.text = motion.text
+            yield 'element', motion_tag
 
-    def add_venues(self):
+    def iter_venues(self):
         for venue in self.t.relevant_venues:
-            venue_tag = SubElement(self.root, 'venue', {
+            venue_tag = Element('venue', {
                 'id': VENUE_PREFIX + str(venue.id),
             })
             venue_tag.text = venue.name
+            yield 'element', venue_tag
 
-    def add_questions(self):
+    def iter_questions(self):
         for question in self.t.adjudicatorfeedbackquestion_set.all():
-            question_tag = SubElement(self.root, 'question', {
+            question_tag = Element('question', {
                 'id': QUESTION_PREFIX + str(question.id),
                 'name': question.name,
                 'from-teams': str(question.from_team).lower(),
@@ -320,6 +439,7 @@ class Exporter:
                 'type': question.answer_type,
             })
             question_tag.text = question.text
+            yield 'element', question_tag
 
 
 class Importer:
@@ -328,18 +448,7 @@ class Importer:
         self.root = tournament
 
     def import_tournament(self):
-        self.tournament = Tournament(name=self.root.get('name'))
-
-        if self.root.get('short') is not None:
-            self.tournament.short_name = self.root.get('short')
-            self.tournament.slug = slugify(self.root.get('short'))
-        else:
-            self.tournament.short_name = self.root.get('name')[:25]
-            self.tournament.slug = slugify(self.root.get('name')[:50])
-        self.tournament.save()
-
-        self.is_bp = self.root.get('style') == 'bp' or (
-            self.root.find('round/debate') is not None and len(self.root.find('round/debate').findall('side')) == 4)
+        self.create_tournament()
 
         # Import all the separate parts
         self.set_preferences()
@@ -355,6 +464,20 @@ class Importer:
         self.import_results()
         self.import_feedback()
 
+    def create_tournament(self):
+        self.tournament = Tournament(name=self.root.get('name'))
+
+        if self.root.get('short') is not None:
+            self.tournament.short_name = self.root.get('short')
+            self.tournament.slug = slugify(self.root.get('short'))
+        else:
+            self.tournament.short_name = self.root.get('name')[:25]
+            self.tournament.slug = slugify(self.root.get('name')[:50])
+        self.tournament.save()
+
+        self.is_bp = self.root.get('style') == 'bp' or (
+            self.root.find('round/debate') is not None and len(self.root.find('round/debate').findall('side')) == 4)
+
     def _is_consensus_ballot(self, elimination):
         xpath = "round[@elimination='" + elimination + "']/debate/side"
         return len(self.root.findall(xpath + "/ballot")) == len(self.root.findall(xpath))
@@ -467,35 +590,9 @@ class Importer:
     def import_teams(self):
         self.teams = {}
         for team in self.root.find('participants').findall('team'):
-            team_obj = Team(tournament=self.tournament, long_name=team.get('name'))
-            self.teams[team.get('id')] = team_obj
-
-            # Get emoji & code name
-            if 'code' in team.attrib:
-                team_obj.code_name = team.get('code')
-            emoji = EMOJI_BY_NAME.get(team.get('code'))
-            if emoji is not None:
-                team_obj.emoji = emoji
-
-            # Find institution from speakers - Get first institution from each speaker to compare
-            p_institutions = [p.get('institutions', '').split(" ") for p in team.findall('speaker')]
-            p_inst = set([i[0] for i in p_institutions])
-            team_institution = next(iter(p_inst)) if len(p_inst) == 1 else None
-            institutions = set([i for s in p_institutions for i in s])
-
-            if team_institution:  # Both None and ""
-                team_obj.institution = self.institutions.get(team_institution)
-
-            # Remove institution from team name
-            if team_obj.institution is not None and team_obj.long_name.startswith(team_obj.institution.name + " "):
-                team_obj.reference = team_obj.long_name[len(team_obj.institution.name) + 1:]
-                team_obj.short_name = team_obj.institution.code + " " + team_obj.reference
-                team_obj.use_institution_prefix = True
-            else:
-                team_obj.reference = team_obj.long_name
-                team_obj.short_name = team_obj.reference[:50]
-            team_obj.short_reference = team_obj.reference[:35]
+            team_obj, institutions = self.make_team(team)
             team_obj.save()
+            self.teams[team.get('id')] = team_obj
 
             # Institution conflicts
             team_obj.institution_conflicts.set([self.institutions.get(i) for i in institutions if i != ""])
@@ -503,6 +600,38 @@ class Importer:
             # Break eligibilities
             team_obj.break_categories.set([self.team_breaks[bc] for bc in team.get('break-eligibilities', "").split() if bc != ""])
 
+    def make_team(self, team):
+        """Returns an unsaved Team for the given element, and the set of XML IDs
+        of its speakers' institutions."""
+        team_obj = Team(tournament=self.tournament, long_name=team.get('name'))
+
+        # Get emoji & code name
+        if 'code' in team.attrib:
+            team_obj.code_name = team.get('code')
+        emoji = EMOJI_BY_NAME.get(team.get('code'))
+        if emoji is not None:
+            team_obj.emoji = emoji
+
+        # Find institution from speakers - Get first institution from each speaker to compare
+        p_institutions = [p.get('institutions', '').split(" ") for p in team.findall('speaker')]
+        p_inst = set([i[0] for i in p_institutions])
+        team_institution = next(iter(p_inst)) if len(p_inst) == 1 else None
+        institutions = set([i for s in p_institutions for i in s])
+
+        if team_institution:  # Both None and ""
+            team_obj.institution = self.institutions.get(team_institution)
+
+        # Remove institution from team name
+        if team_obj.institution is not None and team_obj.long_name.startswith(team_obj.institution.name + " "):
+            team_obj.reference = team_obj.long_name[len(team_obj.institution.name) + 1:]
+            team_obj.short_name = team_obj.institution.code + " " + team_obj.reference
+            team_obj.use_institution_prefix = True
+        else:
+            team_obj.reference = team_obj.long_name
+            team_obj.short_name = team_obj.reference[:50]
+        team_obj.short_reference = team_obj.reference[:35]
+        return team_obj, institutions
+
     def import_speakers(self):
         self.speakers = {}
 
@@ -537,6 +666,7 @@ class Importer:
         AdjudicatorAdjudicatorConflict.objects.bulk_create([
             AdjudicatorAdjudicatorConflict(adjudicator1=adj1, adjudicator2=self.adjudicators[adj2]) for adj1, adj2 in adj_adj_conflicts
         ])
+        invalidate_snapshots(AdjudicatorAdjudicatorConflict)
 
     def _get_voting_adjs(self, debate):
         voting_adjs = set()
@@ -549,25 +679,8 @@ class Importer:
         self.debateteams = {}
         self.debateadjudicators = {}
 
-        rounds = []
         for i, round in enumerate(self.root.findall('round'), 1):
-            round_stage = Round.STAGE_ELIMINATION if round.get('elimination', 'false') == 'true' else Round.STAGE_PRELIMINARY
-            draw_type = Round.DRAW_ELIMINATION if round_stage == Round.STAGE_ELIMINATION else Round.DRAW_MANUAL
-
-            round_obj = Round(
-                tournament=self.tournament, seq=i, completed=True, name=round.get('name'),
-                abbreviation=round.get('abbreviation', round.get('name')[:10]), stage=round_stage, draw_type=draw_type,
-                draw_status=Round.STATUS_RELEASED, feedback_weight=round.get('feedback-weight', 0),
-                starts_at=round.get('start'))
-            rounds.append(round_obj)
-
-            if round.find('debate') is None:
-                round_obj.completed = False
-                if round.find('debate/side/ballot') is None:
-                    round_obj.draw_status = Round.STATUS_NONE
-
-            if round_stage == Round.STAGE_ELIMINATION:
-                round_obj.break_category = self.team_breaks.get(round.get('break-category'))
+            round_obj = self.make_round(i, round)
             round_obj.save()
 
             side_start = 2 if self.is_bp else 0
@@ -594,6 +707,26 @@ class Importer:
                     adj_obj.save()
                     self.debateadjudicators[(debate.get('id'), adj)] = adj_obj
 
+    def make_round(self, seq, round):
+        """Returns an unsaved Round for the given element."""
+        round_stage = Round.STAGE_ELIMINATION if round.get('elimination', 'false') == 'true' else Round.STAGE_PRELIMINARY
+        draw_type = Round.DRAW_ELIMINATION if round_stage == Round.STAGE_ELIMINATION else Round.DRAW_MANUAL
+
+        round_obj = Round(
+            tournament=self.tournament, seq=seq, completed=True, name=round.get('name'),
+            abbreviation=round.get('abbreviation', round.get('name')[:10]), stage=round_stage, draw_type=draw_type,
+            draw_status=Round.STATUS_RELEASED, feedback_weight=round.get('feedback-weight', 0),
+            starts_at=round.get('start'))
+
+        if round.find('debate') is None:
+            round_obj.completed = False
+            if round.find('debate/side/ballot') is None:
+                round_obj.draw_status = Round.STATUS_NONE
+
+        if round_stage == Round.STAGE_ELIMINATION:
+            round_obj.break_category = self.team_breaks.get(round.get('break-category'))
+        return round_obj
+
     def import_motions(self):
         # Can cause data consistency problems if motions are re-used between rounds: See #645
         self.motions = {}
@@ -659,6 +792,8 @@ class Importer:
                                     dr.add_winner(adj, side_code)
                 dr.save()
 
+        invalidate_standings(self.tournament.id)
+
     def import_feedback(self):
         for adj in self.root.findall('participants/adjudicator'):
             adj_obj = self.adjudicators[adj.get('id')]
@@ -680,3 +815,431 @@ class Importer:
 
                     answer = AdjudicatorFeedbackQuestion.ANSWER_TYPE_CLASSES[question.answer_type](
                         question=question, answer=cast_answer, feedback=feedback_obj)
+
+    def get_archive_standings(self):
+        """Returns a dict mapping the XML ID of each team to a dict with the
+        team's "points" and "speaks_sum" in preliminary rounds, as recorded in
+        the archive. "speaks_sum" is None if the archive has no team scores."""
+        nsides = 4 if self.is_bp else 2
+        standings = {team.get('id'): {'points': 0, 'speaks_sum': None}
+                     for team in self.root.findall('participants/team')}
+
+        for side in self.root.findall("round[@elimination='false']/debate/side"):
+            # Minority ballots don't count towards the decision, and ignored
+            # ones don't count towards the team score
+            ballots = [ballot for ballot in side.findall('ballot') if ballot.get('minority') != 'true']
+            if not ballots:
+                continue
+            metrics = standings[side.get('team')]
+            metrics['points'] += nsides - int(ballots[0].get('rank'))
+
+            try:
+                score = mean(float(ballot.text) for ballot in side.findall('ballot') if ballot.get('ignored') != 'true')
+            except ValueError:
+                continue  # results without scores
+            metrics['speaks_sum'] = (metrics['speaks_sum'] or 0) + score
+
+        return standings
+
+    def verify_standings(self):
+        """Compares the team standings of the imported tournament with those
+        recorded in the archive. Returns a list of strings describing each
+        discrepancy; the list is empty if the standings match."""
+        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ())
+        standings = generator.generate(self.tournament.team_set.all())
+
+        discrepancies = []
+        for team_id, expected in self.get_archive_standings().items():
+            team = self.teams[team_id]
+            metrics = standings.get_standing(team).metrics
+            for key, value in expected.items():
+                actual = metrics[key] or 0
+                if value is not None and not isclose(actual, value, abs_tol=1e-6):
+                    discrepancies.append("%s: %s is %s in the archive, but %s after importing" % (
+                        team.short_name, key, value, actual))
+        return discrepancies
+
+
+class ArchiveVerificationError(Exception):
+    """Raised when the standings of an imported tournament don't match the
+    archive. `discrepancies` is the list returned by `verify_standings()`."""
+
+    def __init__(self, discrepancies):
+        self.discrepancies = discrepancies
+        super().__init__("\n".join(discrepancies))
+
+
+class BulkImporter(Importer):
+    """Imports a tournament archive using a fixed number of queries per model,
+    rather than a few queries per object, as `Importer` does.
+
+    The archive is first read in a single pass into in-memory tables, one list
+    of elements per element type. Instances of each model are then built from
+    these tables and inserted using `bulk_create()` in dependency order, all in
+    one transaction. After each model is inserted, a dict maps XML IDs to the
+    created instances, and so to primary keys, so that the models after it can
+    resolve their references. This relies on the database returning primary
+    keys from bulk inserts, as PostgreSQL does.
+
+    Since `bulk_create()` doesn't call `save()` or send signals, this does what
+    they would have done explicitly: it constructs team names, numbers feedback
+    versions, rebuilds standings records at the end, and invalidates the
+    conflicts and history snapshots."""
+
+    def import_tournament(self, verify=True):
+        """Imports the tournament. If `verify` is True, the standings after
+        importing are compared with those in the archive, and if they don't
+        match, the import is rolled back and ArchiveVerificationError is
+        raised."""
+        with transaction.atomic():
+            self.create_tournament()
+            self.set_preferences()
+            self.read_tables()
+            self.import_institutions()
+            self.import_categories()
+            self.import_venues()
+            self.import_questions()
+            self.import_teams()
+            self.import_speakers()
+            self.import_adjudicators()
+            self.import_debates()
+            self.import_motions()
+            self.import_results()
+            self.import_feedback()
+            rebuild_tournament_records(self.tournament)
+
+            if verify:
+                discrepancies = self.verify_standings()
+                if discrepancies:
+                    raise ArchiveVerificationError(discrepancies)
+
+        invalidate_standings(self.tournament.id)
+        for model in (TeamInstitutionConflict, AdjudicatorInstitutionConflict, AdjudicatorTeamConflict,
+                      AdjudicatorAdjudicatorConflict, DebateTeam, DebateAdjudicator):
+            invalidate_snapshots(model)
+
+    def read_tables(self):
+        """Reads the archive into `self.tables`, a dict mapping element tags to
+        lists of elements, with participants (teams and adjudicators) hoisted
+        out of their container."""
+        self.tables = defaultdict(list)
+        for element in self.root:
+            if element.tag == 'participants':
+                for participant in element:
+                    self.tables[participant.tag].append(participant)
+            else:
+                self.tables[element.tag].append(element)
+
+    def import_institutions(self):
+        # Institutions and regions may be shared between tournaments, so use
+        # existing ones where they exist, fetching them in one query each
+        elements = self.tables['institution']
+        region_names = {el.get('region') for el in elements if el.get('region') is not None}
+        self.regions = {region.name: region for region in Region.objects.filter(name__in=region_names)}
+        new_regions = [Region(name=name) for name in region_names if name not in self.regions]
+        bulk_create(Region, new_regions)
+        self.regions.update((region.name, region) for region in new_regions)
+
+        existing = {(inst.code, inst.name): inst for inst in
+                    Institution.objects.filter(name__in=[el.text for el in elements])}
+        new_institutions = []
+        updated_institutions = {}
+        self.institutions = {}
+
+        for el in elements:
+            key = (el.get('reference'), el.text)
+            inst_obj = existing.get(key)
+            if inst_obj is None:
+                inst_obj = existing[key] = Institution(code=key[0], name=key[1])
+                new_institutions.append(inst_obj)
+            if el.get('region') is not None:
+                inst_obj.region = self.regions[el.get('region')]
+                if inst_obj.pk is not None:
+                    updated_institutions[inst_obj.pk] = inst_obj
+            self.institutions[el.get('id')] = inst_obj
+
+        bulk_create(Institution, new_institutions)
+        Institution.objects.bulk_update(updated_institutions.values(), ['region'], batch_size=BULK_BATCH_SIZE)
+
+    def import_categories(self):
+        self.team_breaks = {}
+        self.speaker_categories = {}
+
+        for i, breakqual in enumerate(self.tables['break-category'], 1):
+            self.team_breaks[breakqual.get('id')] = BreakCategory(
+                tournament=self.tournament, name=breakqual.text,
+                slug=slugify(breakqual.text[:50]), seq=i,
+                break_size=0, is_general=False, priority=0,
+            )
+
+        for i, category in enumerate(self.tables['speaker-category'], 1):
+            self.speaker_categories[category.get('id')] = SpeakerCategory(
+                tournament=self.tournament, name=category.text,
+                slug=slugify(category.text[:50]), seq=i,
+            )
+
+        bulk_create(BreakCategory, list(self.team_breaks.values()))
+        bulk_create(SpeakerCategory, list(self.speaker_categories.values()))
+
+    def import_venues(self):
+        self.venues = {venue.get('id'): Venue(tournament=self.tournament, name=venue.text, priority=venue.get('priority', 0))
+                       for venue in self.tables['venue']}
+        bulk_create(Venue, list(self.venues.values()))
+
+    def import_questions(self):
+        self.questions = {}
+
+        for i, question in enumerate(self.tables['question'], 1):
+            self.questions[question.get('id')] = AdjudicatorFeedbackQuestion(
+                tournament=self.tournament, seq=i, text=question.text,
+                name=question.get('name'), reference=slugify(question.get('name')[:50]),
+                from_adj=question.get('from-adjudicators') == 'true', from_team=question.get('from-teams') == 'true',
+                answer_type=question.get('type'), required=False,
+            )
+
+        bulk_create(AdjudicatorFeedbackQuestion, list(self.questions.values()))
+
+    def import_teams(self):
+        self.teams = {}
+        institution_conflicts = set()
+        break_categories = set()
+
+        for team in self.tables['team']:
+            team_obj, institutions = self.make_team(team)
+            # Team.save() would construct these, but bulk_create() doesn't call it
+            team_obj.short_name = team_obj._construct_short_name()
+            team_obj.long_name = team_obj._construct_long_name()
+            self.teams[team.get('id')] = team_obj
+
+            institution_conflicts.update((team_obj, self.institutions[i]) for i in institutions if i in self.institutions)
+            break_categories.update((team_obj, self.team_breaks[bc]) for bc in team.get('break-eligibilities', "").split())
+
+        bulk_create(Team, list(self.teams.values()))
+        bulk_create(TeamInstitutionConflict, [
+            TeamInstitutionConflict(team=team, institution=inst) for team, inst in institution_conflicts])
+        bulk_create(Team.break_categories.through, [
+            Team.break_categories.through(team=team, breakcategory=bc) for team, bc in break_categories])
+
+    def import_speakers(self):
+        self.speakers = {}
+        self.speakers_by_team = defaultdict(list)
+        categories = []
+
+        for team in self.tables['team']:
+            team_obj = self.teams[team.get('id')]
+            for speaker in team.findall('speaker'):
+                speaker_obj = Speaker(
+                    team=team_obj, name=speaker.text,
+                    gender=speaker.get('gender', ''), email=speaker.get('email', ''))
+                self.speakers[speaker.get('id')] = speaker_obj
+                self.speakers_by_team[team_obj].append(speaker_obj)
+                categories.extend((speaker_obj, self.speaker_categories[sc]) for sc in speaker.get('categories', "").split())
+
+        bulk_create(Speaker, list(self.speakers.values()))
+        bulk_create(Speaker.categories.through, [
+            Speaker.categories.through(speaker=speaker, speakercategory=sc) for speaker, sc in categories])
+
+    def import_adjudicators(self):
+        self.adjudicators = {}
+        institution_conflicts = set()
+        team_conflicts = set()
+        adj_adj_conflicts = []
+
+        for adj in self.tables['adjudicator']:
+            institutions = adj.get('institutions', "").split()
+            adj_obj = Adjudicator(
+                tournament=self.tournament, base_score=adj.get('score', 0),
+                institution=self.institutions.get(institutions[0]) if institutions else None,
+                independent=adj.get('independent', False) == 'true', adj_core=adj.get('core', False) == 'true',
+                name=adj.get('name'), gender=adj.get('gender', ''), email=adj.get('email', ''))
+            self.adjudicators[adj.get('id')] = adj_obj
+
+            institution_conflicts.update((adj_obj, self.institutions[i]) for i in institutions)
+            team_conflicts.update((adj_obj, self.teams[t]) for t in adj.get('team-conflicts', "").split())
+            adj_adj_conflicts.extend((adj_obj, adj2) for adj2 in adj.get('adjudicator-conflicts', "").split())
+
+        bulk_create(Adjudicator, list(self.adjudicators.values()))
+        bulk_create(AdjudicatorInstitutionConflict, [
+            AdjudicatorInstitutionConflict(adjudicator=adj, institution=inst) for adj, inst in institution_conflicts])
+        bulk_create(AdjudicatorTeamConflict, [
+            AdjudicatorTeamConflict(adjudicator=adj, team=team) for adj, team in team_conflicts])
+        bulk_create(AdjudicatorAdjudicatorConflict, [
+            AdjudicatorAdjudicatorConflict(adjudicator1=adj1, adjudicator2=self.adjudicators[adj2])
+            for adj1, adj2 in adj_adj_conflicts])
+
+    def import_debates(self):
+        self.debates = {}
+        self.debateteams = {}
+        self.debateadjudicators = {}
+        self.debate_rows = []  # (round element, debate element, Debate)
+
+        # Rounds are few, and saving them individually keeps the round caches
+        # (updated by signals) consistent
+        for i, round in enumerate(self.tables['round'], 1):
+            round_obj = self.make_round(i, round)
+            round_obj.save()
+
+            for debate in round.findall('debate'):
+                debate_obj = Debate(round=round_obj, venue=self.venues.get(debate.get('venue')), result_status=Debate.STATUS_CONFIRMED)
+                self.debates[debate.get('id')] = debate_obj
+                self.debate_rows.append((round, debate, debate_obj))
+
+        bulk_create(Debate, list(self.debates.values()))
+
+        side_start = 2 if self.is_bp else 0
+        for round, debate, debate_obj in self.debate_rows:
+            for i, side in enumerate(debate.findall('side'), side_start):
+                self.debateteams[(debate.get('id'), side.get('team'))] = DebateTeam(
+                    debate=debate_obj, team=self.teams[side.get('team')], side=DebateTeam.SIDE_CHOICES[i][0])
+
+            adjs_by_type = defaultdict(list)
+            voting_adjs = self._get_voting_adjs(debate)
+            for adj in debate.get('adjudicators', "").split():
+                adj_type = DebateAdjudicator.TYPE_PANEL if adj in voting_adjs else DebateAdjudicator.TYPE_TRAINEE
+                if debate.get('chair') == adj:
+                    adj_type = DebateAdjudicator.TYPE_CHAIR
+                adj_obj = self.adjudicators[adj]
+                self.debateadjudicators[(debate.get('id'), adj)] = DebateAdjudicator(
+                    debate=debate_obj, adjudicator=adj_obj, type=adj_type)
+                adjs_by_type[adj_type].append(adj_obj)
+
+            # Lets results check the panel without querying the database
+            chairs = adjs_by_type[DebateAdjudicator.TYPE_CHAIR]
+            debate_obj._adjudicators = AdjudicatorAllocation(debate_obj, chair=chairs[0] if chairs else None,
+                panellists=adjs_by_type[DebateAdjudicator.TYPE_PANEL], trainees=adjs_by_type[DebateAdjudicator.TYPE_TRAINEE])
+
+        bulk_create(DebateTeam, list(self.debateteams.values()))
+        bulk_create(DebateAdjudicator, list(self.debateadjudicators.values()))
+
+    def import_motions(self):
+        self.motions = {motion.get('id'): Motion(
+            tournament=self.tournament, text=motion.text, reference=motion.get('reference'),
+            info_slide=getattr(motion.find('info-slide'), 'text', ''),
+        ) for motion in self.tables['motion']}
+        bulk_create(Motion, list(self.motions.values()))
+
+        round_motions = {}
+        seqs = Counter()
+        for round, debate, debate_obj in self.debate_rows:
+            motion_obj = self.motions.get(debate.get('motion'))
+            if motion_obj is None or (debate_obj.round, motion_obj) in round_motions:
+                continue
+            seqs[debate_obj.round] += 1
+            round_motions[(debate_obj.round, motion_obj)] = RoundMotion(
+                round=debate_obj.round, motion=motion_obj, seq=seqs[debate_obj.round])
+        bulk_create(RoundMotion, list(round_motions.values()))
+
+    def import_results(self):
+        sides = self.tournament.sides
+        positions = self.tournament.positions
+        results = []
+        vetoes = []
+
+        for round, debate, debate_obj in self.debate_rows:
+            if debate.find('side/ballot') is None:
+                continue  # no result
+
+            bs_obj = BallotSubmission(
+                version=1, submitter_type=Submission.SUBMITTER_TABROOM, confirmed=True,
+                debate=debate_obj, motion=self.motions.get(debate.get('motion')))
+            dr = DebateResult(bs_obj, load=False, tournament=self.tournament)
+            dr.init_blank_buffer()
+            results.append(dr)
+
+            consensus = self.preliminary_consensus if round.get('elimination') == 'false' else self.elimination_consensus
+            numeric_scores = True
+            try:
+                float(debate.find("side/ballot").text)
+            except ValueError:
+                numeric_scores = False
+
+            if dr.is_voting:
+                for adj in debate.get('adjudicators', "").split():
+                    da = self.debateadjudicators[(debate.get('id'), adj)]
+                    if da.type != DebateAdjudicator.TYPE_TRAINEE:
+                        dr.debateadjs[da.adjudicator] = da
+                        dr.scoresheets[da.adjudicator] = dr.scoresheet_class(positions)
+
+            for side, side_code in zip(debate.findall('side'), sides):
+                dt = self.debateteams[(debate.get('id'), side.get('team'))]
+                dr.debateteams[side_code] = dt
+
+                if side.get('motion-veto') is not None:
+                    vetoes.append((bs_obj, dt, self.motions[side.get('motion-veto')]))
+
+                for speech, pos in zip(side.findall('speech'), positions):
+                    if not numeric_scores or not dr.uses_speakers:
+                        continue
+                    # Set directly, as set_speaker() would query the team's speakers
+                    dr.speakers[side_code][pos] = self.speakers[speech.get('speaker')]
+                    if consensus:
+                        dr.set_score(side_code, pos, float(speech.find('ballot').text))
+                    else:
+                        for ballot in speech.findall('ballot'):
+                            for adj in ballot.get('adjudicators', "").split():
+                                dr.set_score(self.adjudicators[adj], side_code, pos, float(ballot.text))
+
+                if not dr.scoresheet_class.uses_declared_winners:
+                    continue  # winners are determined by scores
+                if consensus:
+                    if int(side.find('ballot').get('rank')) == 1:
+                        dr.add_winner(side_code)
+                else:
+                    for ballot in side.findall('ballot'):
+                        if int(ballot.get('rank')) == 1:
+                            for adj in ballot.get('adjudicators', "").split():
+                                dr.add_winner(self.adjudicators[adj], side_code)
+
+        for dr in results:
+            dr.ballotsub.fingerprint = dr.fingerprint()
+        bulk_create(BallotSubmission, [dr.ballotsub for dr in results])
+        bulk_create(DebateTeamMotionPreference, [
+            DebateTeamMotionPreference(ballot_submission=bs_obj, debate_team=dt, motion=motion, preference=3)
+            for bs_obj, dt, motion in vetoes])
+
+        scores_by_model = defaultdict(list)
+        for dr in results:
+            for score in dr.get_unsaved_scores():
+                scores_by_model[type(score)].append(score)
+        for model, scores in scores_by_model.items():
+            bulk_create(model, scores)
+
+    def import_feedback(self):
+        versions = defaultdict(list)  # (adjudicator, source adjudicator, source team) -> feedback
+        answers = []
+
+        for adj in self.tables['adjudicator']:
+            adj_obj = self.adjudicators[adj.get('id')]
+
+            for feedback in adj.findall('feedback'):
+                d_adj = self.debateadjudicators.get((feedback.get('debate'), feedback.get('source-adjudicator')))
+                d_team = self.debateteams.get((feedback.get('debate'), feedback.get('source-team')))
+                submissions = versions[(adj_obj, d_adj, d_team)]
+                feedback_obj = AdjudicatorFeedback(adjudicator=adj_obj, score=feedback.get('score'),
+                    version=len(submissions) + 1, source_adjudicator=d_adj, source_team=d_team,
+                    submitter_type=Submission.SUBMITTER_TABROOM, confirmed=False)
+                submissions.append(feedback_obj)
+
+                for answer in feedback.findall('answer'):
+                    answers.append((feedback_obj, self.questions[answer.get('question')], answer.text or ""))
+
+        # Submission.save() would unconfirm earlier versions, leaving the last
+        for submissions in versions.values():
+            submissions[-1].confirmed = True
+        bulk_create(AdjudicatorFeedback, [feedback for submissions in versions.values() for feedback in submissions])
+
+        answers_by_model = defaultdict(list)
+        for feedback_obj, question, text in answers:
+            model = question.answer_type_class
+            answers_by_model[model].append(model(feedback=feedback_obj, question=question,
+                answer=self._parse_answer(model, text)))
+        for model, instances in answers_by_model.items():
+            bulk_create(model, instances)
+
+    @staticmethod
+    def _parse_answer(model, text):
+        """Converts the text of an answer, as written by `Exporter`, to the type
+        of the answer model's field."""
+        if model.ANSWER_TYPE is list:
+            return [str(choice) for choice in literal_eval(text)]
+        return model._meta.get_field('answer').to_python(text)
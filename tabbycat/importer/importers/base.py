@@ -3,15 +3,23 @@
 import csv
 import logging
 import re
-from collections import Counter
+from collections import Counter, defaultdict
 from types import GeneratorType
 
-from django.core.exceptions import FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.core.exceptions import (FieldDoesNotExist, FieldError, MultipleObjectsReturned,
+    ObjectDoesNotExist, ValidationError)
+from django.db import connection, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_save
+
+from adjallocation.snapshot import invalidate_snapshots
 
 NON_FIELD_ERRORS = '__all__'
 DUPLICATE_INFO = 19  # Logging level just below INFO
 logging.addLevelName(DUPLICATE_INFO, 'DUPLICATE_INFO')
 
+BULK_BATCH_SIZE = 500
+
 TRUE_VALUES = ('true', 'yes', 't', 'y', '1')
 FALSE_VALUES = ('false', 'no', 'f', 'n', '0')
 
@@ -25,6 +33,63 @@ def convert_bool(value):
         raise ValueError('Invalid boolean value: %s' % (value,))
 
 
+def freeze(value):
+    """Returns a hashable version of `value`, for use in sets and dict keys.
+    Lists (e.g. from array fields) are converted to tuples."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def supports_bulk_create(model):
+    """Returns True if instances of `model` can be saved with `bulk_create()`
+    without skipping anything that `save()` would do, i.e. if the model doesn't
+    override `save()` and has no save signal receivers. Models with multi-table
+    inheritance are supported if they have only one parent.
+
+    This also requires that the database return primary keys from bulk inserts
+    (as PostgreSQL does), since callers use the created instances in later
+    imports, and child rows need their parents' keys."""
+    if model.save is not models.Model.save:
+        return False
+    if pre_save.has_listeners(model) or post_save.has_listeners(model):
+        return False
+    if not connection.features.can_return_rows_from_bulk_insert or len(model._meta.parents) > 1:
+        return False
+    return all(supports_bulk_create(parent) for parent in model._meta.parents)
+
+
+def bulk_create(model, instances):
+    """Like `model.objects.bulk_create(instances)`, but also supports models
+    with (single) multi-table inheritance, by creating the parent rows first.
+    Callers should check `supports_bulk_create(model)` first."""
+    if not model._meta.parents:
+        return model._base_manager.bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+
+    parent_model, parent_link = next(iter(model._meta.parents.items()))
+    parents = [parent_model(**{f.attname: getattr(inst, f.attname) for f in parent_model._meta.concrete_fields})
+               for inst in instances]
+    bulk_create(parent_model, parents)
+
+    for inst, parent in zip(instances, parents):
+        setattr(inst, parent_link.attname, parent.pk)
+
+    # Insert only the child's own columns, since the parent rows now exist
+    fields = model._meta.local_concrete_fields
+    for start in range(0, len(instances), BULK_BATCH_SIZE):
+        model._base_manager._insert(instances[start:start+BULK_BATCH_SIZE], fields=fields)
+    for inst in instances:
+        inst._state.adding = False
+        inst._state.db = model._base_manager.db
+    return instances
+
+
 def make_interpreter(DELETE=[], **kwargs):  # noqa: N803
     """Convenience function for building an interpreter. The default interpreter
     (i.e. the one returned if no arguments are passed to this function) just
@@ -131,6 +196,11 @@ class TournamentDataImporterError(Exception):
         """Adds the entries in another TournamentDataImporterError to this one."""
         self.entries.extend(tdie.entries)
 
+    def sort(self):
+        """Sorts the entries by line number, keeping entries on the same line
+        in the order they were added."""
+        self.entries.sort(key=lambda entry: entry.lineno)
+
     def itermessages(self):
         """Iterates through the error messages."""
         for entry in self.entries:
@@ -160,6 +230,7 @@ class BaseTournamentDataImporter(object):
         if 'loglevel' in kwargs:
             self.logger.setLevel(kwargs['loglevel'])
         self.expect_unique = kwargs.get('expect_unique', True)
+        self.bulk = kwargs.get('bulk', True)
         self.reset_counts()
 
     def reset_counts(self):
@@ -202,12 +273,19 @@ class BaseTournamentDataImporter(object):
         duplicate objects before saving any of the objects it creates. If
         `expect_unique` is False, it will just skip objects that would be
         duplicates and log a DUPLICATE_INFO message to say so.
+
+        If `self.bulk` is True (the default), existing objects are found using
+        one query per set of columns rather than one per line, instances are
+        validated together, and, where the model allows it, they're saved
+        using `bulk_create()`. Either way, saving happens in one transaction.
+        The errors reported are the same as if `self.bulk` were False.
         """
         if hasattr(csvfile, 'seek') and callable(csvfile.seek):
             csvfile.seek(0)
         reader = csv.DictReader(csvfile)
-        kwargs_seen = list()
+        kwargs_seen = set()
         instances = dict()
+        pending = list()  # (key, lineno, kwargs, description), in bulk mode
         errors = TournamentDataImporterError()
         if expect_unique is None:
             expect_unique = self.expect_unique
@@ -260,7 +338,7 @@ class BaseTournamentDataImporter(object):
                 description = model.__name__ + "(" + ", ".join(["%s=%r" % args for args in kwargs.items()]) + ")"
 
                 # Check if it's a duplicate
-                kwargs_expect_unique = kwargs.copy()
+                kwargs_expect_unique = freeze(kwargs)
                 if kwargs_expect_unique in kwargs_seen:
                     if expect_unique:
                         message = "Duplicate " + description
@@ -268,7 +346,15 @@ class BaseTournamentDataImporter(object):
                     else:
                         self.logger.log(DUPLICATE_INFO, "Skipping duplicate " + description)
                     continue
-                kwargs_seen.append(kwargs_expect_unique)
+                kwargs_seen.add(kwargs_expect_unique)
+
+                key = (lineno, itemno) if list_provided else lineno
+
+                # In bulk mode, existing instances are found and instances
+                # are validated after all lines have been read
+                if self.bulk:
+                    pending.append((key, lineno, kwargs, description))
+                    continue
 
                 # Create (but don't save) an instance (or handle an error)
                 try:
@@ -282,14 +368,7 @@ class BaseTournamentDataImporter(object):
                 except FieldError as e:
                     match = re.match(r"Cannot resolve keyword '(\w+)' into field.", str(e))
                     if match:
-                        message = "There's an unrecognized column header in this file: {}".format(match.group(1))
-                        self.logger.error(message)
-                        self.logger.error("I was trying to import %s at the time.", model._meta.verbose_name_plural)
-                        self.logger.error("The original error was: " + str(e))
-                        self.logger.error("If you're writing a new importer, it might be that you "
-                                "need to delete some columns from the dict in your interpreter.")
-                        self.logger.error("If using construct_interpreter(), you can do this with the DELETE argument.")
-                        raise TournamentDataImporterFatal(message)
+                        self._unrecognized_column(model, match.group(1), e)
                     else:
                         raise
                 except ValueError as e:
@@ -313,10 +392,13 @@ class BaseTournamentDataImporter(object):
                     errors.update_with_validation_error(lineno, model, e)
                     continue
 
-                key = (lineno, itemno) if list_provided else lineno
                 self.logger.debug("To create from line %s: %s", key, description)
                 instances[key] = inst
 
+        if self.bulk:
+            instances, skipped_because_existing = self._prepare_in_bulk(model, pending, errors, expect_unique)
+            errors.sort()
+
         # Report errors, if any
         if errors:
             if self.strict:
@@ -329,9 +411,15 @@ class BaseTournamentDataImporter(object):
                 self.errors.update(errors)
 
         # Create the instances
-        for lineno, inst in instances.items():
-            inst.save()
-            self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, lineno, inst)
+        if self.bulk and supports_bulk_create(model):
+            with transaction.atomic():
+                bulk_create(model, list(instances.values()))
+            invalidate_snapshots(model)
+        else:
+            with transaction.atomic():
+                for lineno, inst in instances.items():
+                    inst.save()
+                    self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, lineno, inst)
 
         self.logger.info("Imported %d %s", len(instances), model._meta.verbose_name_plural)
         if skipped_because_existing:
@@ -340,3 +428,152 @@ class BaseTournamentDataImporter(object):
         self.counts.update({model: len(instances)})
 
         return instances
+
+    def _unrecognized_column(self, model, fieldname, error):
+        message = "There's an unrecognized column header in this file: {}".format(fieldname)
+        self.logger.error(message)
+        self.logger.error("I was trying to import %s at the time.", model._meta.verbose_name_plural)
+        self.logger.error("The original error was: " + str(error))
+        self.logger.error("If you're writing a new importer, it might be that you "
+                "need to delete some columns from the dict in your interpreter.")
+        self.logger.error("If using construct_interpreter(), you can do this with the DELETE argument.")
+        raise TournamentDataImporterFatal(message)
+
+    def _prepare_in_bulk(self, model, pending, errors, expect_unique):
+        """Does for all pending lines at once what the non-bulk path of
+        `_import()` does line by line: skips lines whose instances already
+        exist, then creates and validates instances for the rest. Adds errors
+        to `errors`, and returns a 2-tuple `(instances, skipped)`.
+
+        Existing instances are found in an index built with one query for each
+        distinct set of columns among the lines, rather than one query per
+        line. Validation calls `full_clean()`, but checks uniqueness for all
+        instances together."""
+
+        fields = {}
+        groups = defaultdict(list)
+        for key, lineno, kwargs, description in pending:
+            for name in kwargs:
+                if name not in fields:
+                    try:
+                        fields[name] = model._meta.get_field(name)
+                    except FieldDoesNotExist as e:
+                        self._unrecognized_column(model, name, e)
+            groups[tuple(sorted(kwargs))].append(kwargs)
+
+        indices = {names: self._existing_index(model, names, [fields[name] for name in names], group)
+                   for names, group in groups.items()}
+
+        # Find existing instances
+        to_create = []
+        skipped = 0
+        for key, lineno, kwargs, description in pending:
+            names = tuple(sorted(kwargs))
+            try:
+                index_key = self._index_key([fields[name] for name in names], [kwargs[name] for name in names])
+            except ValidationError as e:
+                errors.update_with_validation_error(lineno, model, e)
+                continue
+
+            nexisting = indices[names][index_key]
+            if nexisting == 0:
+                try:
+                    to_create.append((key, lineno, model(**kwargs), description))
+                except ValueError as e:
+                    errors.add(lineno, model, str(e))
+            elif nexisting > 1:
+                if expect_unique:
+                    errors.add(lineno, model, "get() returned more than one %s -- it returned %d!" % (
+                        model._meta.object_name, nexisting))
+            else:
+                skipped += 1
+                if expect_unique:
+                    errors.add(lineno, model, description + " already exists")
+                else:
+                    self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", description)
+
+        # Validate instances
+        validation_errors = defaultdict(dict)
+        for key, lineno, inst, description in to_create:
+            # Related objects were looked up by the interpreter, so there's no
+            # need for full_clean() to check that each one exists
+            exclude = [f.name for f in model._meta.concrete_fields
+                       if f.is_relation and f.is_cached(inst) and getattr(inst, f.name) is not None]
+            try:
+                inst.full_clean(exclude=exclude, validate_unique=False)
+            except ValidationError as e:
+                e.update_error_dict(validation_errors[key])
+        for key, field, error in self._validate_unique_in_bulk(model, [(key, inst) for key, l, inst, d in to_create]):
+            validation_errors[key].setdefault(field, []).append(error)
+
+        instances = {}
+        for key, lineno, inst, description in to_create:
+            if validation_errors.get(key):
+                errors.update_with_validation_error(lineno, model, ValidationError(validation_errors[key]))
+                continue
+            self.logger.debug("To create from line %s: %s", key, description)
+            instances[key] = inst
+
+        return instances, skipped
+
+    @staticmethod
+    def _index_key(fields, values):
+        """Returns the key in an index of existing instances for the given
+        values of the given fields, normalized as they would be when loaded
+        from the database."""
+        key = []
+        for field, value in zip(fields, values):
+            if isinstance(value, models.Model):
+                value = value.pk
+            elif value is not None and not field.is_relation:
+                value = field.to_python(value)
+            key.append(freeze(value))
+        return tuple(key)
+
+    @staticmethod
+    def _existing_index(model, names, fields, kwargs_list):
+        """Returns a Counter mapping index keys (see `_index_key()`) to the
+        number of existing instances of `model` with those values of `fields`,
+        using one query. The query is restricted to instances related to the
+        objects in `kwargs_list`, so that it doesn't fetch the whole table."""
+        queryset = model.objects.all()
+        for name, field in zip(names, fields):
+            if field.is_relation:
+                values = [kwargs[name] for kwargs in kwargs_list]
+                q = Q(**{field.attname + '__in': {getattr(v, 'pk', v) for v in values if v is not None}})
+                if None in values:
+                    q |= Q(**{field.attname + '__isnull': True})
+                queryset = queryset.filter(q)
+        rows = queryset.values_list(*[field.attname for field in fields])
+        return Counter(tuple(freeze(value) for value in row) for row in rows)
+
+    @staticmethod
+    def _validate_unique_in_bulk(model, instances):
+        """Checks each of the (key, instance) pairs in `instances` against the
+        database for the model's unique and unique-together constraints, the
+        way `Model.validate_unique()` would, but with one query per constraint
+        rather than per instance. Yields a 3-tuple (key, field, error) for each
+        violation, where `field` is as would be in a ValidationError dict."""
+        if not instances:
+            return
+        unique_checks, date_checks = instances[0][1]._get_unique_checks()
+
+        for model_class, unique_check in unique_checks:
+            attnames = [model._meta.get_field(name).attname for name in unique_check]
+            values = {}
+            for key, inst in instances:
+                row = tuple(getattr(inst, attname) for attname in attnames)
+                if any(value is None for value in row):
+                    continue
+                values[key] = tuple(freeze(value) for value in row)
+            if not values:
+                continue
+
+            first_values = {row[0] for row in values.values()}
+            existing = model_class._default_manager.filter(**{attnames[0] + '__in': first_values})
+            existing = {tuple(freeze(value) for value in row) for row in existing.values_list(*attnames)}
+
+            for key, inst in instances:
+                if key in values and values[key] in existing:
+                    field = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                    yield key, field, inst.unique_error_message(model_class, unique_check)
@@ -0,0 +1,28 @@
+from importer.archive import Exporter
+from utils.management.base import TournamentCommand
+
+
+class Command(TournamentCommand):
+
+    help = "Exports a tournament to an XML archive file."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("file", nargs="?", type=str, default="<t>.xml",
+            help="Output file, where <t> will be replaced by the tournament slug. "
+                 "If it ends in .gz, the file is gzip-compressed. (default: <t>.xml)")
+        parser.add_argument("--gzip", "-z", action="store_true",
+            help="Compress the file with gzip, adding .gz to the file name if necessary.")
+
+    def handle_tournament(self, tournament, **options):
+        filename = options['file'].replace("<t>", tournament.slug)
+        if options['gzip'] and not filename.endswith('.gz'):
+            filename += '.gz'
+
+        exporter = Exporter(tournament)
+        chunks = exporter.iter_gzip() if filename.endswith('.gz') else exporter.iter_xml()
+        with open(filename, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+        self.stdout.write("Exported archive to {}".format(filename))
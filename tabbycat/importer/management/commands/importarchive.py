@@ -4,7 +4,7 @@ from xml.etree import ElementTree
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 
-from importer.archive import Importer
+from importer.archive import ArchiveVerificationError, BulkImporter
 
 
 class Command(BaseCommand):
@@ -12,6 +12,8 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('file', help="File to import tournament data from")
+        parser.add_argument('--no-verify', action='store_false', dest='verify', default=True,
+                            help="Don't check that the imported standings match the archive")
 
     def handle(self, *args, **options):
         self.options = options
@@ -26,7 +28,7 @@ class Command(BaseCommand):
         if the file doesn't appear to exist, or is not an XML file."""
 
         def _check_return(path):
-            if not os.path.isfile(path) or os.path.splitext[1] != '.xml':
+            if not os.path.isfile(path) or os.path.splitext(path)[1] != '.xml':
                 raise CommandError("The path '%s' is not a valid XML file" % path)
             self.stdout.write('Importing from file: ' + path)
             return path
@@ -41,6 +43,12 @@ class Command(BaseCommand):
 
     def create_tournament(self):
         """Given the path, does everything necessary to create the tournament."""
-        contents = open(self.filepath, 'r')
-        importer = Importer(ElementTree.fromstring(contents))
-        importer.import_tournament()
+        importer = BulkImporter(ElementTree.parse(self.filepath).getroot())
+        try:
+            importer.import_tournament(verify=self.options['verify'])
+        except ArchiveVerificationError as e:
+            for discrepancy in e.discrepancies:
+                self.stderr.write(discrepancy)
+            raise CommandError("The imported standings don't match the archive, so the import was rolled back.")
+
+        self.stdout.write(self.style.SUCCESS("Imported tournament: %s" % importer.tournament.name))
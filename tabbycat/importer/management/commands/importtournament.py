@@ -33,6 +33,9 @@ class Command(BaseCommand):
                             help="Keep existing tournament and data, skipping lines if they are duplicates.")
         parser.add_argument('--relaxed', action='store_false', dest='strict', default=True,
                             help="Don't crash if there is an error, just skip and keep going.")
+        parser.add_argument('--no-bulk', action='store_false', dest='bulk', default=True,
+                            help="Check, validate and save each line separately, rather than in bulk. Slower, but "
+                                 "useful for debugging.")
 
         # Cleaning shared objects
         parser.add_argument('--clean-shared', action='store_true', default=False,
@@ -64,7 +67,8 @@ class Command(BaseCommand):
 
         importer_class = self.get_importer_class()
         self.importer = importer_class(
-            self.tournament, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'])
+            self.tournament, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'],
+            bulk=options['bulk'])
 
         # Importer classes specify what they import, and in what order
         for item in self.importer.order:
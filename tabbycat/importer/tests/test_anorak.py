@@ -148,6 +148,41 @@ class TestImporterAnorak(TestCase):
         self.assertEqual(len(raisescm.exception), 10)
         self.assertEqual(len(logscm.records), 10)
 
+    def test_invalid_line_not_bulk(self):
+        self.importer.bulk = False
+        self.test_invalid_line()
+
+    def test_existing_strict(self):
+        self.test_break_categories()
+        self.importer.reset_counts()
+        f = self._open_csv_file(self.TESTDIR, "break_categories")
+        with self.assertRaises(TournamentDataImporterError) as raisescm, self.assertLogs(self.logger, logging.ERROR):
+            self.importer.import_break_categories(f)
+        self.assertEqual(len(raisescm.exception), 3)
+        self.assertEqual(bm.BreakCategory.objects.filter(tournament=self.tournament).count(), 3)
+
+    def test_existing_skipped(self):
+        self.test_speakers()
+        self.importer.reset_counts()
+        self.importer.expect_unique = False
+        f = self._open_csv_file(self.TESTDIR, "speakers")
+        self.importer.import_speakers(f)
+        self.assertEqual(pm.Team.objects.filter(tournament=self.tournament).count(), 24)
+        self.assertEqual(pm.Speaker.objects.filter(team__tournament=self.tournament).count(), 72)
+        self.assertFalse(self.importer.errors)
+
+    def test_bulk_same_as_not_bulk(self):
+        self.test_adjudicators()
+        bulk = list(pm.Adjudicator.objects.filter(tournament=self.tournament).values_list(
+            'name', 'institution__name', 'base_score', 'adj_core', 'independent').order_by('name'))
+        pm.Adjudicator.objects.filter(tournament=self.tournament).delete()
+        self.importer.bulk = False
+        f = self._open_csv_file(self.TESTDIR, "adjudicators")
+        self.importer.import_adjudicators(f)
+        not_bulk = list(pm.Adjudicator.objects.filter(tournament=self.tournament).values_list(
+            'name', 'institution__name', 'base_score', 'adj_core', 'independent').order_by('name'))
+        self.assertEqual(bulk, not_bulk)
+
     def test_weird_choices_judges(self):
         self.test_speakers()
         self.importer.reset_counts()
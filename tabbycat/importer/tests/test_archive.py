@@ -0,0 +1,87 @@
+import gzip
+from xml.etree.ElementTree import fromstring, tostring
+
+from django.test import TestCase
+
+from standings.teams import TeamStandingsGenerator
+from tournaments.models import Tournament
+
+from ..archive import ArchiveVerificationError, BulkImporter, Exporter
+
+
+class TestExporter(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+
+    def test_streamed_matches_tree(self):
+        tree = tostring(Exporter(self.tournament).create_all())
+        streamed = b"".join(Exporter(self.tournament).iter_xml())
+        self.assertEqual(tostring(fromstring(streamed)), tree)
+
+    def test_contents(self):
+        root = Exporter(self.tournament).create_all()
+        self.assertEqual(len(root.findall('round')), self.tournament.round_set.count())
+        self.assertEqual(len(root.findall('round/debate')), sum(r.debate_set.count() for r in self.tournament.round_set.all()))
+        self.assertEqual(len(root.findall('participants/team')), self.tournament.team_set.count())
+        self.assertEqual(len(root.findall('participants/adjudicator')), self.tournament.adjudicator_set.count())
+        self.assertEqual(len(root.findall('motion')), self.tournament.motion_set.count())
+
+    def test_small_chunks(self):
+        exporter = Exporter(self.tournament)
+        exporter.chunk_size = 3
+        streamed = b"".join(exporter.iter_xml(buffer_size=100))
+        self.assertEqual(tostring(fromstring(streamed)), tostring(Exporter(self.tournament).create_all()))
+
+    def test_gzip(self):
+        streamed = b"".join(Exporter(self.tournament).iter_xml())
+        compressed = b"".join(Exporter(self.tournament).iter_gzip())
+        self.assertEqual(gzip.decompress(compressed), streamed)
+
+
+class TestBulkImporter(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+        self.root = Exporter(self.tournament).create_all()
+        self.root.set('name', "Imported tournament")
+        self.root.set('short', "imported")
+
+    def get_standings(self, tournament):
+        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ())
+        standings = generator.generate(tournament.team_set.all())
+        return {info.team.short_name: (info.metrics['points'], info.metrics['speaks_sum']) for info in standings}
+
+    def test_counts(self):
+        importer = BulkImporter(self.root)
+        importer.import_tournament()
+        imported = importer.tournament
+        self.assertEqual(imported.team_set.count(), self.tournament.team_set.count())
+        self.assertEqual(imported.adjudicator_set.count(), self.tournament.adjudicator_set.count())
+        self.assertEqual(imported.round_set.count(), self.tournament.round_set.count())
+        for team in imported.team_set.all():
+            self.assertEqual(team.speaker_set.count(), self.tournament.team_set.get(short_name=team.short_name).speaker_set.count())
+
+    def test_standings_match(self):
+        importer = BulkImporter(self.root)
+        importer.import_tournament()
+        self.assertEqual(importer.verify_standings(), [])
+
+        before = self.get_standings(self.tournament)
+        after = self.get_standings(importer.tournament)
+        self.assertEqual(before.keys(), after.keys())
+        for name, (points, speaks) in before.items():
+            self.assertEqual(after[name][0], points)
+            self.assertAlmostEqual(after[name][1], speaks)
+
+    def test_verification_failure(self):
+        ballot = self.root.find("round[@elimination='false']/debate/side/ballot")
+        ballot.text = str(float(ballot.text) + 10)
+        with self.assertRaises(ArchiveVerificationError) as cm:
+            BulkImporter(self.root).import_tournament()
+        self.assertEqual(len(cm.exception.discrepancies), 1)
+        self.assertFalse(Tournament.objects.filter(slug="imported").exists())
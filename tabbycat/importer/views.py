@@ -1,11 +1,10 @@
 import logging
-from xml.etree import ElementTree
 
 from defusedxml.ElementTree import fromstring
 from django.contrib import messages
 from django.core import management
 from django.forms import modelformset_factory
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils.safestring import mark_safe
@@ -26,7 +25,7 @@ from utils.mixins import AdministratorMixin
 from utils.views import PostOnlyRedirectView
 from venues.models import Venue
 
-from .archive import Exporter, Importer
+from .archive import ArchiveVerificationError, BulkImporter, Exporter
 from .forms import (AdjudicatorDetailsForm, ArchiveImportForm, ImportAdjudicatorsNumbersForm,
                     ImportInstitutionsRawForm, ImportTeamsNumbersForm,
                     ImportVenuesRawForm, TeamDetailsForm, TeamDetailsFormSet,
@@ -250,8 +249,15 @@ class TournamentImportArchiveView(AdministratorMixin, FormView):
     view_role = ""
 
     def form_valid(self, form):
-        self.importer = Importer(fromstring(form.cleaned_data['xml']))
-        self.importer.import_tournament()
+        self.importer = BulkImporter(fromstring(form.cleaned_data['xml']))
+        try:
+            self.importer.import_tournament()
+        except ArchiveVerificationError as e:
+            logger.warning("Archive import rolled back, standings didn't match:\n%s", e)
+            form.add_error('xml', _("The standings after importing didn't match those in the archive, "
+                "so the tournament wasn't imported. The first discrepancy was: %(discrepancy)s") % {
+                'discrepancy': e.discrepancies[0]})
+            return self.form_invalid(form)
 
         messages.success(self.request, _("Tournament archive has been imported."))
         return super().form_valid(form)
@@ -266,12 +272,19 @@ class ExportArchiveIndexView(AdministratorMixin, TournamentMixin, TemplateView):
 
 
 class ExportArchiveAllView(AdministratorMixin, TournamentMixin, View):
+    """Streams the archive as it's generated, so that large tournaments don't
+    need to be held in memory. With `?compress=gzip`, the download is a
+    gzip-compressed file."""
 
     def get(self, request, *args, **kwargs):
-        response = HttpResponse(self.get_xml(), content_type='text/xml; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="' + self.tournament.short_name + '.xml"'
+        exporter = Exporter(self.tournament)
+        filename = self.tournament.short_name + '.xml'
 
-        return response
+        if request.GET.get('compress') == 'gzip':
+            response = StreamingHttpResponse(exporter.iter_gzip(), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(exporter.iter_xml(), content_type='text/xml; charset=utf-8')
 
-    def get_xml(self):
-        return ElementTree.tostring(Exporter(self.tournament).create_all())
+        response['Content-Disposition'] = 'attachment; filename="' + filename + '"'
+        return response
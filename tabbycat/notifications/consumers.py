@@ -1,22 +1,27 @@
 import json
+import logging
 import random
-from email.utils import formataddr
+from email.utils import formataddr, make_msgid
 
+from asgiref.sync import async_to_sync
 from channels.consumer import SyncConsumer
 from django.conf import settings
 from django.core import mail
-from django.template import Context, Template
-from html2text import html2text
+from django.core.mail.utils import DNS_NAME
 
 from draw.models import Debate
 from participants.models import Person
 from tournaments.models import Round, Tournament
 
 from .models import BulkNotification, SentMessage
+from .rendering import EmailRenderer, html_to_text
+from .sending import BatchEmailSender, EmailSendingError
 from .utils import (adjudicator_assignment_email_generator, ballots_email_generator,
                     motion_release_email_generator, randomized_url_email_generator,
                     standings_email_generator, team_draw_email_generator, team_speaker_email_generator)
 
+logger = logging.getLogger(__name__)
+
 
 class NotificationQueueConsumer(SyncConsumer):
 
@@ -30,9 +35,47 @@ class NotificationQueueConsumer(SyncConsumer):
         BulkNotification.EVENT_TYPE_TEAM_DRAW: team_draw_email_generator,
     }
 
-    def _send(self, event, messages, records):
-        mail.get_connection().send_messages(messages)
-        SentMessage.objects.bulk_create(records)
+    def _send(self, event, items, bulk_notification):
+        """Sends the messages in `items`, a generator of (message, record)
+        tuples. If sending fails, the event is sent back to the queue to be
+        resumed, unless it's already been attempted too many times; the
+        messages sent before the failure are recorded, so aren't sent again."""
+        try:
+            BatchEmailSender().send(items)
+        except EmailSendingError as e:
+            attempt = event.get('attempt', 1)
+            if attempt >= settings.NOTIFICATIONS_EVENT_ATTEMPTS:
+                logger.error("Giving up on notification %d after %d attempts; %d emails sent in the last attempt",
+                             bulk_notification.id, attempt, e.nsent)
+                return
+            logger.warning("Sending notification %d stopped after %d emails, queuing it to resume",
+                           bulk_notification.id, e.nsent)
+            async_to_sync(self.channel_layer.send)("notifications", {
+                **event, 'notification_id': bulk_notification.id, 'attempt': attempt + 1})
+
+    def _unsent(self, recipients, bulk_notification):
+        """Excludes recipients already sent this notification, for resuming."""
+        return recipients.exclude(sentmessage__notification=bulk_notification)
+
+    def _make_email(self, bulk_notification, recipient, subject, html_body, text_body, from_email, reply_to, context=None):
+        hook_id = str(bulk_notification.id) + "-" + str(recipient.id) + "-" + str(random.randint(1000, 9999))
+        # Set the Message-ID here, as otherwise a new one is generated every time the message is rendered
+        message_id = make_msgid(domain=DNS_NAME)
+        email = mail.EmailMultiAlternatives(
+            subject=subject, body=text_body,
+            from_email=from_email, to=[formataddr((recipient.name, recipient.email))],
+            reply_to=reply_to, headers={
+                'Message-ID': message_id,
+                'X-SMTPAPI': json.dumps({'unique_args': {'hook-id': hook_id}}),  # SendGrid-specific 'hook-id'
+            },
+        )
+        email.attach_alternative(html_body, "text/html")
+
+        record = SentMessage(recipient=recipient, email=recipient.email,
+                             method=SentMessage.METHOD_TYPE_EMAIL,
+                             context=context, message_id=message_id,
+                             hook_id=hook_id, notification=bulk_notification)
+        return email, record
 
     def _get_from_fields(self, t):
         from_email = formataddr((t.short_name, settings.DEFAULT_FROM_EMAIL))
@@ -41,6 +84,9 @@ class NotificationQueueConsumer(SyncConsumer):
         return from_email, None  # Shouldn't have array of None
 
     def email(self, event):
+        # Keep the event as received, in case it needs to be resumed
+        original_event = {**event, 'extra': dict(event['extra'])}
+
         # Get database objects
         if 'debate_id' in event['extra']:
             event['extra']['debate'] = Debate.objects.select_related('round', 'round__tournament').get(pk=event['extra'].pop('debate_id'))
@@ -58,11 +104,7 @@ class NotificationQueueConsumer(SyncConsumer):
         from_email, reply_to = self._get_from_fields(t)
         notification_type = event['message']
 
-        subject = Template(event['subject'])
-        html_body = Template(event['body'])
-
-        recipients = Person.objects.filter(pk__in=event['send_to'] or [], email__isnull=False).exclude(email='')
-        data = self.NOTIFICATION_GENERATORS[notification_type](to=recipients, **event['extra'])
+        renderer = EmailRenderer(event['subject'], event['body'])
 
         # Prepare messages
 
@@ -74,64 +116,40 @@ class NotificationQueueConsumer(SyncConsumer):
             'subject_template': event['subject'],
             'body_template': event['body'],
         }
-        if notification_type is BulkNotification.EVENT_TYPE_BALLOT_CONFIRMED:
+        if 'notification_id' in event:
+            bulk_notification = BulkNotification.objects.get(pk=event['notification_id'])
+        elif notification_type is BulkNotification.EVENT_TYPE_BALLOT_CONFIRMED:
             bulk_notification, c = BulkNotification.objects.get_or_create(
                 event=BulkNotification.EVENT_TYPE_BALLOT_CONFIRMED, **creation_kwargs)
         else:
             bulk_notification = BulkNotification.objects.create(event=notification_type, **creation_kwargs)
 
-        messages = []
-        records = []
-        for instance, recipient in data:
-            hook_id = str(bulk_notification.id) + "-" + str(recipient.id) + "-" + str(random.randint(1000, 9999))
-            context = Context(instance)
-            body = html_body.render(context)
-            email = mail.EmailMultiAlternatives(
-                subject=subject.render(context), body=html2text(body),
-                from_email=from_email, to=[formataddr((recipient.name, recipient.email))],
-                reply_to=reply_to, headers={
-                    'X-SMTPAPI': json.dumps({'unique_args': {'hook-id': hook_id}}),  # SendGrid-specific 'hook-id'
-                },
-            )
-            email.attach_alternative(body, "text/html")
-            messages.append(email)
-
-            raw_message = email.message()
-            records.append(
-                SentMessage(recipient=recipient, email=recipient.email,
-                            method=SentMessage.METHOD_TYPE_EMAIL,
-                            context=instance, message_id=raw_message['Message-ID'],
-                            hook_id=hook_id, notification=bulk_notification))
-
-        self._send(event, messages, records)
+        recipients = Person.objects.filter(pk__in=event['send_to'] or [], email__isnull=False).exclude(email='')
+        if 'notification_id' in event:
+            recipients = self._unsent(recipients, bulk_notification)
+        data = self.NOTIFICATION_GENERATORS[notification_type](to=recipients, **event['extra'])
+
+        def items():
+            # Render lazily, so that messages are rendered as they're sent
+            for instance, recipient in data:
+                yield self._make_email(bulk_notification, recipient, *renderer.render(instance),
+                                       from_email, reply_to, context=instance)
 
-    def email_custom(self, event):
-        messages = []
-        records = []
+        self._send(original_event, items(), bulk_notification)
 
+    def email_custom(self, event):
         t = Tournament.objects.get(id=event['tournament'])
         from_email, reply_to = self._get_from_fields(t)
 
         recipients = Person.objects.filter(pk__in=event['send_to'], email__isnull=False).exclude(email='')
 
-        bulk_notification = BulkNotification.objects.create(tournament=t, subject_template=event['subject'], body_template=event['body'])
-        for recipient in recipients:
-            hook_id = str(bulk_notification.id) + "-" + str(recipient.pk) + "-" + str(random.randint(1000, 9999))
-            email = mail.EmailMultiAlternatives(
-                subject=event['subject'], body=html2text(event['body']),
-                from_email=from_email, to=[formataddr((recipient.name, recipient.email))],
-                reply_to=reply_to, headers={
-                    'X-SMTPAPI': json.dumps({'unique_args': {'hook-id': hook_id}}),  # SendGrid-specific 'hook-id'
-                },
-            )
-            email.attach_alternative(event['body'], "text/html")
-            messages.append(email)
-
-            raw_message = email.message()
-            records.append(
-                SentMessage(recipient=recipient, email=recipient.email,
-                            method=SentMessage.METHOD_TYPE_EMAIL,
-                            message_id=raw_message['Message-ID'], hook_id=hook_id,
-                            notification=bulk_notification))
-
-        self._send(event, messages, records)
+        if 'notification_id' in event:
+            bulk_notification = BulkNotification.objects.get(pk=event['notification_id'])
+            recipients = self._unsent(recipients, bulk_notification)
+        else:
+            bulk_notification = BulkNotification.objects.create(tournament=t, subject_template=event['subject'], body_template=event['body'])
+
+        text_body = html_to_text(event['body'])
+        items = (self._make_email(bulk_notification, recipient, event['subject'], event['body'], text_body,
+                                  from_email, reply_to) for recipient in recipients)
+        self._send(event, items, bulk_notification)
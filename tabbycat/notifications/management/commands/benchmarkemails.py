@@ -0,0 +1,84 @@
+import time
+from functools import partial
+from itertools import cycle, islice
+
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from participants.models import Person
+from utils.management.base import RoundCommand
+
+from ...rendering import EmailRenderer
+from ...utils import adjudicator_assignment_email_generator, team_draw_email_generator
+
+
+class Command(RoundCommand):
+
+    help = "Times generating, rendering and sending the draw release emails for a " \
+           "round, using the in-memory email backend. Nothing is sent or saved."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("-n", "--recipients", type=int, default=None,
+            help="Number of emails to render and send. If there are fewer participants in the "
+                 "round, their emails are repeated. (default: one per participant)")
+        parser.add_argument("--adjudicators", action="store_true",
+            help="Use the adjudicators' emails, rather than the teams'")
+        parser.add_argument("--batch-size", type=int, default=100,
+            help="Number of emails to send over each connection (default: 100)")
+
+    def handle_round(self, round, **options):
+        t = round.tournament
+        url = "https://example.com/%s/privateurls/" % t.slug
+
+        if options['adjudicators']:
+            recipients = Person.objects.filter(adjudicator__debateadjudicator__debate__round=round).distinct()
+            subject, body = t.pref('adj_email_subject'), t.pref('adj_email_message')
+            generate = partial(adjudicator_assignment_email_generator, to=recipients, url=url, round=round)
+        else:
+            recipients = Person.objects.filter(speaker__team__debateteam__debate__round=round).distinct()
+            subject, body = t.pref('team_draw_email_subject'), t.pref('team_draw_email_message')
+            generate = partial(team_draw_email_generator, to=recipients, round=round)
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            data = generate()
+            generate_time = time.perf_counter() - start
+
+        if not data:
+            self.stdout.write(self.style.WARNING("There are no participants in the draw for %s." % round.name))
+            return
+
+        n = options['recipients'] or len(data)
+        data = list(islice(cycle(data), n))
+
+        start = time.perf_counter()
+        renderer = EmailRenderer(subject, body)
+        messages = []
+        for context, recipient in data:
+            subject_text, html_body, text_body = renderer.render(context)
+            message = mail.EmailMultiAlternatives(subject=subject_text, body=text_body, to=["benchmark@example.com"])
+            message.attach_alternative(html_body, "text/html")
+            messages.append(message)
+        render_time = time.perf_counter() - start
+
+        # The in-memory backend keeps messages in mail.outbox, so don't leave them there
+        saved_outbox = getattr(mail, 'outbox', None)
+        mail.outbox = []
+        try:
+            start = time.perf_counter()
+            backend = mail.get_connection('django.core.mail.backends.locmem.EmailBackend')
+            for i in range(0, n, options['batch_size']):
+                backend.send_messages(messages[i:i+options['batch_size']])
+            send_time = time.perf_counter() - start
+        finally:
+            if saved_outbox is None:
+                del mail.outbox
+            else:
+                mail.outbox = saved_outbox
+
+        self.stdout.write("%s: %d emails for %d participants" % (round.name, n, len(set(p.id for c, p in data))))
+        self.stdout.write("  Generating contexts: %.3f s, %d queries" % (generate_time, len(queries)))
+        self.stdout.write("  Rendering:           %.3f s (%.2f ms per email)" % (render_time, 1000 * render_time / n))
+        self.stdout.write("  Sending:             %.3f s (%.2f ms per email)" % (send_time, 1000 * send_time / n))
@@ -0,0 +1,39 @@
+"""Rendering of notification emails.
+
+A notification renders the same subject and body templates once for every
+recipient, so for large notifications, most of the work is in rendering.
+Templates are compiled once for each distinct source, and the plain-text
+versions of HTML bodies, which are expensive to produce, are cached, so that
+identical bodies (e.g. when the template doesn't depend on the recipient)
+are only converted once."""
+
+from functools import lru_cache
+
+from django.template import Context, Template
+from html2text import html2text
+
+
+@lru_cache(maxsize=32)
+def compile_template(source):
+    """Returns a compiled Template for `source`. Templates don't keep any
+    state between renders, so can be shared."""
+    return Template(source)
+
+
+@lru_cache(maxsize=256)
+def html_to_text(html):
+    return html2text(html)
+
+
+class EmailRenderer:
+    """Renders the subject and body templates of a notification for each
+    recipient. `render()` returns a tuple `(subject, html_body, text_body)`."""
+
+    def __init__(self, subject_template, body_template):
+        self.subject_template = compile_template(subject_template)
+        self.body_template = compile_template(body_template)
+
+    def render(self, context):
+        context = Context(context)
+        html_body = self.body_template.render(context)
+        return self.subject_template.render(context), html_body, html_to_text(html_body)
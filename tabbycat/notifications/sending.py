@@ -0,0 +1,127 @@
+"""Sending notification emails in batches.
+
+A notification can go to thousands of participants at once, for example when
+a draw is released. Rather than sending everything in one call, which records
+nothing if the connection drops part-way through, `BatchEmailSender` takes an
+iterable of messages, which can be rendered lazily by a generator, and sends
+them in batches over a single connection, optionally limiting throughput. The
+`SentMessage` records for each batch are saved as soon as the batch is sent,
+so if sending fails, the notification can be resumed by sending only to
+recipients without a record."""
+
+import logging
+import time
+from itertools import islice
+from smtplib import SMTPException
+
+from django.conf import settings
+from django.core import mail
+
+from .models import SentMessage
+
+logger = logging.getLogger(__name__)
+
+
+class EmailSendingError(RuntimeError):
+    """Raised when a message couldn't be sent, after retrying. `nsent` is the
+    number of messages that were sent (and recorded) before the failure."""
+
+    def __init__(self, nsent):
+        self.nsent = nsent
+        super().__init__("Sending failed after %d messages" % nsent)
+
+
+class BatchEmailSender:
+    """Sends emails in batches of `batch_size`, at most `rate_limit` messages
+    per second (zero means no limit). If a message can't be sent, the
+    connection is reopened and the message retried, up to `attempts` times in
+    total, with `retry_delay` seconds between attempts.
+
+    After `send()`, `timings` is a list of `(nmessages, elapsed)` tuples, one
+    for each batch, where `elapsed` is the time in seconds taken to send and
+    record the batch, including any throttling."""
+
+    clock = staticmethod(time.monotonic)
+    sleep = staticmethod(time.sleep)
+
+    def __init__(self, connection=None, batch_size=None, rate_limit=None, attempts=None, retry_delay=1.0):
+        self.connection = connection
+        self.batch_size = batch_size or settings.NOTIFICATIONS_EMAIL_BATCH_SIZE
+        self.rate_limit = settings.NOTIFICATIONS_EMAIL_RATE_LIMIT if rate_limit is None else rate_limit
+        self.attempts = attempts or settings.NOTIFICATIONS_EMAIL_ATTEMPTS
+        self.retry_delay = retry_delay
+        self.timings = []
+        self.nsent = 0
+
+    def send(self, items):
+        """Sends the messages in `items`, an iterable of `(message, record)`
+        tuples, where `message` is an EmailMessage and `record` the unsaved
+        SentMessage for it. `items` is consumed one batch at a time. Returns
+        the number of messages sent; raises EmailSendingError if a message
+        couldn't be sent, after recording the messages sent before it."""
+
+        connection = self.connection or mail.get_connection()
+        items = iter(items)
+        self.start = self.clock()
+
+        try:
+            connection.open()
+        except (SMTPException, OSError):
+            logger.exception("Failed to open email connection")
+            raise EmailSendingError(self.nsent)
+
+        try:
+            while True:
+                batch = list(islice(items, self.batch_size))
+                if not batch:
+                    break
+                self.send_batch(connection, batch)
+        finally:
+            connection.close()
+
+        logger.info("Sent %d emails in %d batches in %.3f seconds", self.nsent, len(self.timings), self.clock() - self.start)
+        return self.nsent
+
+    def send_batch(self, connection, batch):
+        batch_start = self.clock()
+        sent = []
+        try:
+            for message, record in batch:
+                self.throttle()
+                self.send_message(connection, message)
+                sent.append(record)
+                self.nsent += 1
+        finally:
+            # Record whatever was sent, even if the batch didn't finish
+            SentMessage.objects.bulk_create(sent)
+
+        elapsed = self.clock() - batch_start
+        logger.info("Sent batch %d of %d emails in %.3f seconds", len(self.timings) + 1, len(sent), elapsed)
+        self.timings.append((len(sent), elapsed))
+
+    def send_message(self, connection, message):
+        for attempt in range(1, self.attempts + 1):
+            try:
+                if attempt > 1:
+                    # Reconnect, in case the connection was dropped. This can
+                    # fail too if the server is still unreachable, which counts
+                    # as a failed attempt like any other.
+                    connection.close()
+                    connection.open()
+                connection.send_messages([message])
+                return
+            except (SMTPException, OSError):
+                if attempt == self.attempts:
+                    logger.exception("Failed to send email to %s, giving up after %d attempts", message.to, attempt)
+                    raise EmailSendingError(self.nsent)
+                logger.warning("Failed to send email to %s (attempt %d), retrying", message.to, attempt, exc_info=True)
+                self.sleep(self.retry_delay)
+
+    def throttle(self):
+        """Waits until sending another message would keep the average rate
+        since the start at most `rate_limit` messages per second."""
+        if not self.rate_limit:
+            return
+        wait = self.start + self.nsent / self.rate_limit - self.clock()
+        if wait > 0:
+            self.sleep(wait)
@@ -0,0 +1,113 @@
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+
+from participants.models import Adjudicator
+from tournaments.models import Tournament
+
+from ..models import BulkNotification, SentMessage
+from ..sending import BatchEmailSender, EmailSendingError
+
+
+class FlakyEmailBackend(EmailBackend):
+    """Fails to send the messages to the addresses in `failures`, once each
+    unless `always` is True. If `down` is True, the connection can't be
+    reopened after the first failure."""
+
+    def __init__(self, failures, always=False, down=False, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = set(failures)
+        self.always = always
+        self.down = down
+        self.dropped = False
+
+    def open(self):
+        if self.down and self.dropped:
+            raise ConnectionRefusedError("Connection refused")
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0] in self.failures:
+                if not self.always:
+                    self.failures.remove(message.to[0])
+                self.dropped = True
+                raise SMTPException("Connection dropped")
+        return super().send_messages(messages)
+
+
+class FakeClockSender(BatchEmailSender):
+    """Sleeping advances a fake clock, instead of actually sleeping."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestBatchEmailSender(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="emailtest", name="Email test")
+        self.notification = BulkNotification.objects.create(tournament=self.tournament)
+        self.adjs = [Adjudicator.objects.create(tournament=self.tournament, name="Adjudicator %d" % i,
+                     email="adj%d@example.com" % i) for i in range(7)]
+
+    def tearDown(self):
+        self.tournament.delete()
+
+    def items(self):
+        for adj in self.adjs:
+            message = mail.EmailMessage(subject="Hello", body="Hello", to=[adj.email])
+            record = SentMessage(recipient=adj, email=adj.email, method=SentMessage.METHOD_TYPE_EMAIL,
+                                 notification=self.notification)
+            yield message, record
+
+    def test_batches(self):
+        sender = FakeClockSender(batch_size=3, rate_limit=0)
+        self.assertEqual(sender.send(self.items()), 7)
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual([n for n, elapsed in sender.timings], [3, 3, 1])
+        self.assertEqual(SentMessage.objects.filter(notification=self.notification).count(), 7)
+
+    def test_records_sent_before_failure(self):
+        connection = FlakyEmailBackend(["adj4@example.com"], always=True)
+        sender = FakeClockSender(connection=connection, batch_size=3, rate_limit=0, attempts=2)
+        with self.assertRaises(EmailSendingError) as cm:
+            sender.send(self.items())
+        self.assertEqual(cm.exception.nsent, 4)
+        self.assertEqual(len(mail.outbox), 4)
+        recorded = SentMessage.objects.filter(notification=self.notification).values_list('email', flat=True)
+        self.assertCountEqual(recorded, ["adj%d@example.com" % i for i in range(4)])
+
+    def test_retry(self):
+        connection = FlakyEmailBackend(["adj2@example.com", "adj5@example.com"])
+        sender = FakeClockSender(connection=connection, batch_size=3, rate_limit=0, attempts=2, retry_delay=5)
+        self.assertEqual(sender.send(self.items()), 7)
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(sender.sleeps, [5, 5])
+
+    def test_reopen_fails(self):
+        connection = FlakyEmailBackend(["adj2@example.com"], down=True)
+        sender = FakeClockSender(connection=connection, batch_size=3, rate_limit=0, attempts=3)
+        with self.assertRaises(EmailSendingError) as cm:
+            sender.send(self.items())
+        self.assertEqual(cm.exception.nsent, 2)
+        self.assertEqual(len(sender.sleeps), 2)
+        self.assertEqual(SentMessage.objects.filter(notification=self.notification).count(), 2)
+
+    def test_rate_limit(self):
+        sender = FakeClockSender(batch_size=3, rate_limit=10)
+        sender.send(self.items())
+        self.assertEqual(len(sender.sleeps), 6)
+        for seconds in sender.sleeps:
+            self.assertAlmostEqual(seconds, 0.1)
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from participants.models import Person
+from tournaments.models import Tournament
+
+from ..rendering import EmailRenderer, html_to_text
+from ..utils import adjudicator_assignment_email_generator, team_draw_email_generator
+
+
+class TestDrawEmailGenerators(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+
+    def generate(self, generator, recipients, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            emails = generator(to=recipients, round=self.round, **kwargs)
+        return emails, len(queries)
+
+    def check_fixed_queries(self, generator, recipients, **kwargs):
+        ids = list(recipients.values_list('id', flat=True))
+        self.generate(generator, recipients, **kwargs)  # so that preferences are cached
+        few, few_queries = self.generate(generator, Person.objects.filter(id__in=ids[:2]), **kwargs)
+        every, every_queries = self.generate(generator, recipients, **kwargs)
+
+        self.assertEqual(few_queries, every_queries)
+        self.assertCountEqual([p.id for context, p in few], ids[:2])
+        self.assertCountEqual([p.id for context, p in every], ids)
+
+    def test_team_draw(self):
+        recipients = Person.objects.filter(speaker__team__debateteam__debate__round=self.round).distinct()
+        self.check_fixed_queries(team_draw_email_generator, recipients)
+
+    def test_adjudicator_assignment(self):
+        recipients = Person.objects.filter(adjudicator__debateadjudicator__debate__round=self.round).distinct()
+        self.check_fixed_queries(adjudicator_assignment_email_generator, recipients, url="https://example.com/")
+
+
+class TestEmailRenderer(TestCase):
+
+    def test_render(self):
+        renderer = EmailRenderer("Draw for {{ ROUND }}", "<p>Hi {{ USER }}, you're in <b>{{ VENUE }}</b></p>")
+        subject, html_body, text_body = renderer.render({'ROUND': "Round 1", 'USER': "Alice", 'VENUE': "Room 1"})
+        self.assertEqual(subject, "Draw for Round 1")
+        self.assertEqual(html_body, "<p>Hi Alice, you're in <b>Room 1</b></p>")
+        self.assertIn("Hi Alice", text_body)
+        self.assertNotIn("<b>", text_body)
+
+    def test_text_cached(self):
+        html_to_text.cache_clear()
+        renderer = EmailRenderer("Motions", "<p>The motions for {{ ROUND }} are out</p>")
+        for i in range(3):
+            renderer.render({'ROUND': "Round 1", 'USER': "Participant %d" % i})
+        self.assertEqual(html_to_text.cache_info().misses, 1)
+        self.assertEqual(html_to_text.cache_info().hits, 2)
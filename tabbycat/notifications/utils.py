@@ -8,7 +8,9 @@ called by NotificationQueueConsumer, which inserts the variables into a message,
 using the participant object to fetch their email address and to record.
 
 Objects should be fetched from the database here as it is an asyncronous process,
-thus the object itself cannot be passed.
+thus the object itself cannot be passed. Generators should fetch everything
+they need in a fixed number of queries, however many recipients there are, as
+notifications can go to thousands of participants at once.
 """
 
 from django.utils import formats
@@ -17,9 +19,11 @@ from django.utils.translation import gettext as _
 
 from adjallocation.allocation import AdjudicatorAllocation
 from options.utils import use_team_code_names
-from participants.prefetch import populate_win_counts
-from results.result import ConsensusDebateResultWithScores, DebateResult, DebateResultByAdjudicatorWithScores
+from results.prefetch import populate_confirmed_ballots
+from results.result import ConsensusDebateResultWithScores, DebateResultByAdjudicatorWithScores
 from results.utils import side_and_position_names
+from standings.cache import generate_cached
+from standings.teams import TeamStandingsGenerator
 
 
 adj_position_names = {
@@ -49,7 +53,7 @@ def _check_in_to(pk, to_ids):
 def adjudicator_assignment_email_generator(to, url, round):
     emails = []
     to_ids = {p.id for p in to}
-    draw = round.debate_set_with_prefetches(speakers=False).filter(debateadjudicator__adjudicator__in=to)
+    draw = round.debate_set_with_prefetches(speakers=False).filter(debateadjudicator__adjudicator__in=to).distinct()
     use_codes = use_team_code_names(round.tournament, False)
 
     for debate in draw:
@@ -84,9 +88,10 @@ def randomized_url_email_generator(to, url, tournament):
 def ballots_email_generator(to, debate):  # "to" is unused
     emails = []
     tournament = debate.round.tournament
-    results = DebateResult(debate.confirmed_ballot)
+    populate_confirmed_ballots([debate], results=True)
+    results = debate.confirmed_ballot.result
     round_name = _("%(tournament)s %(round)s @ %(room)s") % {'tournament': str(tournament),
-                                                             'round': debate.round.name, 'room': debate.venue.name}
+        'round': debate.round.name, 'room': debate.venue.name if debate.venue is not None else _("TBA")}
 
     use_codes = use_team_code_names(tournament, False)
 
@@ -156,12 +161,13 @@ def standings_email_generator(to, url, round):
         'URL': url,
     }
 
-    teams = round.active_teams.filter(speaker__in=to).prefetch_related('speaker_set')
-    populate_win_counts(teams, round)
+    teams = round.active_teams.filter(speaker__in=to).distinct().prefetch_related('speaker_set')
+    generator = TeamStandingsGenerator(('points',), ())
+    standings = generate_cached(generator, round.tournament.team_set.all(), round=round)
 
     for team in teams:
         context_team = context.copy()
-        context_team['POINTS'] = str(team._points)
+        context_team['POINTS'] = str(standings.get_standing(team).metrics['points'])
         context_team['TEAM'] = team.short_name
 
         for speaker in team.speaker_set.all():
@@ -177,26 +183,25 @@ def standings_email_generator(to, url, round):
 
 
 def motion_release_email_generator(to, round):
-    def _create_motion_list():
-        motion_list = "<ul>"
-        for motion in round.motion_set.all():
-            motion_list += _("<li>%(text)s (%(ref)s)</li>") % {'text': motion.text, 'ref': motion.reference}
+    motion_list = "<ul>"
+    for motion in round.motion_set.all():
+        motion_list += _("<li>%(text)s (%(ref)s)</li>") % {'text': motion.text, 'ref': motion.reference}
 
-            if motion.info_slide:
-                motion_list += "   %s\n" % (motion.info_slide)
+        if motion.info_slide:
+            motion_list += "   %s\n" % (motion.info_slide)
 
-        motion_list += "</ul>"
+    motion_list += "</ul>"
 
-        return mark_safe(motion_list)
-
-    return [({'TOURN': str(round.tournament), 'ROUND': round.name, 'MOTIONS': _create_motion_list(), 'USER': p.name}, p) for p in to]
+    context = {'TOURN': str(round.tournament), 'ROUND': round.name, 'MOTIONS': mark_safe(motion_list)}
+    return [({**context, 'USER': p.name}, p) for p in to]
 
 
 def team_speaker_email_generator(to, tournament):
     emails = []
     to_ids = {p.id for p in to}
 
-    teams = tournament.team_set.filter(speaker__in=to).prefetch_related('speaker_set', 'break_categories').select_related('institution')
+    teams = tournament.team_set.filter(speaker__in=to).distinct().prefetch_related(
+        'speaker_set', 'break_categories').select_related('institution')
     for team in teams:
         context = {
             'TOURN': str(tournament),
@@ -225,14 +230,14 @@ def team_draw_email_generator(to, round):
     emails = []
     to_ids = {p.id for p in to}
     tournament = round.tournament
-    draw = round.debate_set_with_prefetches(speakers=True).filter(debateteam__team__speaker__in=to)
+    draw = round.debate_set_with_prefetches(speakers=True).filter(debateteam__team__speaker__in=to).distinct()
     use_codes = use_team_code_names(tournament, False)
 
     for debate in draw:
         matchup = debate.matchup_codes if use_codes else debate.matchup
         context = {
             'ROUND': round.name,
-            'VENUE': debate.venue.name,
+            'VENUE': debate.venue.name if debate.venue is not None else _("TBA"),
             'PANEL': _assemble_panel(debate.adjudicators.with_positions()),
             'DRAW': matchup,
         }
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def convert_draw_strength_preference(apps, schema_editor):
+    """Draw strength by wins used to sum opponents' points. Where points can
+    differ from wins (BP, or any round with a weight other than 1), change it
+    to draw strength by points, so that standings don't change."""
+
+    Tournament = apps.get_model('tournaments', 'Tournament')  # noqa: N806
+    TournamentPreferenceModel = apps.get_model('options', 'TournamentPreferenceModel')  # noqa: N806
+
+    for tournament in Tournament.objects.all():
+        is_bp = TournamentPreferenceModel.objects.filter(section='debate_rules', name='teams_in_debate',
+                instance_id=tournament.id, raw_value='bp').exists()
+        is_weighted = tournament.round_set.exclude(weight=1).exists()
+        if not is_bp and not is_weighted:
+            continue
+
+        for pref in TournamentPreferenceModel.objects.filter(section='standings', instance_id=tournament.id,
+                name__in=['team_standings_precedence', 'team_standings_extra_metrics']):
+            metrics = pref.raw_value.split('//')
+            if 'draw_strength' not in metrics:
+                continue
+            pref.raw_value = '//'.join('draw_strength_points' if m == 'draw_strength' else m for m in metrics)
+            pref.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('options', '0009_create_motions_section'),
+        ('tournaments', '0009_auto_20201126_0037'),
+    ]
+
+    operations = [
+        migrations.RunPython(convert_draw_strength_preference,
+            migrations.RunPython.noop,
+            elidable=True),
+    ]
@@ -230,6 +230,7 @@ class DrawAvoidConflicts(ChoicePreference):
     choices = (
         ('off', _("Off")),
         ('one_up_one_down', _("One-up-one-down")),
+        ('assignment', _("Minimum-conflict reassignment within brackets")),
     )
     default = 'one_up_one_down'
 
@@ -315,6 +316,21 @@ class BPAssignmentMethod(ChoicePreference):
     default = 'hungarian_preshuffled'
 
 
+@tournament_preferences_registry.register
+class VenueAllocationMethod(ChoicePreference):
+    help_text = _("Which method to use to auto-allocate rooms. The Hungarian algorithm "
+                  "finds the allocation that best satisfies room constraints overall, "
+                  "but may give different allocations from earlier versions of Tabbycat.")
+    verbose_name = _("Room allocation method")
+    section = draw_rules
+    name = 'venue_allocation_method'
+    choices = (
+        ('greedy', _("Greedy (highest-priority constraints first)")),
+        ('hungarian', _("Hungarian algorithm")),
+    )
+    default = 'greedy'
+
+
 @tournament_preferences_registry.register
 class SkipAdjCheckins(BooleanPreference):
     help_text = _("Automatically make all adjudicators available for all rounds")
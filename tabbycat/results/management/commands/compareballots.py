@@ -17,6 +17,9 @@ class Command(TournamentCommand):
         super(Command, self).add_arguments(parser)
         parser.add_argument("-c", "--compare", type=str, required=True,
                             help="Tournament to compare to")
+        parser.add_argument("-f", "--fingerprints", action="store_true", default=False,
+                            help="Compare result fingerprints first, and only compare individual "
+                                 "scores for debates whose fingerprints differ")
 
     def handle_tournament(self, tournament, **options):
 
@@ -25,6 +28,7 @@ class Command(TournamentCommand):
 
         no_original = 0
         no_check = 0
+        matched = 0
 
         for debate in debates:
             if not debate.confirmed_ballot:
@@ -44,7 +48,12 @@ class Command(TournamentCommand):
                 no_check += 1
                 continue
 
-            # Can't use DebateResult.identical(), because this involves different objects
+            # Can't use DebateResult.identical(), because this involves different
+            # objects, but portable fingerprints identify participants by name
+            if options['fingerprints'] and \
+                    original.result.fingerprint(portable=True) == compare.result.fingerprint(portable=True):
+                matched += 1
+                continue
 
             if original.motion != compare.motion:
                 self.stdout.write("{debate}: original motion={orig}, check motion={check}".format(
@@ -80,6 +89,8 @@ class Command(TournamentCommand):
                         dt=ssba.debate_team, pos=ssba.position, adj=ssba.debate_adjudicator.adjudicator,
                         orig=ssba.score, check=cssba.score))
 
+        if options['fingerprints']:
+            self.stdout.write("{:d} debates had matching fingerprints".format(matched))
         if no_original:
             self.stdout.write("WARNING: original ballots for {:d} debates not found".format(no_original))
         if no_check:
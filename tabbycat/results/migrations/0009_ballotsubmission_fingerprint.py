@@ -0,0 +1,18 @@
+# Generated by Django 3.1.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0008_auto_20201126_0037'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ballotsubmission',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the result, set when it is saved, used to find identical ballots', max_length=40, verbose_name='fingerprint'),
+        ),
+    ]
@@ -110,6 +110,9 @@ class BallotSubmission(Submission):
         verbose_name=_("motion"))
     discarded = models.BooleanField(default=False,
         verbose_name=_("discarded"))
+    fingerprint = models.CharField(max_length=40, blank=True, editable=False,
+        verbose_name=_("fingerprint"),
+        help_text=_("Hash of the result, set when it is saved, used to find identical ballots"))
 
     class Meta:
         unique_together = [('debate', 'version')]
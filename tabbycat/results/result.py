@@ -17,8 +17,8 @@ A debate result class is associated with a ballot submission, not a debate. This
 allows multiple versions of the result to be retained for a single debate, which
 helps avoid data loss when multiple results are (presumably erroneously)
 submitted. However, these classes do not edit or save the BallotSubmission
-instances; the instance passed to it is used only for looking up related
-objects.
+instances (other than their fingerprint); the instance passed to it is used only
+for looking up related objects.
 
 Notes on terminology:
  - "Position" in this file always means speaker position as a number. Replies
@@ -38,10 +38,13 @@ A few notes on error checking:
    methods specific to classes inheriting `ScoreMixin` (in scoresheet.py).
 """
 
+import hashlib
 import logging
 from functools import wraps
 from statistics import mean
 
+from django.db import transaction
+
 from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import DebateAdjudicator
 
@@ -82,6 +85,14 @@ def get_class_name(round, tournament=None):
     return get_result_class(round, tournament).__name__
 
 
+def _identity(obj, portable, name_attr='name'):
+    """Returns how result fingerprints identify `obj`: by its ID, or if
+    `portable` is True, by its name."""
+    if obj is None:
+        return None
+    return getattr(obj, name_attr) if portable else obj.id
+
+
 def DebateResult(ballotsub, *args, **kwargs):  # noqa: N802 (factory function)
     """Factory function. Returns an instance of a subclass of BaseDebateResult
     appropriate for the ballot submission's tournament's settings.
@@ -231,6 +242,30 @@ class BaseDebateResult:
             return False
         return True
 
+    def fingerprint_data(self, portable=False):
+        """Returns a tuple of everything that goes into the fingerprint: the
+        debate, motion and everything compared by `identical()`. Subclasses
+        should extend this method as necessary.
+
+        If `portable` is True, participants and the motion are identified by
+        name rather than ID, and the debate is left out, so that results can be
+        compared with those in other tournaments."""
+        if portable:
+            motion = self.ballotsub.motion
+            teams = tuple((side, _identity(dt and dt.team, True, 'short_name')) for side, dt in self.debateteams.items())
+            return (('motion', motion and motion.reference), ('teams', teams))
+
+        teams = tuple((side, _identity(dt, False)) for side, dt in self.debateteams.items())
+        return (('debate', self.debate.id), ('motion', self.ballotsub.motion_id), ('teams', teams))
+
+    def fingerprint(self, portable=False):
+        """Returns a hash of `self.fingerprint_data()`. Two results for the same
+        debate have the same fingerprint if and only if they're identical and
+        have the same motion, so ballot submissions can be grouped by it,
+        rather than compared in pairs."""
+        data = repr(self.fingerprint_data(portable))
+        return hashlib.sha1(data.encode()).hexdigest()
+
     # --------------------------------------------------------------------------
     # Load and save methods
     # --------------------------------------------------------------------------
@@ -258,28 +293,83 @@ class BaseDebateResult:
 
     def save(self):
         """Saves to the database.
-        Raises ResultError if the ballot set is incomplete or invalid."""
+        Raises ResultError if the ballot set is incomplete or invalid.
+
+        All scores are computed in memory by `self.get_unsaved_scores()`, then
+        written in one transaction. Scores that already exist for the ballot
+        submission are updated, and the rest are created. This takes a fixed
+        number of queries for each kind of score, however many adjudicators
+        and speakers there are. The debate's standings records are then
+        rebuilt from the saved scores."""
+        from standings.records import update_debate_records  # circular import
+
+        scores_by_model = {}
+        for score in self.get_unsaved_scores():
+            scores_by_model.setdefault(type(score), []).append(score)
+
+        with transaction.atomic():
+            for model, scores in scores_by_model.items():
+                self.upsert_scores(model, scores)
+            self.save_fingerprint()
+            update_debate_records(self.debate)
+
+    def upsert_scores(self, model, scores):
+        """Saves `scores`, which must be unsaved instances of `model` for this
+        ballot submission, updating existing instances with the same values in
+        their unique fields. Takes at most three queries."""
+
+        key_fields = [model._meta.get_field(name).attname for name in model._meta.unique_together[0]
+                      if name != 'ballot_submission']
+        existing = {tuple(row[:-1]): row[-1] for row in
+                    model.objects.filter(ballot_submission=self.ballotsub).values_list(*key_fields, 'id')}
+
+        to_update = []
+        to_create = []
+        for score in scores:
+            score.pk = existing.get(tuple(getattr(score, field) for field in key_fields))
+            if score.pk is None:
+                to_create.append(score)
+            else:
+                to_update.append(score)
+
+        update_fields = self.get_defaults_field_names(model._meta.model_name)
+        if to_update and update_fields:
+            model.objects.bulk_update(to_update, update_fields)
+        if to_create:
+            model.objects.bulk_create(to_create)
+
+    def save_fingerprint(self):
+        """Stores the fingerprint on the BallotSubmission, without saving any
+        other fields of it."""
+        self.ballotsub.fingerprint = self.fingerprint()
+        type(self.ballotsub).objects.filter(pk=self.ballotsub.pk).update(fingerprint=self.ballotsub.fingerprint)
+
+    def get_unsaved_scores(self):
+        """Returns a list of the unsaved score instances that `save()` would
+        create for a new ballot submission. This is also for callers that save
+        many results at once, using `bulk_create()`; unlike `save()`, it doesn't
+        update existing scores. Raises ResultError if the ballot set is
+        incomplete or invalid. Subclasses that save other kinds of scores
+        should extend this method to include them."""
 
         if not self.is_valid():
             raise ResultError("Tried to save an invalid result.")
 
-        for side in self.sides:
-            dt = self.debateteams[side]
-
-            self.ballotsub.teamscore_set.update_or_create(debate_team=dt,
-                    defaults=self.get_defaults_fields('teamscore', side))
+        model = self.ballotsub.teamscore_set.model
+        return [model(ballot_submission=self.ballotsub, debate_team=self.debateteams[side],
+                      **self.get_defaults_fields('teamscore', side)) for side in self.sides]
 
-    def get_defaults_fields(self, model, *args):
-        """Collects fields defined in subclasses"""
-        fields = {}
+    def get_defaults_field_names(self, model):
+        """Returns the names of fields of `model` that subclasses define"""
         model_fields = getattr(self, '%s_fields' % model, None)
         if model_fields is None:
             raise ResultError("Unrecognized model: %s" % model)
-        for field in model_fields:
-            get_field = getattr(self, '%s_field_%s' % (model, field), None)
-            if get_field is not None:
-                fields[field] = get_field(*args)
-        return fields
+        return [field for field in model_fields if hasattr(self, '%s_field_%s' % (model, field))]
+
+    def get_defaults_fields(self, model, *args):
+        """Collects fields defined in subclasses"""
+        return {field: getattr(self, '%s_field_%s' % (model, field))(*args)
+                for field in self.get_defaults_field_names(model)}
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -404,6 +494,11 @@ class DebateResultByAdjudicator(BaseDebateResult):
                 return False
         return True
 
+    def fingerprint_data(self, portable=False):
+        sheets = sorted(((_identity(adj, portable), sheet.fingerprint_data())
+                for adj, sheet in self.scoresheets.items()), key=repr)
+        return super().fingerprint_data(portable) + (('scoresheets', tuple(sheets)),)
+
     # --------------------------------------------------------------------------
     # Load and save methods
     # --------------------------------------------------------------------------
@@ -428,16 +523,14 @@ class DebateResultByAdjudicator(BaseDebateResult):
         for tsba in teamscorebyadjs:
             self.add_winner(tsba.debate_adjudicator.adjudicator, tsba.debate_team.side)
 
-    def save(self):
-        super().save()
-
-        for adj, sheet in self.scoresheets.items():
-            da = self.debateadjs[adj]
+    def get_unsaved_scores(self):
+        scores = super().get_unsaved_scores()
+        model = self.ballotsub.teamscorebyadj_set.model
+        for adj in self.scoresheets:
             for side in self.sides:
-                dt = self.debateteams[side]
-                self.ballotsub.teamscorebyadj_set.update_or_create(
-                    debate_team=dt, debate_adjudicator=da,
-                    defaults=self.get_defaults_fields('teamscorebyadj', adj, side))
+                scores.append(model(ballot_submission=self.ballotsub, debate_team=self.debateteams[side],
+                        debate_adjudicator=self.debateadjs[adj], **self.get_defaults_fields('teamscorebyadj', adj, side)))
+        return scores
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -644,6 +737,11 @@ class DebateResultWithScoresMixin:
             return False
         return True
 
+    def fingerprint_data(self, portable=False):
+        speakers = tuple((side, tuple((_identity(self.speakers[side][pos], portable), self.ghosts[side][pos])
+                for pos in self.positions)) for side in self.sides)
+        return super().fingerprint_data(portable) + (('speakers', speakers),)
+
     # --------------------------------------------------------------------------
     # Load and save methods
     # --------------------------------------------------------------------------
@@ -667,14 +765,14 @@ class DebateResultWithScoresMixin:
             self.speakers[ss.debate_team.side][ss.position] = ss.speaker
             self.ghosts[ss.debate_team.side][ss.position] = ss.ghost
 
-    def save(self):
-        super().save()
-
+    def get_unsaved_scores(self):
+        scores = super().get_unsaved_scores()
+        model = self.ballotsub.speakerscore_set.model
         for side in self.sides:
-            dt = self.debateteams[side]
             for pos in self.positions:
-                self.ballotsub.speakerscore_set.update_or_create(debate_team=dt,
-                    position=pos, defaults=self.get_defaults_fields('speakerscore', side, pos))
+                scores.append(model(ballot_submission=self.ballotsub, debate_team=self.debateteams[side],
+                        position=pos, **self.get_defaults_fields('speakerscore', side, pos)))
+        return scores
 
     # --------------------------------------------------------------------------
     # Data setting and retrieval
@@ -836,6 +934,9 @@ class ConsensusDebateResult(BaseDebateResult):
     def identical(self, other):
         return super().identical(other) and self.scoresheet.identical(other.scoresheet)
 
+    def fingerprint_data(self, portable=False):
+        return super().fingerprint_data(portable) + (('scoresheet', self.scoresheet.fingerprint_data()),)
+
     # --------------------------------------------------------------------------
     # Team score fields
     # --------------------------------------------------------------------------
@@ -914,17 +1015,16 @@ class DebateResultByAdjudicatorWithScores(DebateResultWithScoresMixin, DebateRes
             self.set_score(ssba.debate_adjudicator.adjudicator,
                            ssba.debate_team.side, ssba.position, ssba.score)
 
-    def save(self):
-        super().save()
-
-        for adj, sheet in self.scoresheets.items():
-            da = self.debateadjs[adj]
+    def get_unsaved_scores(self):
+        scores = super().get_unsaved_scores()
+        model = self.ballotsub.speakerscorebyadj_set.model
+        for adj in self.scoresheets:
             for side in self.sides:
-                dt = self.debateteams[side]
                 for pos in self.positions:
-                    self.ballotsub.speakerscorebyadj_set.update_or_create(
-                        debate_team=dt, debate_adjudicator=da, position=pos,
-                        defaults=self.get_defaults_fields('speakerscorebyadj', adj, side, pos))
+                    scores.append(model(ballot_submission=self.ballotsub, debate_team=self.debateteams[side],
+                            debate_adjudicator=self.debateadjs[adj], position=pos,
+                            **self.get_defaults_fields('speakerscorebyadj', adj, side, pos)))
+        return scores
 
     def set_score(self, adjudicator, side, position, score):
         try:
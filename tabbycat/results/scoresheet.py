@@ -31,6 +31,11 @@ class BaseScoresheet:
         """Base implementation. Does nothing."""
         return True
 
+    def fingerprint_data(self):
+        """Returns a tuple of everything compared by `identical()`, for use in
+        result fingerprints. Base implementation. Returns an empty tuple."""
+        return ()
+
     def winners(self):
         """Returns {'aff'} is the affirmative team won, and {'neg'} if the negative
         team won. `self._get_winners()` must be implemented by subclasses."""
@@ -72,6 +77,12 @@ class ScoresMixin:
     def identical(self, other):
         return super().identical(other) and self.scores == other.scores
 
+    def fingerprint_data(self):
+        # Scores are floats in the database, but might not be when set directly
+        scores = tuple((s, tuple(None if self.scores[s][p] is None else float(self.scores[s][p])
+                for p in self.positions)) for s in self.sides)
+        return super().fingerprint_data() + (('scores', scores),)
+
 
 class DeclaredWinnersMixin:
     """Provides functionality for explicit declaration of winner(s)."""
@@ -97,6 +108,10 @@ class DeclaredWinnersMixin:
     def identical(self, other):
         return super().identical(other) and set(self.declared_winners) == set(other.declared_winners)
 
+    def fingerprint_data(self):
+        winners = tuple(sorted(self.declared_winners, key=str))
+        return super().fingerprint_data() + (('declared_winners', winners),)
+
     def _get_winners(self):
         assert len(self.declared_winners) == self.number_winners, "There can only be this number of winners: %d" % self.number_winners
         return self.declared_winners
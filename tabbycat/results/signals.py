@@ -0,0 +1,22 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore, TeamScoreByAdj
+
+
+@receiver(post_delete, sender=SpeakerScore)
+@receiver(post_save, sender=SpeakerScore)
+@receiver(post_delete, sender=SpeakerScoreByAdj)
+@receiver(post_save, sender=SpeakerScoreByAdj)
+@receiver(post_delete, sender=TeamScore)
+@receiver(post_save, sender=TeamScore)
+@receiver(post_delete, sender=TeamScoreByAdj)
+@receiver(post_save, sender=TeamScoreByAdj)
+def clear_fingerprint(sender, instance, raw=False, **kwargs):
+    # Scores written by DebateResult.save() don't send signals; that sets the
+    # fingerprint itself. This catches scores edited directly, whose ballot
+    # submission's fingerprint would otherwise be stale. It's recomputed when
+    # next needed; see populate_identical_ballotsub_lists().
+    if raw:
+        return
+    BallotSubmission.objects.filter(pk=instance.ballot_submission_id).update(fingerprint="")
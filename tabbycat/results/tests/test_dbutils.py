@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from standings.records import records_complete
+from tournaments.models import Tournament
+
+from ..dbutils import add_results_to_round_in_bulk, fill_scoresheet_directly
+from ..models import BallotSubmission
+from ..result import DebateResult
+from ..scoresheet import (BPEliminationScoresheet, BPScoresheet, HighPointWinsRequiredScoresheet,
+                          LowPointWinsAllowedScoresheet, ResultOnlyScoresheet, TiedPointWinsAllowedScoresheet)
+
+
+class TestFillScoresheetDirectly(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+        self.positions = self.tournament.positions
+
+    def test_always_valid(self):
+        # Narrow ranges make tied totals common, so that tie-breaking gets tested
+        ranges = {pos: (70, 72, 1.0) for pos in self.positions}
+        if self.tournament.reply_position is not None:
+            ranges[self.tournament.reply_position] = (70, 71, 0.5)
+
+        for scoresheet_class in [HighPointWinsRequiredScoresheet, TiedPointWinsAllowedScoresheet,
+                LowPointWinsAllowedScoresheet, ResultOnlyScoresheet, BPScoresheet, BPEliminationScoresheet]:
+            with self.subTest(scoresheet_class=scoresheet_class.__name__):
+                for i in range(100):
+                    scoresheet = scoresheet_class(positions=self.positions)
+                    fill_scoresheet_directly(scoresheet, self.tournament, ranges)
+                    self.assertTrue(scoresheet.is_valid())
+
+    def test_scores_in_range(self):
+        scoresheet = HighPointWinsRequiredScoresheet(positions=self.positions)
+        fill_scoresheet_directly(scoresheet, self.tournament)
+        t = self.tournament
+        for side in scoresheet.sides:
+            for pos in self.positions:
+                score = scoresheet.get_score(side, pos)
+                prefix = 'reply_score' if pos == t.reply_position else 'score'
+                self.assertGreaterEqual(score, t.pref(prefix + '_min'))
+                self.assertLessEqual(score, t.pref(prefix + '_max'))
+
+
+class TestAddResultsToRoundInBulk(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+        self.user = get_user_model().objects.create_user("simulator", "", "simulator")
+
+    def test_results_saved(self):
+        results = add_results_to_round_in_bulk(self.round, BallotSubmission.SUBMITTER_TABROOM, self.user, confirmed=True)
+        self.assertEqual(len(results), self.round.debate_set.count())
+
+        for debate in self.round.debate_set.all():
+            ballotsubs = debate.ballotsubmission_set.filter(confirmed=True)
+            self.assertEqual(ballotsubs.count(), 1)
+            ballotsub = ballotsubs.get()
+            self.assertEqual(ballotsub.version, debate.ballotsubmission_set.count())
+
+            result = DebateResult(ballotsub)
+            self.assertTrue(result.is_valid())
+            self.assertEqual(result.fingerprint(), ballotsub.fingerprint)
+
+        self.assertTrue(records_complete(self.tournament, self.round))
@@ -1,11 +1,16 @@
 import logging
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from draw.models import Debate, DebateTeam
 from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore
 from results.result import ConsensusDebateResultWithScores, DebateResultByAdjudicatorWithScores, ResultError    # absolute import to keep logger's name consistent
+from results.utils import populate_identical_ballotsub_lists
+from standings.models import TeamStandingsRecord
+from standings.records import records_complete
 from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
 from venues.models import Venue
@@ -146,6 +151,11 @@ class BaseTestDebateResult(TestCase):
         return self.debate_result_class(ballotsub)
 
     def save_complete_result(self, testdata, post_create=None):
+        result = self.fill_complete_result(testdata, post_create)
+        with suppress_logs('results.result', logging.WARNING):
+            result.save()
+
+    def fill_complete_result(self, testdata, post_create=None):
 
         nspeakers = testdata['num_speakers_per_team']
 
@@ -161,9 +171,7 @@ class BaseTestDebateResult(TestCase):
             # ghost fields should be False by default
 
         self.save_scores_to_result(testdata, result)
-
-        with suppress_logs('results.result', logging.WARNING):
-            result.save()
+        return result
 
     def _get_speakerscore_in_db(self, side, pos):
         return SpeakerScore.objects.get(
@@ -205,6 +213,54 @@ class GeneralSpeakerTestsMixin:
         speaker = self.teams[0].speaker_set.first()
         self.assertRaises(TypeError, result.set_speaker, 'aff', 1, speaker)
 
+    def test_fingerprint_saved(self):
+        self.save_complete_result(self.testdata['high'])
+        result = self.get_result()
+        self.assertEqual(result.ballotsub.fingerprint, result.fingerprint())
+
+    def test_fingerprint_cleared_by_score_write(self):
+        self.save_complete_result(self.testdata['high'])
+        ballotsub = self.debate.ballotsubmission_set.get()
+        teamscore = ballotsub.teamscore_set.first()
+        teamscore.score += 1
+        teamscore.save()
+        ballotsub.refresh_from_db()
+        self.assertEqual(ballotsub.fingerprint, "")
+
+        populate_identical_ballotsub_lists([ballotsub])
+        ballotsub.refresh_from_db()
+        self.assertEqual(ballotsub.fingerprint, self.debate_result_class(ballotsub).fingerprint())
+
+    def test_fingerprint_identical(self):
+        self.save_complete_result(self.testdata['high'])
+        self.save_complete_result(self.testdata['high'])
+        ballotsubs = self.debate.ballotsubmission_set.order_by('version')
+        result1, result2 = [self.debate_result_class(ballotsub) for ballotsub in ballotsubs]
+        self.assertTrue(result1.identical(result2))
+        self.assertEqual(result1.fingerprint(), result2.fingerprint())
+
+        result2.ghosts['aff'][1] = True
+        self.assertFalse(result1.identical(result2))
+        self.assertNotEqual(result1.fingerprint(), result2.fingerprint())
+
+    def test_standings_records_saved(self):
+        # The ballot submission is confirmed before its scores are saved
+        self.save_complete_result(self.testdata['high'])
+        ballotsub = self.get_result().ballotsub
+        records = TeamStandingsRecord.objects.filter(ballot_submission=ballotsub)
+        self.assertEqual({r.team_id: r.score for r in records},
+                         {ts.debate_team.team_id: ts.score for ts in ballotsub.teamscore_set.select_related('debate_team')})
+        self.assertTrue(records_complete(self.tournament))
+
+    def test_populate_identical_ballotsub_lists(self):
+        self.save_complete_result(self.testdata['high'])
+        self.save_complete_result(self.testdata['high'])
+        self.save_complete_result(self.testdata['low'])
+        BallotSubmission.objects.filter(version=1).update(fingerprint="")  # as if saved before fingerprints
+        ballotsubs = self.debate.ballotsubmission_set.order_by('version')
+        populate_identical_ballotsub_lists(ballotsubs)
+        self.assertEqual([b.identical_ballotsub_versions for b in ballotsubs], [[2], [1], []])
+
     @incomplete_test
     def test_unfilled_debateteam(self, result):
         result.debateteams["aff"] = None
@@ -619,6 +675,35 @@ class TestVotingDebateResultWithScores(GeneralSpeakerTestsMixin, BaseTestDebateR
                 self.assertAlmostEqual(self._get_teamscore_in_db(side).margin, margin)
                 self.assertAlmostEqual(result.teamscore_field_margin(side), margin)
 
+    def count_save_queries(self, testdata):
+        """Returns the number of queries taken to save a new result, and to
+        save it again over the existing scores."""
+        result = self.fill_complete_result(testdata)
+        counts = []
+        for i in range(2):
+            with CaptureQueriesContext(connection) as context, suppress_logs('results.result', logging.WARNING):
+                result.save()
+            counts.append(len(context.captured_queries))
+        return counts
+
+    def test_save_queries_independent_of_panel_size(self):
+        self.assertEqual(self.count_save_queries(self.testdata['solo']),
+                         self.count_save_queries(self.testdata['high']))
+
+    def test_save_updates_existing_scores(self):
+        self.save_complete_result(self.testdata['high'])
+        result = self.get_result()
+        result.set_score(self.adjs[0], 'aff', 1, 70.0)
+        with suppress_logs('results.result', logging.WARNING):
+            result.save()
+
+        ballotsub = result.ballotsub
+        self.assertEqual(ballotsub.speakerscorebyadj_set.count(), 3 * 2 * 4)
+        self.assertEqual(ballotsub.teamscorebyadj_set.count(), 3 * 2)
+        self.assertEqual(ballotsub.speakerscorebyadj_set.get(
+            debate_adjudicator__adjudicator=self.adjs[0], debate_team__side='aff', position=1).score, 70.0)
+        self.assertEqual(self.get_result().get_score(self.adjs[0], 'aff', 1), 70.0)
+
     @incomplete_test
     def test_unfilled_scoresheet_score(self, result):
         result.scoresheets[self.adjs[0]].scores["aff"][1] = None
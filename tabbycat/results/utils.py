@@ -1,5 +1,5 @@
 import logging
-from itertools import combinations
+from collections import defaultdict
 
 from django.contrib.humanize.templatetags.humanize import ordinal
 from django.db.models import Count
@@ -112,21 +112,30 @@ def populate_identical_ballotsub_lists(ballotsubs):
     that are identical to it.
 
     Two ballot submissions are identical if they share the same debate, motion,
-    speakers and all speaker scores."""
+    speakers and all speaker scores, i.e., if they have the same fingerprint.
+    Stored fingerprints are used where available; results are only loaded for
+    ballot submissions that don't have one (because they were saved before
+    fingerprints existed, or their scores have since been edited directly),
+    whose fingerprints are then computed and stored."""
 
+    from .models import BallotSubmission
     from .prefetch import populate_results
-    populate_results(ballotsubs)
 
-    for ballotsub in ballotsubs:
-        ballotsub.identical_ballotsub_versions = []
-
-    for ballotsub1, ballotsub2 in combinations(ballotsubs, 2):
-        if ballotsub1.result.identical(ballotsub2.result):
-            ballotsub1.identical_ballotsub_versions.append(ballotsub2.version)
-            ballotsub2.identical_ballotsub_versions.append(ballotsub1.version)
+    unfingerprinted = [ballotsub for ballotsub in ballotsubs if not ballotsub.fingerprint]
+    if unfingerprinted:
+        populate_results(unfingerprinted)
+        for ballotsub in unfingerprinted:
+            ballotsub.fingerprint = ballotsub.result.fingerprint()
+        BallotSubmission.objects.bulk_update(unfingerprinted, ['fingerprint'])
 
+    groups = defaultdict(list)
     for ballotsub in ballotsubs:
-        ballotsub.identical_ballotsub_versions.sort()
+        groups[ballotsub.fingerprint].append(ballotsub)
+
+    for group in groups.values():
+        versions = [ballotsub.version for ballotsub in group]
+        for ballotsub in group:
+            ballotsub.identical_ballotsub_versions = sorted(v for v in versions if v != ballotsub.version)
 
 
 _BP_POSITION_NAMES = [
@@ -198,7 +198,9 @@ PUBLIC_FAST_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_FAST_CACHE_TIMEOUT', 60 *
 PUBLIC_SLOW_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_SLOW_CACHE_TIMEOUT', 60 * 3.5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
 
-# Default non-heroku cache is to use local memory
+# Default non-heroku cache is to use local memory. This isn't shared with the
+# channels workers, so data that workers use (e.g. conflict and history
+# snapshots) isn't cached at all; see utils.misc.cache_is_shared().
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -268,6 +270,19 @@ for app in TABBYCAT_APPS:
 
 MESSAGE_TAGS = {messages.ERROR: 'danger', }
 
+# ==============================================================================
+# Notifications
+# ==============================================================================
+
+# Emails are sent in batches over one connection, and recorded after each batch.
+# The rate limit is in messages per second; zero means no limit. Each message
+# is attempted up to NOTIFICATIONS_EMAIL_ATTEMPTS times; if it still fails, the
+# notification is queued to resume, up to NOTIFICATIONS_EVENT_ATTEMPTS times.
+NOTIFICATIONS_EMAIL_BATCH_SIZE = int(os.environ.get('NOTIFICATIONS_EMAIL_BATCH_SIZE', 100))
+NOTIFICATIONS_EMAIL_RATE_LIMIT = float(os.environ.get('NOTIFICATIONS_EMAIL_RATE_LIMIT', 0))
+NOTIFICATIONS_EMAIL_ATTEMPTS = int(os.environ.get('NOTIFICATIONS_EMAIL_ATTEMPTS', 3))
+NOTIFICATIONS_EVENT_ATTEMPTS = int(os.environ.get('NOTIFICATIONS_EVENT_ATTEMPTS', 3))
+
 # ==============================================================================
 # Summernote (WYSWIG)
 # ==============================================================================
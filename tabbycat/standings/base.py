@@ -6,6 +6,7 @@ import random
 from django.utils.translation import gettext as _
 
 from .metrics import metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .records import records_complete
 
 logger = logging.getLogger(__name__)
 
@@ -257,6 +258,42 @@ class Standings:
     def filter(self, include_filter):
         self.infos = {instance: info for instance, info in self.infos.items() if include_filter(info)}
 
+    def get_cache_data(self):
+        """Returns a picklable representation of these standings, from which
+        `from_cache_data()` can restore them. Only what the generator produces
+        is included; attributes added afterwards (e.g. by views) are not."""
+        return {
+            'metric_specs': self._metric_specs,
+            'metric_ascending': self.metric_ascending,
+            'ranking_specs': self._ranking_specs,
+            'infos': {info.instance_id: (info.metrics, info.rankings) for info in self.infoview()},
+            'order': [info.instance_id for info in self._standings] if self.ranked else None,
+        }
+
+    @classmethod
+    def from_cache_data(cls, data, instances, rank_filter=None):
+        """Restores standings from `get_cache_data()` for the given instances.
+        Instances not in the cached standings are left out."""
+        standings = cls([i for i in instances if i.id in data['infos']], rank_filter=rank_filter)
+
+        for key, name, abbr, icon in data['metric_specs']:
+            standings.record_added_metric(key, name, abbr, icon, data['metric_ascending'][key])
+        for spec in data['ranking_specs']:
+            standings.record_added_ranking(*spec)
+
+        infos_by_id = {}
+        for info in standings.infoview():
+            metrics, rankings = data['infos'][info.instance_id]
+            info.metrics.update(metrics)
+            info.rankings.update(rankings)
+            infos_by_id[info.instance_id] = info
+
+        if data['order'] is not None:
+            standings._standings = [infos_by_id[i] for i in data['order']]
+            standings.ranked = True
+
+        return standings
+
     def set_rank_limit(self, rank_limit):
         """Sets the rank limit on these standings. This doesn't affect the data
         held by a Standings instance, but if the rank limit is set, then when
@@ -273,6 +310,7 @@ class BaseStandingsGenerator:
         "tiebreak": "random",
         "rank_filter": (None, None),  # (Field name, Min value)
         "include_filter": None,  # not currently used by other code,
+        "use_records": True,  # read from standings records where possible
     }
 
     TIEBREAK_FUNCTIONS = {
@@ -325,6 +363,10 @@ class BaseStandingsGenerator:
         rank_filter = self.get_rank_filter() if self.options["rank_filter"][0] is not None else None
         standings = Standings(queryset, rank_filter=rank_filter)
 
+        use_records = self.records_usable(queryset, round)
+        for annotator in self.queryset_metric_annotators + self.distinct_queryset_metric_annotators:
+            annotator.use_records = use_records
+
         # The original queryset might have filtered out information relevant to
         # calculating the metrics (e.g., if it filters teams by participation in
         # a round), so make a new queryset to pass to the metric annotators that
@@ -372,6 +414,29 @@ class BaseStandingsGenerator:
 
         return standings
 
+    def get_tournament(self, queryset, round=None):
+        """Returns the tournament to which the standings relate, or None if it
+        can't be determined (which only happens if `queryset` is empty)."""
+        if round is not None:
+            return round.tournament
+        return None
+
+    def records_usable(self, queryset, round=None):
+        """Returns True if every metric can be computed from the standings
+        records, and the records are up to date for the rounds in question."""
+        if not self.options["use_records"] or len(self.metric_annotators) == 0:
+            return False
+        if not all(getattr(a, 'supports_records', False) for a in self.metric_annotators):
+            return False
+
+        tournament = self.get_tournament(queryset, round)
+        if tournament is None:
+            return False
+        if not records_complete(tournament, round):
+            logger.info("Standings records are out of date for %s, using scores instead", tournament)
+            return False
+        return True
+
     @staticmethod
     def _check_annotators(annotators, error_str):
         """Checks the given list of annotators to ensure there are no conflicts.
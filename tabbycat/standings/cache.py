@@ -0,0 +1,96 @@
+"""Cache for generated standings, shared between everything that generates
+the same standings: the standings pages, the API, break generation, draw
+generation and notifications.
+
+Entries are keyed by the tournament's standings version, which is bumped
+whenever anything that standings depend on changes (see `signals.py`), so
+old entries are never invalidated explicitly; they just stop being used and
+expire from the cache.
+
+The cache must be shared between processes (e.g. Redis) for other processes
+to see the version change. Draw generation doesn't use this cache, since it
+must never use stale standings."""
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Manager
+
+from .base import Standings
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "standings_version_{tournament_id}"
+STANDINGS_KEY = "standings_{tournament_id}_{version}_{digest}"
+
+
+def get_standings_version(tournament_id):
+    key = VERSION_KEY.format(tournament_id=tournament_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the current time rather than from zero, so that if the
+        # version is evicted, versions used before the eviction aren't reused.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_standings(tournament_id):
+    """Bumps the standings version of the tournament once the current
+    transaction commits, so that all standings cached before then are ignored.
+    Bumping it any earlier would let standings generated from the database as
+    it was before the commit be cached under the new version."""
+    def bump():
+        try:
+            cache.incr(VERSION_KEY.format(tournament_id=tournament_id))
+        except ValueError:  # no version yet, so nothing to invalidate
+            pass
+    transaction.on_commit(bump)
+
+
+def _standings_key(generator, tournament_id, instance_ids, round):
+    spec = repr((
+        generator.__class__.__name__,
+        [annotator.key for annotator in generator.metric_annotators],
+        generator.precedence,
+        [annotator.key for annotator in generator.ranking_annotators],
+        sorted(generator.options.items()),
+        round.id if round is not None else None,
+        sorted(instance_ids),
+    ))
+    return STANDINGS_KEY.format(tournament_id=tournament_id, version=get_standings_version(tournament_id),
+        digest=hashlib.sha1(spec.encode()).hexdigest())
+
+
+def generate_cached(generator, queryset, round=None):
+    """Returns the same as `generator.generate(queryset, round)`, but uses a
+    cached copy if the same standings have been generated since the last
+    change to the tournament's standings."""
+
+    if isinstance(queryset, Manager):
+        queryset = queryset.all()
+
+    tournament = generator.get_tournament(queryset, round)
+    if tournament is None:
+        return generator.generate(queryset, round=round)
+
+    instances = list(queryset)
+    key = _standings_key(generator, tournament.id, [instance.id for instance in instances], round)
+
+    if generator.options["rank_filter"][0] is not None:
+        rank_filter = generator.get_rank_filter()
+    else:
+        rank_filter = None
+
+    data = cache.get(key)
+    if data is not None:
+        logger.debug("Using cached standings: %s", key)
+        return Standings.from_cache_data(data, instances, rank_filter=rank_filter)
+
+    standings = generator.generate(queryset, round=round)
+    cache.set(key, standings.get_cache_data(), settings.TAB_PAGES_CACHE_TIMEOUT)
+    return standings
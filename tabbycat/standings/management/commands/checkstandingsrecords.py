@@ -0,0 +1,67 @@
+from math import isclose
+
+from participants.models import Speaker
+from utils.management.base import TournamentCommand
+
+from ...records import out_of_date_ballotsubs, rebuild_tournament_records
+from ...speakers import SpeakerStandingsGenerator
+from ...teams import TeamStandingsGenerator
+
+
+class Command(TournamentCommand):
+
+    help = "Checks that the standings records agree with standings computed " \
+        "directly from ballot scores, and reports any differences. Use " \
+        "--rebuild to regenerate the records from scratch first."
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Rebuild all standings records before checking")
+
+    def handle_tournament(self, tournament, **options):
+        if options["rebuild"]:
+            nteams, nspeakers = rebuild_tournament_records(tournament)
+            self.stdout.write("Rebuilt {:d} team and {:d} speaker records for {}".format(
+                nteams, nspeakers, tournament.name))
+
+        out_of_date = out_of_date_ballotsubs(tournament).count()
+        if out_of_date:
+            self.stdout.write(self.style.WARNING("{:d} ballot submissions have out-of-date records "
+                "in {}; run with --rebuild to fix".format(out_of_date, tournament.name)))
+            return
+
+        ndifferences = 0
+        for round in tournament.prelim_rounds():
+            ndifferences += self.compare(TeamStandingsGenerator, tournament.team_set.all(), round)
+            ndifferences += self.compare(SpeakerStandingsGenerator,
+                Speaker.objects.filter(team__tournament=tournament), round)
+
+        if ndifferences:
+            self.stdout.write(self.style.ERROR("Found {:d} differences in {}".format(ndifferences, tournament.name)))
+        else:
+            self.stdout.write(self.style.SUCCESS("Standings records agree with scores in {}".format(tournament.name)))
+
+    def compare(self, generator_class, queryset, round):
+        metrics = [key for key, klass in generator_class.metric_annotator_classes.items()
+                   if getattr(klass, 'supports_records', False)]
+
+        from_records = generator_class(metrics, (), use_records=True)
+        if not from_records.records_usable(queryset, round):
+            self.stdout.write("{}: records can't be used, skipping".format(round.name))
+            return 0
+
+        expected = generator_class(metrics, (), use_records=False).generate(queryset, round=round)
+        actual = from_records.generate(queryset, round=round)
+
+        ndifferences = 0
+        for info in expected:
+            other = actual.get_standing(info.instance)
+            for key in metrics:
+                if not isclose(info.metrics[key], other.metrics[key], abs_tol=1e-9):
+                    self.stdout.write("{round}, {instance}: {key} is {expected} from scores, "
+                        "but {actual} from records".format(round=round.name, instance=info.instance,
+                        key=key, expected=info.metrics[key], actual=other.metrics[key]))
+                    ndifferences += 1
+
+        return ndifferences
@@ -95,8 +95,14 @@ class RepeatedMetricAnnotator(BaseMetricAnnotator):
 
 
 class QuerySetMetricAnnotator(BaseMetricAnnotator):
-    """Base class for annotators that metrics based on conditional aggregations."""
+    """Base class for annotators that metrics based on conditional aggregations.
+
+    Subclasses that set `supports_records` must also be able to compute their
+    aggregation from the standings records (see `standings/models.py`), which
+    they should do when `use_records` is set by the generator."""
     combinable = True
+    supports_records = False  # if True, can be computed from standings records
+    use_records = False
 
     def get_annotation(self, round):
         raise NotImplementedError("Subclasses of QuerySetMetricAnnotator must implement get_annotation().")
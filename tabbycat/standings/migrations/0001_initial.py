@@ -0,0 +1,54 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import results.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('participants', '0019_auto_20201216_1415'),
+        ('results', '0008_auto_20201126_0037'),
+        ('tournaments', '0009_auto_20201126_0037'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamStandingsRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='points')),
+                ('win', models.BooleanField(blank=True, null=True, verbose_name='win')),
+                ('margin', results.models.ScoreField(blank=True, null=True, verbose_name='margin')),
+                ('score', results.models.ScoreField(blank=True, null=True, verbose_name='score')),
+                ('votes_given', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='votes given')),
+                ('votes_possible', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='votes possible')),
+                ('ballot_submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_standings_records', to='results.ballotsubmission', verbose_name='ballot submission')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings_records', to='participants.team', verbose_name='team')),
+            ],
+            options={
+                'verbose_name': 'team standings record',
+                'verbose_name_plural': 'team standings records',
+                'unique_together': {('team', 'ballot_submission')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SpeakerStandingsRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', results.models.ScoreField(verbose_name='score')),
+                ('position', models.IntegerField(verbose_name='position')),
+                ('ballot_submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='speaker_standings_records', to='results.ballotsubmission', verbose_name='ballot submission')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+                ('speaker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings_records', to='participants.speaker', verbose_name='speaker')),
+            ],
+            options={
+                'verbose_name': 'speaker standings record',
+                'verbose_name_plural': 'speaker standings records',
+            },
+        ),
+    ]
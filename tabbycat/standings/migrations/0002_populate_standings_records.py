@@ -0,0 +1,41 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:04
+
+from django.db import migrations
+
+
+def populate_standings_records(apps, schema_editor):
+
+    TeamScore = apps.get_model('results', 'TeamScore')  # noqa: N806
+    SpeakerScore = apps.get_model('results', 'SpeakerScore')  # noqa: N806
+    TeamStandingsRecord = apps.get_model('standings', 'TeamStandingsRecord')  # noqa: N806
+    SpeakerStandingsRecord = apps.get_model('standings', 'SpeakerStandingsRecord')  # noqa: N806
+
+    teamscores = TeamScore.objects.filter(ballot_submission__confirmed=True).values(
+        'ballot_submission_id', 'debate_team__team_id', 'debate_team__debate__round_id',
+        'points', 'win', 'margin', 'score', 'votes_given', 'votes_possible')
+    TeamStandingsRecord.objects.bulk_create([TeamStandingsRecord(
+        ballot_submission_id=ts['ballot_submission_id'], team_id=ts['debate_team__team_id'],
+        round_id=ts['debate_team__debate__round_id'], points=ts['points'], win=ts['win'],
+        margin=ts['margin'], score=ts['score'], votes_given=ts['votes_given'],
+        votes_possible=ts['votes_possible'],
+    ) for ts in teamscores.iterator()], batch_size=1000)
+
+    speakerscores = SpeakerScore.objects.filter(ballot_submission__confirmed=True, ghost=False).values(
+        'ballot_submission_id', 'speaker_id', 'debate_team__debate__round_id', 'score', 'position')
+    SpeakerStandingsRecord.objects.bulk_create([SpeakerStandingsRecord(
+        ballot_submission_id=ss['ballot_submission_id'], speaker_id=ss['speaker_id'],
+        round_id=ss['debate_team__debate__round_id'], score=ss['score'], position=ss['position'],
+    ) for ss in speakerscores.iterator()], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('standings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_standings_records,
+            migrations.RunPython.noop,
+            elidable=True)
+    ]
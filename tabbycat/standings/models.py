@@ -0,0 +1,67 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from results.models import ScoreField
+
+
+class TeamStandingsRecord(models.Model):
+    """Copy of a team's result in a confirmed ballot, kept so that standings
+    can be aggregated without joining through debates and ballot submissions.
+
+    Records are maintained by `standings.records`, and exist only for the
+    confirmed ballot submission of each debate."""
+
+    ballot_submission = models.ForeignKey('results.BallotSubmission', models.CASCADE,
+        related_name='team_standings_records',
+        verbose_name=_("ballot submission"))
+    team = models.ForeignKey('participants.Team', models.CASCADE,
+        related_name='standings_records',
+        verbose_name=_("team"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    points = models.PositiveSmallIntegerField(null=True, blank=True,
+        verbose_name=_("points"))
+    win = models.BooleanField(null=True, blank=True,
+        verbose_name=_("win"))
+    margin = ScoreField(null=True, blank=True,
+        verbose_name=_("margin"))
+    score = ScoreField(null=True, blank=True,
+        verbose_name=_("score"))
+    votes_given = models.PositiveSmallIntegerField(null=True, blank=True,
+        verbose_name=_("votes given"))
+    votes_possible = models.PositiveSmallIntegerField(null=True, blank=True,
+        verbose_name=_("votes possible"))
+
+    class Meta:
+        unique_together = [('team', 'ballot_submission')]
+        verbose_name = _("team standings record")
+        verbose_name_plural = _("team standings records")
+
+    def __str__(self):
+        return "[{0.ballot_submission_id}] {0.points}, {0.score} for team {0.team_id} in round {0.round_id}".format(self)
+
+
+class SpeakerStandingsRecord(models.Model):
+    """Copy of a non-ghost speech in a confirmed ballot, kept so that speaker
+    standings can be aggregated without joining through debates and ballot
+    submissions."""
+
+    ballot_submission = models.ForeignKey('results.BallotSubmission', models.CASCADE,
+        related_name='speaker_standings_records',
+        verbose_name=_("ballot submission"))
+    speaker = models.ForeignKey('participants.Speaker', models.CASCADE,
+        related_name='standings_records',
+        verbose_name=_("speaker"))
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+
+    score = ScoreField(verbose_name=_("score"))
+    position = models.IntegerField(verbose_name=_("position"))
+
+    class Meta:
+        verbose_name = _("speaker standings record")
+        verbose_name_plural = _("speaker standings records")
+
+    def __str__(self):
+        return "[{0.ballot_submission_id}] {0.score} at {0.position} for speaker {0.speaker_id}".format(self)
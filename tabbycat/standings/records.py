@@ -0,0 +1,103 @@
+"""Functions maintaining the standings records, which duplicate the scores of
+confirmed ballots in a form that the standings generators can aggregate
+cheaply.
+
+Records are rebuilt a whole debate at a time, from whichever ballot submission
+for that debate is confirmed (if any). This is triggered whenever a
+`BallotSubmission` is saved (see `standings/signals.py`), which covers both
+confirming and unconfirming ballots, and whenever scores are written: by
+`DebateResult.save()`, or by signals when a single `TeamScore` or
+`SpeakerScore` is saved or deleted (e.g. in the admin site). Code that saves
+ballot submissions or scores in bulk must call `update_round_records()`."""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+from tournaments.models import Round
+
+from .models import SpeakerStandingsRecord, TeamStandingsRecord
+
+logger = logging.getLogger(__name__)
+
+
+def _rebuild_records(ballotsubs):
+    """Deletes all records relating to ballot submissions in `ballotsubs`, then
+    recreates them for those that are confirmed."""
+
+    with transaction.atomic():
+        TeamStandingsRecord.objects.filter(ballot_submission__in=ballotsubs).delete()
+        SpeakerStandingsRecord.objects.filter(ballot_submission__in=ballotsubs).delete()
+
+        confirmed = ballotsubs.filter(confirmed=True)
+
+        teamscores = TeamScore.objects.filter(ballot_submission__in=confirmed).values(
+            'ballot_submission_id', 'debate_team__team_id', 'debate_team__debate__round_id',
+            'points', 'win', 'margin', 'score', 'votes_given', 'votes_possible')
+        team_records = TeamStandingsRecord.objects.bulk_create([TeamStandingsRecord(
+            ballot_submission_id=ts['ballot_submission_id'], team_id=ts['debate_team__team_id'],
+            round_id=ts['debate_team__debate__round_id'], points=ts['points'], win=ts['win'],
+            margin=ts['margin'], score=ts['score'], votes_given=ts['votes_given'],
+            votes_possible=ts['votes_possible'],
+        ) for ts in teamscores])
+
+        speakerscores = SpeakerScore.objects.filter(ballot_submission__in=confirmed, ghost=False).values(
+            'ballot_submission_id', 'speaker_id', 'debate_team__debate__round_id', 'score', 'position')
+        speaker_records = SpeakerStandingsRecord.objects.bulk_create([SpeakerStandingsRecord(
+            ballot_submission_id=ss['ballot_submission_id'], speaker_id=ss['speaker_id'],
+            round_id=ss['debate_team__debate__round_id'], score=ss['score'], position=ss['position'],
+        ) for ss in speakerscores])
+
+    return len(team_records), len(speaker_records)
+
+
+def update_debate_records(debate):
+    """Rebuilds the standings records for a single debate."""
+    nteams, nspeakers = _rebuild_records(BallotSubmission.objects.filter(debate=debate))
+    logger.debug("Rebuilt %d team and %d speaker standings records for %s", nteams, nspeakers, debate)
+
+
+def update_ballotsub_records(ballotsub_id):
+    """Rebuilds the standings records for a single ballot submission."""
+    nteams, nspeakers = _rebuild_records(BallotSubmission.objects.filter(pk=ballotsub_id))
+    logger.debug("Rebuilt %d team and %d speaker standings records for ballot submission %d",
+                 nteams, nspeakers, ballotsub_id)
+
+
+def update_round_records(round):
+    """Rebuilds the standings records for every debate in a round. Code that
+    creates or confirms ballot submissions in bulk, which doesn't send the
+    signals that would otherwise do this, must call this itself."""
+    nteams, nspeakers = _rebuild_records(BallotSubmission.objects.filter(debate__round=round))
+    logger.debug("Rebuilt %d team and %d speaker standings records for %s", nteams, nspeakers, round)
+
+
+def rebuild_tournament_records(tournament):
+    """Rebuilds the standings records for every debate in the tournament."""
+    nteams, nspeakers = _rebuild_records(BallotSubmission.objects.filter(debate__round__tournament=tournament))
+    logger.info("Rebuilt %d team and %d speaker standings records for %s", nteams, nspeakers, tournament)
+    return nteams, nspeakers
+
+
+def out_of_date_ballotsubs(tournament, round=None):
+    """Returns a QuerySet of preliminary-round ballot submissions whose standings
+    records don't match their confirmation status: confirmed ballots without
+    records, and unconfirmed ballots with records."""
+    ballotsubs = BallotSubmission.objects.filter(
+        debate__round__tournament=tournament,
+        debate__round__stage=Round.STAGE_PRELIMINARY,
+    )
+    if round is not None:
+        ballotsubs = ballotsubs.filter(debate__round__seq__lte=round.seq)
+    return ballotsubs.filter(
+        Q(confirmed=True, team_standings_records__isnull=True) |
+        Q(confirmed=False, team_standings_records__isnull=False),
+    ).distinct()
+
+
+def records_complete(tournament, round=None):
+    """Returns True if the standings records can be used in place of the
+    scores of confirmed ballots for standings up to and including `round`."""
+    return not out_of_date_ballotsubs(tournament, round).exists()
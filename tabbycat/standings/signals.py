@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from options.models import TournamentPreferenceModel
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+from tournaments.models import Round
+
+from .cache import invalidate_standings
+from .records import update_ballotsub_records, update_debate_records
+
+
+@receiver(post_save, sender=BallotSubmission)
+def update_standings_records(sender, instance, raw=False, **kwargs):
+    # When loading fixtures, scores are loaded after ballot submissions, so
+    # there's nothing to copy yet.
+    if raw:
+        return
+    update_debate_records(instance.debate)
+
+
+@receiver(post_delete, sender=SpeakerScore)
+@receiver(post_save, sender=SpeakerScore)
+@receiver(post_delete, sender=TeamScore)
+@receiver(post_save, sender=TeamScore)
+def update_standings_records_for_score(sender, instance, raw=False, **kwargs):
+    # Scores written by DebateResult.save() don't send signals; that updates
+    # the records itself. This catches scores edited directly. Wait until the
+    # transaction commits, so that if the ballot submission is being deleted,
+    # records aren't recreated for it.
+    if raw:
+        return
+    ballotsub_id = instance.ballot_submission_id
+    transaction.on_commit(lambda: update_ballotsub_records(ballotsub_id))
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def invalidate_standings_for_ballot(sender, instance, **kwargs):
+    invalidate_standings(instance.debate.round.tournament_id)
+
+
+@receiver(post_save, sender=DebateTeam)
+def invalidate_standings_for_debateteam(sender, instance, **kwargs):
+    # Draw strength and pullups depend on the draw, not just on results. (Draws
+    # are deleted and created in bulk, but the round is then saved.)
+    invalidate_standings(instance.team.tournament_id)
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+def invalidate_standings_for_round(sender, instance, **kwargs):
+    # Round weights, stages and sequence numbers all affect standings.
+    invalidate_standings(instance.tournament_id)
+
+
+@receiver(post_save, sender=TournamentPreferenceModel)
+def invalidate_standings_for_preference(sender, instance, **kwargs):
+    invalidate_standings(instance.instance_id)
@@ -24,24 +24,34 @@ class SpeakerScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
 
     function = None  # Must be set by subclasses
     replies = False
+    supports_records = True
 
     def get_annotation(self, round):
         """Returns a QuerySet annotated with the metric given. All positional
         arguments from the third onwards, and all keyword arguments, are passed
         to get_annotation_metric_query_str()."""
 
-        annotation_filter = Q(
-            speakerscore__ballot_submission__confirmed=True,
-            speakerscore__debate_team__debate__round__seq__lte=round.seq,
-            speakerscore__debate_team__debate__round__stage=Round.STAGE_PRELIMINARY,
-            speakerscore__ghost=False,
-        )
+        if self.use_records:
+            # records only exist for non-ghost speeches in confirmed ballots
+            prefix = 'standings_records__'
+            annotation_filter = Q(
+                standings_records__round__seq__lte=round.seq,
+                standings_records__round__stage=Round.STAGE_PRELIMINARY,
+            )
+        else:
+            prefix = 'speakerscore__'
+            annotation_filter = Q(
+                speakerscore__ballot_submission__confirmed=True,
+                speakerscore__debate_team__debate__round__seq__lte=round.seq,
+                speakerscore__debate_team__debate__round__stage=Round.STAGE_PRELIMINARY,
+                speakerscore__ghost=False,
+            )
         if self.replies:
-            annotation_filter &= Q(speakerscore__position=round.tournament.reply_position)
+            annotation_filter &= Q(**{prefix + 'position': round.tournament.reply_position})
         else:
-            annotation_filter &= Q(speakerscore__position__lte=round.tournament.last_substantive_position)
+            annotation_filter &= Q(**{prefix + 'position__lte': round.tournament.last_substantive_position})
 
-        return self.function('speakerscore__score', filter=annotation_filter)
+        return self.function(prefix + 'score', filter=annotation_filter)
 
 
 class TotalSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
@@ -73,6 +83,12 @@ class SpeakerTeamPointsMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator):
         arguments from the third onwards, and all keyword arguments, are passed
         to get_annotation_metric_query_str()."""
 
+        if self.use_records:
+            annotation_filter = Q(team__standings_records__round__stage=Round.STAGE_PRELIMINARY)
+            if round is not None:
+                annotation_filter &= Q(team__standings_records__round__seq__lte=round.seq)
+            return Sum('team__standings_records__points', filter=annotation_filter)
+
         annotation_filter = Q(
             team__debateteam__teamscore__ballot_submission__confirmed=True,
             team__debateteam__debate__round__stage=Round.STAGE_PRELIMINARY,
@@ -161,13 +177,18 @@ class TrimmedMeanSpeakerScoreMetricAnnotator(SpeakerScoreQuerySetMetricAnnotator
         # that the main annotation will know what 'count' means. We can't do
         # this inline in get_annotation() because Django doesn't support the
         # syntax F('count') > 2, and we're forced to use count__gt=2 instead.
-        queryset = self.SpeechCount().get_annotated_queryset(queryset, round=round)
+        queryset = self._component(self.SpeechCount).get_annotated_queryset(queryset, round=round)
         return super().get_annotated_queryset(queryset, round=round)
 
+    def _component(self, klass):
+        annotator = klass()
+        annotator.use_records = self.use_records
+        return annotator
+
     def get_annotation(self, round=None):
-        total = TotalSpeakerScoreMetricAnnotator().get_annotation(round)
-        highest = self.MaximumScore().get_annotation(round)
-        lowest = self.MinimumScore().get_annotation(round)
+        total = self._component(TotalSpeakerScoreMetricAnnotator).get_annotation(round)
+        highest = self._component(self.MaximumScore).get_annotation(round)
+        lowest = self._component(self.MinimumScore).get_annotation(round)
 
         return Case(
             When(speech_count__gt=2, then=(total - highest - lowest) / (F('speech_count') - 2)),
@@ -2,16 +2,17 @@
 
 import logging
 
-from django.contrib.postgres.aggregates import ArrayAgg
-from django.db.models import Avg, Count, F, FloatField, PositiveIntegerField, Q, StdDev, Sum
-from django.db.models.functions import Cast, NullIf
+from django.db.models import (Avg, Case, Count, F, FloatField, Func, IntegerField, OuterRef,
+    PositiveIntegerField, Q, StdDev, Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.utils.translation import gettext_lazy as _
 
 from results.models import TeamScore
 from tournaments.models import Round
 
 from .base import BaseStandingsGenerator
-from .metrics import BaseMetricAnnotator, metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .metrics import metricgetter, QuerySetMetricAnnotator, RepeatedMetricAnnotator
+from .models import TeamStandingsRecord
 from .ranking import BasicRankAnnotator, RankFromInstitutionAnnotator, SubrankAnnotator
 
 logger = logging.getLogger(__name__)
@@ -32,21 +33,29 @@ class TeamScoreQuerySetMetricAnnotator(QuerySetMetricAnnotator):
     where_value = None
 
     exclude_unconfirmed = True
+    supports_records = True
+
+    @property
+    def prefix(self):
+        return 'standings_records__' if self.use_records else 'debateteam__teamscore__'
+
+    @property
+    def round_prefix(self):
+        return 'standings_records__round__' if self.use_records else 'debateteam__debate__round__'
 
     def get_field(self):
         """Subclasses with complicated fields override this method."""
-        return 'debateteam__teamscore__' + self.field
+        return self.prefix + self.field
 
     def get_where_field(self):
         return self.get_field()
 
     def get_annotation_filter(self, round=None):
-        annotation_filter = Q(
-            debateteam__debate__round__stage=Round.STAGE_PRELIMINARY,
-        )
+        annotation_filter = Q(**{self.round_prefix + 'stage': Round.STAGE_PRELIMINARY})
         if round is not None:
-            annotation_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        if self.exclude_unconfirmed:
+            annotation_filter &= Q(**{self.round_prefix + 'seq__lte': round.seq})
+        if self.exclude_unconfirmed and not self.use_records:
+            # records only exist for confirmed ballots
             annotation_filter &= Q(debateteam__teamscore__ballot_submission__confirmed=True)
         if self.where_value is not None:
             annotation_filter &= Q(**{self.get_where_field(): self.where_value})
@@ -67,7 +76,7 @@ class PointsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     output_field = PositiveIntegerField()
 
     def get_field(self):
-        return F(super().get_field()) * F('debateteam__debate__round__weight')
+        return F(super().get_field()) * F(self.round_prefix + 'weight')
 
 
 class WinsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -140,6 +149,7 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
 
     function = Avg
     combinable = False
+    supports_records = False
 
     def get_field(self):
         return 'debateteam__speakerscore__score'
@@ -171,38 +181,53 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
         return super().get_annotated_queryset(queryset, round)
 
 
-class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
+class BaseDrawStrengthMetricAnnotator(QuerySetMetricAnnotator):
+    """Base class for metrics that sum a metric of every opponent a team has
+    faced. This is computed as a correlated subquery over the opponents'
+    scores, joined to the team through the debates in which they met, so it
+    can be combined with other aggregations and ranked using window functions.
 
-    opponent_annotator = None
+    Subclasses must implement `get_opponent_value()`, an expression (in terms
+    of the scores being summed) for each score's contribution to the metric."""
 
-    def annotate(self, queryset, standings, round=None):
-        if not queryset.exists():
-            return
+    output_field = None
+    supports_records = True
+
+    def get_opponent_value(self, round_prefix):
+        raise NotImplementedError
 
-        logger.info("Running opponents query for draw strength:")
+    def get_annotation(self, round=None):
+        if self.use_records:
+            scores = TeamStandingsRecord.objects.all()
+            team_field = 'team'
+            round_prefix = 'round__'
+        else:
+            scores = TeamScore.objects.filter(ballot_submission__confirmed=True)
+            team_field = 'debate_team__team'
+            round_prefix = 'debate_team__debate__round__'
 
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.STAGE_PRELIMINARY)
+        # The opponents' scores, from all rounds up to this one
+        scores = scores.filter(**{round_prefix + 'stage': Round.STAGE_PRELIMINARY})
         if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.all().annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids for team in teams_with_opponents}
-
-        opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
-                queryset[0].tournament.team_set.all(), round)
-        opp_metric_queryset_teams = {team.id: team for team in opp_metric_queryset}
-
-        for team in queryset:
-            draw_strength = 0
-            for opponent_id in opponents_by_team[team.id]:
-                opp_metric = getattr(opp_metric_queryset_teams[opponent_id], self.opponent_annotator.key)
-                if opp_metric is not None: # opp_metric is None when no debates have happened
-                    draw_strength += opp_metric
-            standings.add_metric(team, self.key, draw_strength)
+            scores = scores.filter(**{round_prefix + 'seq__lte': round.seq})
+
+        # Each score counts once for every debate in which its team met this
+        # team. These conditions must be in a single filter() call so that they
+        # all apply to the same debate.
+        meeting_prefix = team_field + '__debateteam__debate__'
+        meeting_filter = {
+            meeting_prefix + 'debateteam__team': OuterRef('id'),
+            meeting_prefix + 'round__stage': Round.STAGE_PRELIMINARY,
+        }
+        if round is not None:
+            meeting_filter[meeting_prefix + 'round__seq__lte'] = round.seq
+        scores = scores.filter(**meeting_filter).exclude(**{team_field: OuterRef('id')})
+
+        # Teams with no opponents yet get zero, rather than NULL, which would
+        # be ranked differently from how it's displayed
+        total = Func(self.get_opponent_value(round_prefix), function='SUM', output_field=self.output_field)
+        subquery = Subquery(scores.order_by().annotate(total=total).values('total'), output_field=self.output_field)
+        return Coalesce(subquery, Value(0), output_field=self.output_field)
 
 
 class DrawStrengthByWinsMetricAnnotator(BaseDrawStrengthMetricAnnotator):
@@ -210,7 +235,21 @@ class DrawStrengthByWinsMetricAnnotator(BaseDrawStrengthMetricAnnotator):
     key = "draw_strength"  # keep this key for backwards compatibility
     name = _("draw strength by wins")
     abbr = _("DS")
-    opponent_annotator = PointsMetricAnnotator
+    output_field = IntegerField()
+
+    def get_opponent_value(self, round_prefix):
+        return Case(When(win=True, then=Value(1)), default=Value(0))
+
+
+class DrawStrengthByPointsMetricAnnotator(BaseDrawStrengthMetricAnnotator):
+    """Metric annotator for draw strength by points."""
+    key = "draw_strength_points"
+    name = _("draw strength by points")
+    abbr = _("DSP")
+    output_field = IntegerField()
+
+    def get_opponent_value(self, round_prefix):
+        return F('points') * F(round_prefix + 'weight')
 
 
 class DrawStrengthBySpeakerScoreMetricAnnotator(BaseDrawStrengthMetricAnnotator):
@@ -218,7 +257,10 @@ class DrawStrengthBySpeakerScoreMetricAnnotator(BaseDrawStrengthMetricAnnotator)
     key = "draw_strength_speaks"
     name = _("draw strength by total speaker score")
     abbr = _("DSS")
-    opponent_annotator = TotalSpeakerScoreMetricAnnotator
+    output_field = FloatField()
+
+    def get_opponent_value(self, round_prefix):
+        return F('score')
 
 
 class TeamPullupsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
@@ -234,6 +276,7 @@ class TeamPullupsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
     function = Count
     where_value = ['pullup']
     exclude_unconfirmed = False
+    supports_records = False
 
     def get_field(self):
         return 'debateteam'
@@ -260,8 +303,8 @@ class NumberOfAdjudicatorsMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
         self.adjs_per_debate = adjs_per_debate
 
     def get_field(self):
-        return (Cast('debateteam__teamscore__votes_given', FloatField()) /
-            NullIf('debateteam__teamscore__votes_possible', 0, output_field=FloatField()) *
+        return (Cast(self.prefix + 'votes_given', FloatField()) /
+            NullIf(self.prefix + 'votes_possible', 0, output_field=FloatField()) *
             self.adjs_per_debate)
 
     def annotate_with_queryset(self, queryset, standings):
@@ -314,39 +357,50 @@ class WhoBeatWhomMetricAnnotator(RepeatedMetricAnnotator):
     abbr_prefix = _("WBW")
     choice_name = _("who-beat-whom")
 
-    def get_team_scores(self, key, equal_teams, tsi, round):
-        equal_teams.remove(tsi)
-        other = equal_teams[0]
-        ts = TeamScore.objects.filter(
+    def get_head_to_head(self, standings, round):
+        """Returns a dict mapping (team ID, opponent ID) to the number of
+        points the team earned in debates against that opponent. The dict is
+        built in a single query the first time it's needed, then stored on the
+        standings, so that every who-beat-whom metric can use it."""
+        if hasattr(standings, 'head_to_head'):
+            return standings.head_to_head
+
+        team_ids = [tsi.team.id for tsi in standings.infoview()]
+        teamscores = TeamScore.objects.filter(
             ballot_submission__confirmed=True,
-            debate_team__team=tsi.team,
-            debate_team__debate__debateteam__team=other.team,
+            debate_team__team_id__in=team_ids,
             debate_team__debate__round__stage=Round.STAGE_PRELIMINARY,
         )
-
         if round is not None:
-            ts = ts.filter(debate_team__debate__round__seq__lte=round.seq)
+            teamscores = teamscores.filter(debate_team__debate__round__seq__lte=round.seq)
+
+        head_to_head = {}
+        for team_id, opponent_id, points in teamscores.values_list(
+                'debate_team__team_id', 'debate_team__debate__debateteam__team_id', 'points'):
+            if team_id != opponent_id:
+                head_to_head[(team_id, opponent_id)] = head_to_head.get((team_id, opponent_id), 0) + (points or 0)
 
-        ts = ts.aggregate(Sum('points'))
-        logger.info("who beat whom, %s %s vs %s %s: %s",
-            tsi.team.short_name, key(tsi), other.team.short_name, key(other),
-            ts["points__sum"])
-        return ts
+        standings.head_to_head = head_to_head
+        return head_to_head
 
     def annotate(self, queryset, standings, round=None):
         key = metricgetter(self.keys)
 
-        def who_beat_whom(tsi):
-            equal_teams = [x for x in standings.infoview() if key(x) == key(tsi)]
-            if len(equal_teams) != 2:
-                return "n/a"  # fail fast if attempt to compare with an int
-
-            ts = self.get_team_scores(key, equal_teams, tsi, round)
-            return ts["points__sum"] or 0
+        tied = {}
+        for tsi in standings.infoview():
+            tied.setdefault(key(tsi), []).append(tsi)
 
         for tsi in standings.infoview():
-            wbw = who_beat_whom(tsi)
-            tsi.add_metric(self.key, wbw)
+            equal_teams = tied[key(tsi)]
+            if len(equal_teams) != 2:
+                tsi.add_metric(self.key, "n/a")  # fail fast if attempt to compare with an int
+                continue
+
+            other = equal_teams[1] if equal_teams[0] is tsi else equal_teams[0]
+            points = self.get_head_to_head(standings, round).get((tsi.team.id, other.team.id), 0)
+            logger.info("who beat whom, %s %s vs %s %s: %s",
+                tsi.team.short_name, key(tsi), other.team.short_name, key(other), points)
+            tsi.add_metric(self.key, points)
 
 
 # ==============================================================================
@@ -376,6 +430,7 @@ class TeamStandingsGenerator(BaseStandingsGenerator):
         "speaks_ind_avg"      : AverageIndividualScoreMetricAnnotator,
         "speaks_stddev"       : SpeakerScoreStandardDeviationMetricAnnotator,
         "draw_strength"       : DrawStrengthByWinsMetricAnnotator,
+        "draw_strength_points": DrawStrengthByPointsMetricAnnotator,
         "draw_strength_speaks": DrawStrengthBySpeakerScoreMetricAnnotator,
         "margin_sum"          : SumMarginMetricAnnotator,
         "margin_avg"          : AverageMarginMetricAnnotator,
@@ -392,3 +447,9 @@ class TeamStandingsGenerator(BaseStandingsGenerator):
         "subrank"         : SubrankAnnotator,
         "institution_rank": RankFromInstitutionAnnotator,
     }
+
+    def get_tournament(self, queryset, round=None):
+        if round is not None:
+            return round.tournament
+        first_team = queryset.first()
+        return first_team.tournament if first_team is not None else None
@@ -0,0 +1,75 @@
+import logging
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+
+from draw.models import Debate, DebateTeam
+from participants.models import Team
+from results.models import BallotSubmission, TeamScore
+from tournaments.models import Round, Tournament
+from utils.tests import suppress_logs
+
+from ..cache import generate_cached, get_standings_version
+from ..teams import TeamStandingsGenerator
+
+
+class TestStandingsCache(TransactionTestCase):
+    # The standings version is only bumped when transactions commit
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(slug="standingscachetest", name="Standings cache test")
+        self.team1 = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
+        self.team2 = Team.objects.create(tournament=self.tournament, reference="2", use_institution_prefix=False)
+        self.round = Round.objects.create(tournament=self.tournament, seq=1)
+        self.debate = Debate.objects.create(round=self.round)
+        self.dt1 = DebateTeam.objects.create(debate=self.debate, team=self.team1, side=DebateTeam.SIDE_AFF)
+        self.dt2 = DebateTeam.objects.create(debate=self.debate, team=self.team2, side=DebateTeam.SIDE_NEG)
+        self.add_ballot(1, 0)
+
+    def tearDown(self):
+        DebateTeam.objects.filter(team__tournament=self.tournament).delete()
+        self.tournament.delete()
+
+    def add_ballot(self, points1, points2):
+        ballotsub = BallotSubmission.objects.create(debate=self.debate)
+        TeamScore.objects.create(debate_team=self.dt1, ballot_submission=ballotsub, points=points1, win=points1 > 0, score=75)
+        TeamScore.objects.create(debate_team=self.dt2, ballot_submission=ballotsub, points=points2, win=points2 > 0, score=74)
+        ballotsub.confirmed = True
+        ballotsub.save()
+
+    def get_standings(self):
+        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank',))
+        with suppress_logs('standings.metrics', logging.INFO):
+            return generate_cached(generator, self.tournament.team_set.all(), round=self.round)
+
+    def test_cached_matches_generated(self):
+        generated = self.get_standings()
+        cached = self.get_standings()
+        self.assertEqual(generated.get_instance_list(), cached.get_instance_list())
+        self.assertEqual(generated.metric_keys, cached.metric_keys)
+        self.assertEqual(generated.ranking_keys, cached.ranking_keys)
+        for team in [self.team1, self.team2]:
+            self.assertEqual(generated.get_standing(team).metrics, cached.get_standing(team).metrics)
+            self.assertEqual(generated.get_standing(team).rankings, cached.get_standing(team).rankings)
+
+    def test_cache_hit_skips_generation(self):
+        self.get_standings()
+        with self.assertNumQueries(1):  # just fetching the teams
+            self.get_standings()
+
+    def test_ballot_invalidates(self):
+        self.assertEqual(self.get_standings().get_standing(self.team1).metrics['points'], 1)
+        version = get_standings_version(self.tournament.id)
+        self.add_ballot(0, 1)
+        self.assertGreater(get_standings_version(self.tournament.id), version)
+        standings = self.get_standings()
+        self.assertEqual(standings.get_standing(self.team1).metrics['points'], 0)
+        self.assertEqual(standings.get_standing(self.team2).metrics['points'], 1)
+
+    def test_different_metrics_not_shared(self):
+        self.get_standings()
+        generator = TeamStandingsGenerator(('speaks_sum',), ('rank',))
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generate_cached(generator, self.tournament.team_set.all(), round=self.round)
+        self.assertEqual(standings.metric_keys, ['speaks_sum'])
@@ -11,8 +11,10 @@ from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
 from venues.models import Venue
 
-from ..base import StandingsError
-from ..teams import TeamStandingsGenerator
+from ..base import Standings, StandingsError
+from ..models import TeamStandingsRecord
+from ..records import rebuild_tournament_records, records_complete
+from ..teams import TeamStandingsGenerator, WhoBeatWhomMetricAnnotator
 
 
 class TestTrivialStandings(TestCase):
@@ -116,6 +118,17 @@ class TestTrivialStandings(TestCase):
         # losing team has faced winning team twice, so draw strength is 2 * 2 = 4
         self._base_metric_test({'draw_strength': [0, 4]})
 
+    def test_draw_strength_points(self):
+        self._base_metric_test({'draw_strength_points': [0, 4]})
+
+    def test_draw_strength_ranked(self):
+        generator = TeamStandingsGenerator(('wins', 'draw_strength'), ('rank',))
+        # draw strength should be ranked using window functions
+        self.assertEqual(set(generator.precedence), {a.key for a in generator.queryset_metric_annotators})
+        standings = self.get_standings(generator)
+        self.assertEqual(standings.get_standing(self.team1).rankings['rank'], (1, False))
+        self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (2, False))
+
     def test_draw_strength_speaks(self):
         # teams have faced each other twice, so draw strength is twice opponent's score
         self._base_metric_test({'draw_strength_speaks': [394, 406]})
@@ -251,11 +264,158 @@ class TestStandingsWithUnconfirmedBallotSubmission(IgnorableDebateMixin, TestTri
     def test_draw_strength(self):
         super().test_draw_strength()
 
+    @expectedFailure
+    def test_draw_strength_points(self):
+        super().test_draw_strength_points()
+
     @expectedFailure
     def test_draw_strength_speaks(self):
         super().test_draw_strength_speaks()
 
 
+class TestTrivialStandingsFromRecords(TestTrivialStandings):
+    """Runs the same tests with the standings records up to date, so that
+    supported metrics are computed from the records."""
+
+    def setUp(self):
+        super().setUp()
+        rebuild_tournament_records(self.tournament)
+
+    def set_up_speaker_scores(self, position):
+        super().set_up_speaker_scores(position)
+        rebuild_tournament_records(self.tournament)
+
+
+class TestStandingsRecords(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="standingsrecordstest", name="Standings records test")
+        self.team1 = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
+        self.team2 = Team.objects.create(tournament=self.tournament, reference="2", use_institution_prefix=False)
+        self.ballotsubs = []
+        for i in [1, 2]:
+            rd = Round.objects.create(tournament=self.tournament, seq=i)
+            debate = Debate.objects.create(round=rd)
+            dt1 = DebateTeam.objects.create(debate=debate, team=self.team1, side=DebateTeam.SIDE_AFF)
+            dt2 = DebateTeam.objects.create(debate=debate, team=self.team2, side=DebateTeam.SIDE_NEG)
+            ballotsub = BallotSubmission.objects.create(debate=debate)
+            TeamScore.objects.create(debate_team=dt1, ballot_submission=ballotsub,
+                margin=+2*i, points=1, score=100+i, win=True,  votes_given=1, votes_possible=1)
+            TeamScore.objects.create(debate_team=dt2, ballot_submission=ballotsub,
+                margin=-2*i, points=0, score=100-i, win=False, votes_given=0, votes_possible=1)
+            ballotsub.confirmed = True
+            ballotsub.save()
+            self.ballotsubs.append(ballotsub)
+
+    def tearDown(self):
+        DebateTeam.objects.filter(team__tournament=self.tournament).delete()
+        self.tournament.delete()
+
+    def get_points(self):
+        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank',))
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generator.generate(self.tournament.team_set.all())
+        return [standings.get_standing(team).metrics['points'] for team in (self.team1, self.team2)]
+
+    def test_confirm_creates_records(self):
+        self.assertEqual(TeamStandingsRecord.objects.filter(team__tournament=self.tournament).count(), 4)
+        self.assertTrue(records_complete(self.tournament))
+        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank',))
+        self.assertTrue(generator.records_usable(self.tournament.team_set.all()))
+        self.assertEqual(self.get_points(), [2, 0])
+
+    def test_unconfirm_removes_records(self):
+        self.ballotsubs[1].confirmed = False
+        self.ballotsubs[1].save()
+        self.assertEqual(TeamStandingsRecord.objects.filter(team__tournament=self.tournament).count(), 2)
+        self.assertTrue(records_complete(self.tournament))
+        self.assertEqual(self.get_points(), [1, 0])
+
+    def test_new_confirmed_ballot_replaces_records(self):
+        old = self.ballotsubs[0]
+        new = BallotSubmission.objects.create(debate=old.debate)
+        for ts in old.teamscore_set.all():
+            TeamScore.objects.create(debate_team=ts.debate_team, ballot_submission=new,
+                margin=-ts.margin, points=1-ts.points, score=ts.score, win=not ts.win,
+                votes_given=1-ts.votes_given, votes_possible=1)
+        new.confirmed = True
+        new.save()
+        self.assertFalse(TeamStandingsRecord.objects.filter(ballot_submission=old).exists())
+        self.assertEqual(TeamStandingsRecord.objects.filter(ballot_submission=new).count(), 2)
+        self.assertTrue(records_complete(self.tournament))
+        self.assertEqual(self.get_points(), [1, 1])
+
+    def test_out_of_date_records_not_used(self):
+        # bypasses signals, so records are left behind
+        BallotSubmission.objects.filter(debate__round__tournament=self.tournament).update(confirmed=False)
+        self.assertFalse(records_complete(self.tournament))
+        generator = TeamStandingsGenerator(('points',), ())
+        self.assertFalse(generator.records_usable(self.tournament.team_set.all()))
+        self.assertEqual(self.get_points(), [0, 0])
+
+    def test_draw_strength_without_opponents(self):
+        team3 = Team.objects.create(tournament=self.tournament, reference="3", use_institution_prefix=False)
+        generator = TeamStandingsGenerator(('draw_strength',), ('rank',))
+        with suppress_logs('standings.metrics', logging.INFO):
+            standings = generator.generate(self.tournament.team_set.all())
+        self.assertEqual(standings.get_standing(team3).metrics['draw_strength'], 0)
+        self.assertEqual(standings.get_standing(team3).rankings['rank'], (2, True))
+        self.assertEqual(standings.get_standing(self.team1).rankings['rank'], (2, True))
+
+    def test_unsupported_metric_not_used(self):
+        generator = TeamStandingsGenerator(('points', 'npullups'), ())
+        self.assertFalse(generator.records_usable(self.tournament.team_set.all()))
+
+
+class TestWhoBeatWhomQueries(TestCase):
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(slug="wbwqueriestest", name="Who-beat-whom queries test")
+        self.teams = [Team.objects.create(tournament=self.tournament, reference=str(i), use_institution_prefix=False)
+                      for i in range(12)]
+        self.round = Round.objects.create(tournament=self.tournament, seq=1)
+
+        # Teams 2k and 2k+1 meet, and 2k wins
+        for aff, neg in zip(self.teams[0::2], self.teams[1::2]):
+            debate = Debate.objects.create(round=self.round)
+            ballotsub = BallotSubmission.objects.create(debate=debate, confirmed=True)
+            for team, points in [(aff, 1), (neg, 0)]:
+                dt = DebateTeam.objects.create(debate=debate, team=team,
+                    side=DebateTeam.SIDE_AFF if points else DebateTeam.SIDE_NEG)
+                TeamScore.objects.create(debate_team=dt, ballot_submission=ballotsub, points=points, win=bool(points))
+
+    def tearDown(self):
+        DebateTeam.objects.filter(team__tournament=self.tournament).delete()
+        self.tournament.delete()
+
+    def run_wbw(self, teams):
+        standings = Standings(teams)
+        for i, team in enumerate(teams):
+            standings.add_metric(team, 'points', i // 2)  # ties teams 2k and 2k+1
+            standings.add_metric(team, 'speaks_sum', 0)
+        annotators = [WhoBeatWhomMetricAnnotator(1, ('points',)),
+                      WhoBeatWhomMetricAnnotator(2, ('points', 'wbw1', 'speaks_sum'))]
+        with suppress_logs('standings.teams', logging.INFO):
+            for annotator in annotators:
+                annotator.run(None, standings, self.round)
+        return standings
+
+    def test_query_count_constant(self):
+        for n in [4, 8, 12]:
+            with self.subTest(n=n), self.assertNumQueries(1):
+                standings = self.run_wbw(self.teams[:n])
+            for i, team in enumerate(self.teams[:n]):
+                self.assertEqual(standings.get_standing(team).metrics['wbw1'], 1 - i % 2)
+                self.assertEqual(standings.get_standing(team).metrics['wbw2'], "n/a")
+
+    def test_no_ties_no_queries(self):
+        standings = Standings(self.teams)
+        for i, team in enumerate(self.teams):
+            standings.add_metric(team, 'points', i)
+        with self.assertNumQueries(0):
+            WhoBeatWhomMetricAnnotator(1, ('points',)).run(None, standings, self.round)
+
+
 class TestBasicStandings(TestCase):
 
     TEAMS = "ABCD"
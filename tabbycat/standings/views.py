@@ -10,6 +10,7 @@ from django.views.generic.base import TemplateView
 
 from adjfeedback.views import BaseFeedbackOverview
 from breakqual.models import BreakCategory
+from breakqual.utils import calculate_break_probabilities
 from motions.models import Motion
 from notifications.models import BulkNotification
 from notifications.views import RoundTemplateEmailCreateView
@@ -24,6 +25,7 @@ from utils.tables import TabbycatTableBuilder
 from utils.views import VueTableTemplateView
 
 from .base import StandingsError
+from .cache import generate_cached
 from .diversity import get_diversity_data_sets
 from .round_results import add_speaker_round_results, add_team_round_results, add_team_round_results_public
 from .speakers import SpeakerStandingsGenerator
@@ -217,7 +219,7 @@ class BaseSpeakerStandingsView(BaseStandingsView):
         metrics, extra_metrics = self.get_metrics()
         rank_filter = self.get_rank_filter()
         generator = SpeakerStandingsGenerator(metrics, self.rankings, extra_metrics, rank_filter=rank_filter)
-        standings = generator.generate(speakers, round=self.round)
+        standings = generate_cached(generator, speakers, round=self.round)
 
         rounds = self.get_rounds()
         self.add_round_results(standings, rounds)
@@ -435,7 +437,7 @@ class BaseTeamStandingsView(BaseStandingsView):
         metrics = self.tournament.pref('team_standings_precedence')
         extra_metrics = self.tournament.pref('team_standings_extra_metrics')
         generator = TeamStandingsGenerator(metrics, self.rankings, extra_metrics)
-        standings = generator.generate(teams, round=self.round)
+        standings = generate_cached(generator, teams, round=self.round)
         self.limit_rank_display(standings)
 
         rounds = self.get_rounds()
@@ -464,12 +466,25 @@ class BaseTeamStandingsView(BaseStandingsView):
 
         table.add_standings_results_columns(standings, rounds, self.show_ballots())
         table.add_metric_columns(standings, integer_score_columns=self.integer_score_columns(rounds))
+        self.add_break_probability_columns(table, standings)
 
         return table
 
     def show_ballots(self):
         return False
 
+    def get_break_probability_categories(self):
+        """Returns the break categories for which to show each team's estimated
+        chance of breaking, between preliminary rounds."""
+        return []
+
+    def add_break_probability_columns(self, table, standings):
+        categories = self.get_break_probability_categories()
+        if not categories or not self.tournament.prelim_rounds().filter(seq__gt=self.round.seq).exists():
+            return
+        probabilities = calculate_break_probabilities(self.tournament, self.round)
+        table.add_break_probability_columns([info.team for info in standings], categories, probabilities)
+
     def integer_score_columns(self, rounds):
         if all(self.tournament.integer_scores(rd.stage) for rd in rounds):
             return ['speaks_sum']
@@ -489,6 +504,9 @@ class TeamStandingsView(AdministratorMixin, BaseTeamStandingsView):
     def show_ballots(self):
         return True
 
+    def get_break_probability_categories(self):
+        return list(self.tournament.breakcategory_set.order_by('seq'))
+
 
 class PublicTeamTabView(PublicTabMixin, BaseTeamStandingsView):
     """Public view for the team tab.
@@ -529,6 +547,9 @@ class BreakCategoryStandingsView(AdministratorMixin, BaseBreakCategoryStandingsV
     def show_ballots(self):
         return True
 
+    def get_break_probability_categories(self):
+        return [self.object]
+
 
 class PublicBreakCategoryTabView(PublicTabMixin, BaseBreakCategoryStandingsView):
     """Public view for the team tab for a break category."""
@@ -17,6 +17,7 @@ export default new Vuex.Store({
     institutions: {},
     regions: {},
     loading: false, // Used by modal windows when waiting for an allocation etc
+    progress: null, // Latest progress update from a long-running allocation
     round: null,
     tournament: null,
     // For saving mechanisms
@@ -175,6 +176,12 @@ export default new Vuex.Store({
     },
     setLoadingState (state, isLoading) {
       state.loading = isLoading
+      if (!isLoading) {
+        state.progress = null
+      }
+    },
+    setProgress (state, progress) {
+      state.progress = progress
     },
   },
   getters: {
@@ -309,6 +316,9 @@ export default new Vuex.Store({
     receiveUpdatedupdateDebatesOrPanelsAttribute ({ commit }, payload) {
       // Commit changes from websockets i.e.
       // { "componentID": 5711, "debatesOrPanels": [{ "id": 72, "importance": "0" }] }
+      if ('progress' in payload) {
+        commit('setProgress', payload.progress)
+      }
       if ('message' in payload) {
         $.fn.showAlert(payload.message.type, payload.message.text, 0)
         commit('setLoadingState', false) // Hide and re-enable modals
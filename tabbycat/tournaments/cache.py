@@ -0,0 +1,67 @@
+"""Cache of tournaments and rounds looked up from URLs.
+
+Almost every request looks up a tournament by its slug (and often a round by
+its sequence number), then checks some of the tournament's preferences. This
+cache is shared by the HTML views, websocket consumers and the API. Tournaments
+are cached with all their preferences loaded, so a request that finds them in
+the cache doesn't need to fetch its tournament, round or preferences at all.
+
+Entries are keyed by a version number, which is bumped whenever a tournament,
+round or tournament preference is saved or deleted (see `signals.py`), so old
+entries are never used again; they just expire from the cache."""
+
+import time
+
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+
+from .models import Round, Tournament
+
+VERSION_KEY = "tournament_objects_version"
+TOURNAMENT_KEY = "tournament_object_{slug}_{version}"
+ROUND_KEY = "round_object_{slug}_{seq}_{version}"
+
+CACHE_TIMEOUT = 60 * 60 * 24  # seconds
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the current time rather than from zero, so that if the
+        # version is evicted, versions used before the eviction aren't reused.
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_tournament_objects():
+    """Bumps the version, so that all tournaments and rounds cached before now
+    are fetched again."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # no version yet, so nothing to invalidate
+        pass
+
+
+def get_tournament(slug):
+    """Returns the tournament with the given slug, with all its preferences
+    loaded. Raises Http404 if there isn't one."""
+    key = TOURNAMENT_KEY.format(slug=slug, version=get_version())
+    tournament = cache.get(key)
+    if tournament is None:
+        tournament = get_object_or_404(Tournament, slug=slug)
+        tournament.load_prefs()
+        cache.set(key, tournament, CACHE_TIMEOUT)
+    return tournament
+
+
+def get_round(tournament, seq):
+    """Returns the round in `tournament` with the given sequence number. Raises
+    Http404 if there isn't one."""
+    key = ROUND_KEY.format(slug=tournament.slug, seq=seq, version=get_version())
+    round = cache.get(key)
+    if round is None:
+        round = get_object_or_404(Round, tournament=tournament, seq=seq)
+        cache.set(key, round, CACHE_TIMEOUT)
+    round.tournament = tournament  # share preferences already loaded
+    return round
@@ -1,4 +1,3 @@
-from django.core.cache import cache
 from django.forms import CharField, ChoiceField, Form, ModelChoiceField, ModelForm
 from django.forms.fields import IntegerField
 from django.forms.models import ModelChoiceIterator
@@ -13,8 +12,8 @@ from breakqual.utils import auto_make_break_rounds
 from options.preferences import TournamentStaff
 from options.presets import all_presets, get_preferences_data, presets_for_form, public_presets_for_form
 
+from .cache import invalidate_tournament_objects
 from .models import Round, Tournament
-from .signals import update_tournament_cache
 from .utils import auto_make_rounds
 
 
@@ -164,11 +163,6 @@ class RoundWithCompleteOptionField(RoundField):
         return super().to_python(value)
 
 
-def clear_all_round_caches(tournament):
-    cache.delete_many(["%s_%s_%s" % (tournament.slug, r.seq, 'object') for r in tournament.round_set.all()])
-    update_tournament_cache(Tournament, tournament)
-
-
 class SetCurrentRoundSingleBreakCategoryForm(Form):
     """Form to set completed rounds in a tournament with a single break category."""
 
@@ -184,7 +178,7 @@ class SetCurrentRoundSingleBreakCategoryForm(Form):
         seq = self.cleaned_data['current_round'].seq
         self.tournament.round_set.filter(seq__lt=seq).update(completed=True)
         self.tournament.round_set.filter(seq__gte=seq).update(completed=False)
-        clear_all_round_caches(self.tournament)
+        invalidate_tournament_objects()  # update() doesn't send signals
 
 
 class SetCurrentRoundMultipleBreakCategoriesForm(Form):
@@ -247,4 +241,4 @@ class SetCurrentRoundMultipleBreakCategoriesForm(Form):
                     seq = self.cleaned_data['elim_' + category.slug].seq
                     category.round_set.filter(seq__lt=seq).update(completed=True)
                     category.round_set.filter(seq__gte=seq).update(completed=False)
-        clear_all_round_caches(self.tournament)
+        invalidate_tournament_objects()  # update() doesn't send signals
@@ -4,10 +4,9 @@ import logging
 from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib import messages
-from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import Prefetch, Q
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 from django.template.response import TemplateResponse
 from django.urls import NoReverseMatch, reverse
 from django.utils.encoding import force_str
@@ -27,7 +26,7 @@ from utils.misc import (add_query_string_parameter, redirect_tournament,
 from utils.mixins import AssistantMixin, CacheMixin, TabbycatPageTitlesMixin
 from utils.serializers import django_rest_json_render
 
-from .models import Round, Tournament
+from .cache import get_round, get_tournament
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +44,6 @@ class TournamentFromUrlMixin:
     (for websocket consumers).
     """
     tournament_slug_url_kwarg = "tournament_slug"
-    tournament_cache_key = "{slug}_object"
     tournament_redirect_pattern_name = None
 
     def get_url_kwargs(self):
@@ -53,23 +51,11 @@ class TournamentFromUrlMixin:
 
     @property
     def tournament(self):
-        # First look in self,
-        if hasattr(self, "_tournament_from_url"):
-            return self._tournament_from_url
-
-        # then look in cache,
-        slug = self.get_url_kwargs()[self.tournament_slug_url_kwarg]
-        key = self.tournament_cache_key.format(slug=slug)
-        cached_tournament = cache.get(key)
-        if cached_tournament:
-            self._tournament_from_url = cached_tournament
-            return cached_tournament
-
-        # and if it was in neither place, retrieve the object
-        tournament = get_object_or_404(Tournament, slug=slug)
-        cache.set(key, tournament, None)
-        self._tournament_from_url = tournament
-        return tournament
+        # First look in self, then in the cache or database
+        if not hasattr(self, "_tournament_from_url"):
+            slug = self.get_url_kwargs()[self.tournament_slug_url_kwarg]
+            self._tournament_from_url = get_tournament(slug)
+        return self._tournament_from_url
 
 
 class TournamentMixin(TabbycatPageTitlesMixin, TournamentFromUrlMixin):
@@ -190,28 +176,15 @@ class RoundFromUrlMixin(TournamentFromUrlMixin):
     websocket consumers).
     """
     round_seq_url_kwarg = "round_seq"
-    round_cache_key = "{slug}_{seq}_object"
     round_redirect_pattern_name = None
 
     @property
     def round(self):
-        # First look in self,
-        if hasattr(self, "_round_from_url"):
-            return self._round_from_url
-
-        # then look in cache,
-        seq = self.get_url_kwargs()[self.round_seq_url_kwarg]
-        key = self.round_cache_key.format(slug=self.tournament.slug, seq=seq)
-        cached_round = cache.get(key)
-        if cached_round:
-            self._round_from_url = cached_round
-            return cached_round
-
-        # and if it was in neither place, retrieve the object
-        round = get_object_or_404(Round, tournament=self.tournament, seq=seq)
-        cache.set(key, round, None)
-        self._round_from_url = round
-        return round
+        # First look in self, then in the cache or database
+        if not hasattr(self, "_round_from_url"):
+            seq = self.get_url_kwargs()[self.round_seq_url_kwarg]
+            self._round_from_url = get_round(self.tournament, seq)
+        return self._round_from_url
 
 
 class RoundMixin(RoundFromUrlMixin, TournamentMixin):
@@ -73,6 +73,11 @@ class Tournament(models.Model):
             self._prefs[name] = self.preferences.get_by_name(name)
             return self._prefs[name]
 
+    def load_prefs(self):
+        """Loads all preferences into this instance at once, so that `pref()`
+        doesn't need to fetch them one at a time."""
+        self._prefs = {key.split('__', 1)[1]: value for key, value in self.preferences.all().items()}
+
     @property
     def sides(self):
         """Returns a list of side codes."""
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase
+
+from tournaments.cache import get_round, get_tournament
+from tournaments.models import Round, Tournament
+
+
+class TestTournamentObjectCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(slug="cachetest", name="Cache Test")
+        self.round = Round.objects.create(tournament=self.tournament, name="Round 1", abbreviation="R1", seq=1)
+
+    def test_cached_with_preferences(self):
+        get_tournament("cachetest")
+        with self.assertNumQueries(0):
+            tournament = get_tournament("cachetest")
+            tournament.pref('public_results')
+            tournament.pref('teams_in_debate')
+        self.assertEqual(tournament, self.tournament)
+
+    def test_round_cached(self):
+        get_round(get_tournament("cachetest"), 1)
+        with self.assertNumQueries(0):
+            tournament = get_tournament("cachetest")
+            round = get_round(tournament, 1)
+            self.assertIs(round.tournament, tournament)
+        self.assertEqual(round, self.round)
+
+    def test_invalidated_by_tournament_save(self):
+        get_tournament("cachetest")
+        self.tournament.name = "Renamed"
+        self.tournament.save()
+        self.assertEqual(get_tournament("cachetest").name, "Renamed")
+
+    def test_invalidated_by_round_save(self):
+        get_round(get_tournament("cachetest"), 1)
+        self.round.name = "Renamed"
+        self.round.save()
+        self.assertEqual(get_round(get_tournament("cachetest"), 1).name, "Renamed")
+
+    def test_invalidated_by_preference_change(self):
+        self.assertFalse(get_tournament("cachetest").pref('public_results'))
+        self.tournament.preferences['public_features__public_results'] = True
+        self.assertTrue(get_tournament("cachetest").pref('public_results'))
+
+    def test_not_found(self):
+        with self.assertRaises(Http404):
+            get_tournament("nonexistent")
+        with self.assertRaises(Http404):
+            get_round(self.tournament, 2)
@@ -1,10 +1,14 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
 from django.contrib.auth import get_user_model
 
 from adjallocation.allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
 from availability.utils import activate_all, set_availability
 from draw.manager import DrawManager
 from draw.models import Debate
-from results.dbutils import add_results_to_round
+from results.dbutils import add_results_to_round, add_results_to_round_in_bulk
 from results.management.commands.generateresults import GenerateResultsCommandMixin
 from tournaments.models import Round
 from utils.management.base import RoundCommand
@@ -12,12 +16,38 @@ from venues.allocator import allocate_venues
 
 User = get_user_model()
 
+STAGES = ["draw", "allocation", "venues", "results"]
+
 
 class Command(GenerateResultsCommandMixin, RoundCommand):
 
-    help = "Adds draws and results to the database"
+    help = "Adds draws and results to the database, and reports how long each stage took"
     confirm_round_destruction = "delete ALL DEBATES"
 
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("--fast", action="store_true", default=False,
+            help="Generate valid results directly and save them in bulk, rather than "
+                 "through the usual ballot-saving process (for large tournaments)")
+
+    def handle(self, *args, **options):
+        self.timings = defaultdict(float)
+        super(Command, self).handle(*args, **options)
+
+        if self.timings:
+            self.stdout.write(self.style.MIGRATE_HEADING("Total time in each stage:"))
+            for stage in STAGES:
+                self.stdout.write("  {:<12} {:8.2f} s".format(stage, self.timings[stage]))
+
+    @contextmanager
+    def stage(self, name, message):
+        self.stdout.write(message)
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.timings[name] += elapsed
+        self.stdout.write("  ... {} took {:.2f} s".format(name, elapsed))
+
     def handle_round(self, round, **options):
         self.stdout.write("Deleting all debates in round '{}'...".format(round.name))
         Debate.objects.filter(round=round).delete()
@@ -27,10 +57,10 @@ class Command(GenerateResultsCommandMixin, RoundCommand):
         self.stdout.write("Checking in all teams, adjudicators and rooms for round '{}'...".format(round.name))
         activate_all(round)
 
-        self.stdout.write("Generating a draw for round '{}'...".format(round.name))
-        DrawManager(round).create()
-        round.draw_status = Round.STATUS_CONFIRMED
-        round.save()
+        with self.stage("draw", "Generating a draw for round '{}'...".format(round.name)):
+            DrawManager(round).create()
+            round.draw_status = Round.STATUS_CONFIRMED
+            round.save()
 
         # Limit to 7 adjudicators per debate (just to avoid panel sizes getting too out of hand)
         max_nadjudicators = round.debate_set.count() * 7
@@ -38,22 +68,26 @@ class Command(GenerateResultsCommandMixin, RoundCommand):
             adjs = round.tournament.relevant_adjudicators.order_by('?')[:max_nadjudicators]
             set_availability(adjs, round)
 
-        self.stdout.write("Auto-allocating adjudicators for round '{}'...".format(round.name))
-        debates = round.debate_set.all()
-        adjs = round.active_adjudicators.all()
-        if round.ballots_per_debate == 'per-adj':
-            allocator = VotingHungarianAllocator(debates, adjs, round)
-        else:
-            allocator = ConsensusHungarianAllocator(debates, adjs, round)
+        with self.stage("allocation", "Auto-allocating adjudicators for round '{}'...".format(round.name)):
+            debates = round.debate_set.all()
+            adjs = round.active_adjudicators.all()
+            if round.ballots_per_debate == 'per-adj':
+                allocator = VotingHungarianAllocator(debates, adjs, round)
+            else:
+                allocator = ConsensusHungarianAllocator(debates, adjs, round)
 
-        allocation, extra_msgs = allocator.allocate()
-        for alloc in allocation:
-            alloc.save()
+            allocation, extra_msgs = allocator.allocate()
+            for alloc in allocation:
+                alloc.save()
 
-        allocate_venues(round)
+        with self.stage("venues", "Allocating venues for round '{}'...".format(round.name)):
+            allocate_venues(round)
 
-        self.stdout.write("Generating results for round '{}'...".format(round.name))
-        add_results_to_round(round, **self.result_kwargs(options))
+        with self.stage("results", "Generating results for round '{}'...".format(round.name)):
+            if options["fast"]:
+                add_results_to_round_in_bulk(round, **self.result_kwargs(options))
+            else:
+                add_results_to_round(round, **self.result_kwargs(options))
 
         round.completed = True
         round.save()
@@ -2,6 +2,10 @@ import logging
 from secrets import SystemRandom
 from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.utils import formats, timezone, translation
@@ -17,6 +21,17 @@ def get_ip_address(request):
     return client_ip
 
 
+def cache_is_shared():
+    """Returns True if the default cache is shared between processes, so that
+    something cached by a web process is seen by the channels workers, and
+    vice versa. Local-memory caches (the default outside Heroku and Docker)
+    aren't shared. The `CACHE_IS_SHARED` setting, if set, overrides this."""
+    shared = getattr(settings, 'CACHE_IS_SHARED', None)
+    if shared is not None:
+        return shared
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
 def redirect_tournament(to, tournament, *args, **kwargs):
     return redirect(to, tournament_slug=tournament.slug, *args, **kwargs)
 
@@ -814,6 +814,27 @@ class TabbycatTableBuilder(BaseTableBuilder):
             data.append(row)
         self.add_columns(headers, data)
 
+    def add_break_probability_columns(self, teams, categories, probabilities):
+        """Adds a column for each break category in `categories`, showing the
+        estimated probability of each team breaking in it. `probabilities` is as
+        returned by `breakqual.utils.calculate_break_probabilities()`."""
+        for category in categories:
+            category_probabilities = probabilities.get(category.id, {})
+            header = {
+                'key': "break-" + category.slug,
+                'title': _("%(category)s %%") % {'category': category.name},
+                'tooltip': _("Estimated chance of breaking in the %(category)s break, "
+                    "from simulations of the remaining rounds") % {'category': category.name},
+            }
+            data = []
+            for team in teams:
+                probability = category_probabilities.get(team.id)
+                if probability is None:
+                    data.append({'text': "—", 'sort': -1, 'tooltip': _("Not eligible")})
+                else:
+                    data.append({'text': "{:.0%}".format(probability), 'sort': probability})
+            self.add_column(header, data)
+
     def add_debate_ballot_link_column(self, debates, show_ballot=False):
         ballot_links_header = {'key': "ballot", 'icon': 'search',
                                'tooltip': _("The ballot you submitted")}
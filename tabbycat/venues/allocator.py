@@ -1,19 +1,37 @@
 import itertools
 import logging
 import random
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
 
 from draw.models import Debate
 
-from .models import VenueConstraint
+from .models import VenueCategory, VenueConstraint
 
 logger = logging.getLogger(__name__)
 
 
-def allocate_venues(round, debates=None):
-    allocator = VenueAllocator()
+def allocate_venues(round, debates=None, method=None):
+    """Allocates venues using `method`, one of the keys of `VENUE_ALLOCATORS`.
+    If `method` is not given, the `venue_allocation_method` preference is used."""
+    if method is None:
+        method = round.tournament.pref('venue_allocation_method')
+    allocator = VENUE_ALLOCATORS[method]()
     allocator.allocate(round, debates)
 
 
+def category_venue_ids(category_ids):
+    """Returns a dict mapping each category ID in `category_ids` to the set of
+    IDs of the venues in it, using a single query."""
+    venue_ids = {category_id: set() for category_id in category_ids}
+    through = VenueCategory.venues.through.objects.filter(venuecategory_id__in=category_ids)
+    for category_id, venue_id in through.values_list('venuecategory_id', 'venue_id'):
+        venue_ids[category_id].add(venue_id)
+    return venue_ids
+
+
 class VenueAllocator:
     """Allocates venues in a draw to satisfy, as best it can, applicable venue
     constraints.
@@ -28,6 +46,11 @@ class VenueAllocator:
     def allocate(self, round, debates=None):
         if debates is None:
             debates = round.debate_set_with_prefetches(speakers=False, institutions=True)
+        self.save_venues(self.assign(round, debates))
+
+    def assign(self, round, debates):
+        """Returns a dict mapping each debate in `debates` to a venue, or to
+        None if there weren't enough venues. Nothing is saved."""
         self._all_venues = list(round.active_venues.order_by('-priority'))
         self._preferred_venues = self._all_venues[:len(debates)]
 
@@ -48,7 +71,7 @@ class VenueAllocator:
                 self._venue_shortage, len(debates_without_venues))
         debate_venues.update({debate: None for debate in debates_without_venues})
 
-        self.save_venues(debate_venues)
+        return debate_venues
 
     def collect_constraints(self, debates):
         """Returns a list of tuples `(debate, constraints)`, where `constraints`
@@ -172,3 +195,193 @@ class VenueAllocator:
         for debate, venue in debate_venues.items():
             debate.venue = venue
         Debate.objects.bulk_update(debate_venues.keys(), ['venue'])
+
+
+class HungarianVenueAllocator(VenueAllocator):
+    """Allocates venues by solving a single assignment problem over all
+    debates and venues, using the Hungarian algorithm, so that, unlike in the
+    greedy allocator, a flexible debate never takes a room that a pickier debate
+    needed.
+
+    The cost of putting a debate in a venue is the sum of:
+    - for each team, adjudicator or institution in the debate that has
+      constraints, the priority of its highest-priority constraint, less the
+      priority of the highest-priority constraint that the venue satisfies (so
+      zero if the venue satisfies its highest-priority constraint), multiplied
+      by `constraint_weight`;
+    - `nonpreferred_cost`, if the venue isn't among the highest-priority
+      venues (the "preferred" venues of the greedy allocator);
+    - a reward (negative cost) of up to `room_rank_weight` for matching
+      high-priority venues to debates with a high importance, then to debates
+      in top rooms;
+    - a small random amount, up to `tie_break`, so that otherwise equivalent
+      venues are chosen at random, as in the greedy allocator.
+
+    Constraint priorities are offset so that the lowest is 1, and the weights
+    are such that constraints always outweigh the other terms. However, since
+    costs are added, two low-priority constraints can outweigh a high-priority
+    one, unlike in the greedy allocator.
+
+    The cost matrix is built from arrays, rather than by iterating over every
+    debate-venue pair, so it takes a fraction of a second even for hundreds of
+    debates.
+    """
+
+    constraint_weight = 1000
+    nonpreferred_cost = 10
+    room_rank_weight = 1
+    tie_break = 0.01
+
+    def assign(self, round, debates):
+        debates = list(debates)
+        venues = list(round.active_venues.order_by('-priority'))
+        if len(debates) > len(venues):
+            logger.warning("%d debates but only %d venues", len(debates), len(venues))
+
+        debate_venues = {debate: None for debate in debates}
+        if not debates or not venues:
+            return debate_venues
+
+        cost = self.cost_matrix(debates, venues, self.collect_constraints(debates))
+        rows, cols = linear_sum_assignment(cost)
+        debate_venues.update({debates[i]: venues[j] for i, j in zip(rows, cols)})
+        return debate_venues
+
+    def cost_matrix(self, debates, venues, debate_constraints):
+        """Returns the cost matrix for assigning `debates` (rows) to `venues`
+        (columns), which must be sorted by descending priority.
+        `debate_constraints` is as returned by `collect_constraints()`."""
+        ndebates, nvenues = len(debates), len(venues)
+        cost = np.zeros((ndebates, nvenues))
+
+        # Venues beyond the first `ndebates` wouldn't be needed by the greedy allocator
+        cost[:, ndebates:] += self.nonpreferred_cost
+
+        priorities = np.array([venue.priority for venue in venues], dtype=float)
+        spread = priorities.max() - priorities.min()
+        if spread > 0:
+            venue_scores = (priorities - priorities.min()) / spread
+            order = np.lexsort((
+                np.array([debate.room_rank for debate in debates]),
+                -np.array([debate.importance for debate in debates]),
+            ))
+            debate_scores = np.empty(ndebates)
+            debate_scores[order] = 1 - np.arange(ndebates) / ndebates
+            cost -= self.room_rank_weight * np.outer(debate_scores, venue_scores)
+
+        if debate_constraints:
+            cost += self.constraint_weight * self.constraint_costs(debates, venues, debate_constraints)
+
+        if self.tie_break:
+            cost += self.tie_break * np.random.random_sample(cost.shape)
+
+        return cost
+
+    def constraint_costs(self, debates, venues, debate_constraints):
+        """Returns a matrix of the (unweighted) constraint costs, as described
+        in the class docstring."""
+        debate_index = {debate: i for i, debate in enumerate(debates)}
+        subject_index = {}  # (debate index, subject) to group index
+        groups, categories, priorities = [], [], []
+        for debate, constraints in debate_constraints:
+            for vc in constraints:
+                key = (debate_index[debate], vc.subject_content_type_id, vc.subject_id)
+                groups.append(subject_index.setdefault(key, len(subject_index)))
+                categories.append(vc.category_id)
+                priorities.append(vc.priority)
+
+        # Membership of venues in each category, one row per category
+        category_ids = sorted(set(categories))
+        venue_index = {venue.id: j for j, venue in enumerate(venues)}
+        membership = np.zeros((len(category_ids), len(venues)), dtype=bool)
+        for i, venue_ids in enumerate(category_venue_ids(category_ids).values()):
+            membership[i, [venue_index[v] for v in venue_ids if v in venue_index]] = True
+
+        # Value of each venue to each constraint: its (offset) priority if the
+        # venue is in its category, zero otherwise
+        groups = np.array(groups)
+        priorities = np.array(priorities, dtype=float)
+        priorities += 1 - priorities.min()
+        values = np.where(membership[np.searchsorted(category_ids, categories)], priorities[:, np.newaxis], 0)
+
+        # Take the best constraint for each subject in each debate
+        order = np.argsort(groups, kind='stable')
+        starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+        best = np.maximum.reduceat(values[order], starts, axis=0)
+        highest = np.maximum.reduceat(priorities[order], starts)
+
+        group_debates = np.empty(len(subject_index), dtype=int)
+        for (debate_idx, _, _), group in subject_index.items():
+            group_debates[group] = debate_idx
+
+        costs = np.zeros((len(debates), len(venues)))
+        np.add.at(costs, group_debates, highest[:, np.newaxis] - best)
+        return costs
+
+
+VENUE_ALLOCATORS = {
+    'greedy': VenueAllocator,
+    'hungarian': HungarianVenueAllocator,
+}
+
+
+def constraint_satisfaction(debate_venues, debate_constraints):
+    """Returns a dict summarising how well the allocation `debate_venues` (as
+    returned by `VenueAllocator.assign()`) satisfies `debate_constraints` (as
+    returned by `VenueAllocator.collect_constraints()`). Constraints are
+    counted by subject, i.e., a team, adjudicator or institution in a debate
+    counts once, however many constraints it has:
+    - `subjects`: the number of subjects with constraints,
+    - `satisfied`: the number of those for which any constraint is satisfied,
+    - `satisfied_highest`: the number for which the highest-priority
+      constraint is satisfied,
+    - `unsatisfied_priority`: the sum of the highest priorities of subjects
+      with no constraint satisfied,
+    - `without_venue`: the number of debates without a venue."""
+
+    category_ids = {vc.category_id for _, constraints in debate_constraints for vc in constraints}
+    venue_ids = category_venue_ids(category_ids)
+
+    report = dict(subjects=0, satisfied=0, satisfied_highest=0, unsatisfied_priority=0,
+        without_venue=sum(1 for venue in debate_venues.values() if venue is None))
+
+    for debate, constraints in debate_constraints:
+        venue = debate_venues.get(debate)
+        by_subject = {}
+        for vc in sorted(constraints, key=lambda x: x.priority, reverse=True):
+            by_subject.setdefault((vc.subject_content_type_id, vc.subject_id), []).append(vc)
+
+        for subject_constraints in by_subject.values():
+            satisfied = [venue is not None and venue.id in venue_ids[vc.category_id] for vc in subject_constraints]
+            report['subjects'] += 1
+            if any(satisfied):
+                report['satisfied'] += 1
+            else:
+                report['unsatisfied_priority'] += subject_constraints[0].priority
+            if satisfied[0]:
+                report['satisfied_highest'] += 1
+
+    return report
+
+
+def compare_venue_allocators(round, debates=None, methods=None):
+    """Runs each allocator in `methods` (by default, all of them) on `round`
+    without saving, and returns a dict mapping each method to its constraint
+    satisfaction report (see `constraint_satisfaction()`), with the time taken
+    in seconds added as `time`."""
+    if debates is None:
+        debates = round.debate_set_with_prefetches(speakers=False, institutions=True)
+    debates = list(debates)
+
+    reports = {}
+    for method in methods or VENUE_ALLOCATORS.keys():
+        start = time.perf_counter()
+        debate_venues = VENUE_ALLOCATORS[method]().assign(round, debates)
+        elapsed = time.perf_counter() - start
+
+        # The greedy allocator consumes its constraint lists, so collect afresh
+        debate_constraints = VenueAllocator().collect_constraints(debates)
+        reports[method] = constraint_satisfaction(debate_venues, debate_constraints)
+        reports[method]['time'] = elapsed
+
+    return reports
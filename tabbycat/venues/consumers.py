@@ -4,7 +4,7 @@ from actionlog.models import ActionLogEntry
 from draw.consumers import EditDebateOrPanelWorkerMixin
 from tournaments.models import Round
 
-from .allocator import allocate_venues
+from .allocator import allocate_venues, VENUE_ALLOCATORS
 from .serializers import SimpleDebateVenueSerializer
 
 
@@ -21,6 +21,11 @@ class VenuesWorkerConsumer(EditDebateOrPanelWorkerMixin):
             self.return_error(group, _("Draw is not confirmed, confirm draw to assign rooms."))
             return
 
+        # The Vue modal sends the allocation method as a preference
+        method = (event['extra'].get('settings') or {}).get('draw_rules__venue_allocation_method')
+        if method in VENUE_ALLOCATORS:
+            round.tournament.preferences['draw_rules__venue_allocation_method'] = method
+
         allocate_venues(round)
         self.log_action(event['extra'], round, ActionLogEntry.ACTION_TYPE_VENUES_AUTOALLOCATE)
 
@@ -1,12 +1,33 @@
 from utils.management.base import RoundCommand
 
-from ...allocator import allocate_venues
+from ...allocator import allocate_venues, compare_venue_allocators, VENUE_ALLOCATORS
 
 
 class Command(RoundCommand):
 
     help = "Assigns rooms for all debates in a round (or rounds)."
 
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument("--method", type=str, choices=list(VENUE_ALLOCATORS.keys()), default=None,
+            help="Allocation method (default: the tournament's room allocation method setting)")
+        parser.add_argument("--compare", action="store_true", default=False,
+            help="Compare constraint satisfaction of allocation methods, without assigning rooms")
+
     def handle_round(self, round, **options):
+        if options["compare"]:
+            self.compare(round, options["method"])
+            return
+
         self.stdout.write("Assigning rooms for all debates in round '{}'...".format(round.name))
-        allocate_venues(round)
+        allocate_venues(round, method=options["method"])
+
+    def compare(self, round, method):
+        self.stdout.write("Comparing room allocation methods for round '{}'...".format(round.name))
+        reports = compare_venue_allocators(round, methods=[method] if method else None)
+
+        self.stdout.write("{:<10} {:>9} {:>9} {:>9} {:>12} {:>9} {:>9}".format(
+            "method", "subjects", "satisfied", "highest", "unsatisfied", "no room", "time (s)"))
+        for name, report in reports.items():
+            self.stdout.write("{:<10} {subjects:>9d} {satisfied:>9d} {satisfied_highest:>9d} "
+                "{unsatisfied_priority:>12d} {without_venue:>9d} {time:>9.3f}".format(name, **report))
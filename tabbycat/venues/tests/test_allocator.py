@@ -0,0 +1,79 @@
+from django.test import TestCase
+
+from availability.utils import activate_all
+from tournaments.models import Tournament
+
+from ..allocator import allocate_venues, compare_venue_allocators, HungarianVenueAllocator, VenueAllocator
+from ..models import VenueCategory, VenueConstraint
+
+
+class TestHungarianVenueAllocator(TestCase):
+
+    fixtures = ['after_round_4.json']
+
+    def setUp(self):
+        self.tournament = Tournament.objects.first()
+        self.round = self.tournament.round_set.get(seq=4)
+        activate_all(self.round)
+        self.debates = list(self.round.debate_set_with_prefetches(speakers=False, institutions=True))
+        self.venues = list(self.round.active_venues.order_by('-priority'))
+
+    def add_constraint(self, debate, venues, priority):
+        category = VenueCategory.objects.create(name="Category %d" % priority, tournament=self.tournament)
+        category.venues.set(venues)
+        return VenueConstraint.objects.create(category=category, priority=priority, subject=debate.teams[0])
+
+    def test_all_debates_assigned(self):
+        debate_venues = HungarianVenueAllocator().assign(self.round, self.debates)
+        self.assertEqual(set(debate_venues.keys()), set(self.debates))
+        venues = [venue for venue in debate_venues.values()]
+        self.assertNotIn(None, venues)
+        self.assertEqual(len(set(venues)), len(self.debates))
+
+    def test_preferred_venues(self):
+        # With no constraints, only the highest-priority venues should be used
+        debate_venues = HungarianVenueAllocator().assign(self.round, self.debates)
+        lowest = min(venue.priority for venue in debate_venues.values())
+        self.assertFalse(any(v.priority > lowest for v in self.venues if v not in debate_venues.values()))
+
+    def test_satisfies_competing_constraints(self):
+        # The greedy allocator gives the first debate either venue, leaving
+        # the second debate's constraint unsatisfied half the time
+        flexible, picky = self.debates[:2]
+        self.add_constraint(flexible, self.venues[:2], 10)
+        self.add_constraint(picky, self.venues[:1], 5)
+
+        debate_venues = HungarianVenueAllocator().assign(self.round, self.debates)
+        self.assertEqual(debate_venues[picky], self.venues[0])
+        self.assertEqual(debate_venues[flexible], self.venues[1])
+
+    def test_alternative_constraints(self):
+        debate = self.debates[0]
+        self.add_constraint(debate, self.venues[-1:], 10)
+        self.add_constraint(debate, self.venues[-2:-1], 5)
+        self.add_constraint(self.debates[1], self.venues[-1:], 20)
+
+        debate_venues = HungarianVenueAllocator().assign(self.round, self.debates)
+        self.assertEqual(debate_venues[self.debates[1]], self.venues[-1])
+        self.assertEqual(debate_venues[debate], self.venues[-2])
+
+    def test_allocate_saves(self):
+        self.round.debate_set.update(venue=None)
+        allocate_venues(self.round, method='hungarian')
+        self.assertFalse(self.round.debate_set.filter(venue__isnull=True).exists())
+
+    def test_compare(self):
+        flexible, picky = self.debates[:2]
+        self.add_constraint(flexible, self.venues[:2], 10)
+        self.add_constraint(picky, self.venues[:1], 5)
+
+        reports = compare_venue_allocators(self.round)
+        self.assertEqual(set(reports.keys()), {'greedy', 'hungarian'})
+        self.assertEqual(reports['hungarian']['subjects'], 2)
+        self.assertEqual(reports['hungarian']['satisfied'], 2)
+        self.assertEqual(reports['hungarian']['unsatisfied_priority'], 0)
+        self.assertGreaterEqual(reports['hungarian']['satisfied'], reports['greedy']['satisfied'])
+
+    def test_greedy_unchanged(self):
+        debate_venues = VenueAllocator().assign(self.round, self.debates)
+        self.assertNotIn(None, debate_venues.values())
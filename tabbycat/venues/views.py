@@ -46,6 +46,9 @@ class EditDebateVenuesView(DebateDragAndDropMixin, AdministratorMixin, TemplateV
         # Most recently created venues take priority in getting the highlight
         vcs = VenueCategory.objects.order_by('id').reverse()
         info['highlights']['category'] = [{'pk': vc.id, 'fields': {'name': vc.name}} for vc in vcs]
+        info['allocationSettings'] = {
+            'draw_rules__venue_allocation_method': self.tournament.pref('venue_allocation_method'),
+        }
         return info
 
 